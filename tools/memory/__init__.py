@@ -18,10 +18,17 @@ Components:
 """
 
 from .memory_db import (
+    connection,
+    close_pool,
+    flush_access_log,
+    compact,
     add_entry,
+    add_entries_bulk,
+    import_entries_file,
     get_entry,
     list_entries,
     search_entries,
+    fts_search,
     update_entry,
     delete_entry,
     get_recent,
@@ -29,6 +36,7 @@ from .memory_db import (
     add_daily_log,
     get_daily_log,
     store_embedding,
+    store_embeddings,
     get_entries_without_embeddings
 )
 
@@ -37,6 +45,8 @@ from .memory_read import (
     read_daily_log,
     read_recent_logs,
     load_all_memory,
+    load_session_context,
+    load_budgeted_context,
     format_as_markdown
 )
 
@@ -44,15 +54,23 @@ from .memory_write import (
     append_to_daily_log,
     write_to_memory,
     append_to_memory_file,
+    append_many_to_memory_file,
     sync_log_to_db
 )
 
 __all__ = [
     # Database operations
+    'connection',
+    'close_pool',
+    'flush_access_log',
+    'compact',
     'add_entry',
+    'add_entries_bulk',
+    'import_entries_file',
     'get_entry',
     'list_entries',
     'search_entries',
+    'fts_search',
     'update_entry',
     'delete_entry',
     'get_recent',
@@ -60,16 +78,20 @@ __all__ = [
     'add_daily_log',
     'get_daily_log',
     'store_embedding',
+    'store_embeddings',
     'get_entries_without_embeddings',
     # Read operations
     'read_memory_file',
     'read_daily_log',
     'read_recent_logs',
     'load_all_memory',
+    'load_session_context',
+    'load_budgeted_context',
     'format_as_markdown',
     # Write operations
     'append_to_daily_log',
     'write_to_memory',
     'append_to_memory_file',
+    'append_many_to_memory_file',
     'sync_log_to_db',
 ]
@@ -0,0 +1,274 @@
+"""
+Tool: Access Log Buffer
+Purpose: Write-behind buffering of memory access events (memory_access_log)
+
+get_entry / search_entries / update_entry record their access events here
+instead of writing to SQLite on the read path. Events are kept in memory and
+flushed in one transaction per batch:
+- one executemany INSERT into memory_access_log
+- one aggregated UPDATE per entry (access_count + n, latest last_accessed)
+
+A flush happens from a background thread every MEMORY_ACCESS_LOG_FLUSH_SECONDS,
+early once MEMORY_ACCESS_LOG_BATCH events are pending, and at process exit.
+After each background flush the thread also runs the owner's maintenance
+hook (memory_db.scheduled_maintenance), so periodic upkeep stays off the
+callers' read path.
+Events that fail to flush (e.g. database locked) are retried on the next
+flush; beyond MAX_PENDING the oldest are dropped and counted.
+
+Retention: rollup() folds raw events older than the retention horizon into
+memory_access_daily(memory_id, day, access_type, count) and deletes them,
+so the raw log only holds recent history. memory_db.compact() runs it (plus
+incremental vacuum) from the flusher thread on a schedule and from
+--action compact.
+
+Modes (MEMORY_ACCESS_LOG):
+- buffered: write-behind as above (default)
+- sync:     flush in the caller after every event (previous behaviour)
+- off:      read-only, access events are not recorded at all
+
+Used by memory_db.py.
+
+Dependencies:
+    - sqlite3 (stdlib)
+
+Env Vars:
+    - MEMORY_ACCESS_LOG (optional, buffered (default), sync or off)
+    - MEMORY_ACCESS_LOG_BATCH (optional, pending events that trigger a flush, default 256)
+    - MEMORY_ACCESS_LOG_FLUSH_SECONDS (optional, background flush interval, default 2)
+    - MEMORY_ACCESS_LOG_RETENTION_DAYS (optional, raw events kept before rollup, default 30)
+
+Output:
+    None (library module)
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
+
+ACCESS_LOG_MODES = ['buffered', 'sync', 'off']
+
+ACCESS_LOG_MODE = os.getenv('MEMORY_ACCESS_LOG', 'buffered')
+FLUSH_BATCH_SIZE = int(os.getenv('MEMORY_ACCESS_LOG_BATCH', '256'))
+FLUSH_INTERVAL_SECONDS = float(os.getenv('MEMORY_ACCESS_LOG_FLUSH_SECONDS', '2'))
+
+RETENTION_DAYS = int(os.getenv('MEMORY_ACCESS_LOG_RETENTION_DAYS', '30'))
+
+# Pending events kept while flushes keep failing; older ones are dropped
+MAX_PENDING = 50000
+
+# Access types that count towards memory_entries.access_count / last_accessed
+COUNTED_ACCESS_TYPES = ('read',)
+
+# (memory_id, access_type, query, accessed_at)
+Event = Tuple[int, str, Optional[str], str]
+
+
+def _timestamp() -> str:
+    """UTC timestamp in SQLite CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def create_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the rollup table and access log indexes (called from memory_db.init_db)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS memory_access_daily (
+            memory_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            access_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (memory_id, day, access_type)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_access_log_accessed ON memory_access_log(accessed_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_access_log_memory ON memory_access_log(memory_id)')
+
+
+def rollup(cursor: sqlite3.Cursor, retention_days: int = RETENTION_DAYS) -> Dict[str, Any]:
+    """
+    Fold raw events from before the retention horizon into daily aggregates.
+
+    Whole days are rolled up (the horizon is rounded down to midnight UTC),
+    and the raw rows are deleted in the same transaction, so no event is
+    counted twice.
+
+    Args:
+        cursor: Database cursor (caller commits)
+        retention_days: Days of raw events to keep
+
+    Returns:
+        dict with rolled_up (raw rows folded) and pruned (raw rows deleted)
+    """
+    cutoff = cursor.execute("SELECT date('now', ?)", (f'-{int(retention_days)} days',)).fetchone()[0]
+
+    cursor.execute('''
+        INSERT INTO memory_access_daily (memory_id, day, access_type, count)
+        SELECT memory_id, date(accessed_at), COALESCE(access_type, 'read'), COUNT(*)
+        FROM memory_access_log
+        WHERE accessed_at < ? AND memory_id IS NOT NULL
+        GROUP BY memory_id, date(accessed_at), COALESCE(access_type, 'read')
+        ON CONFLICT(memory_id, day, access_type) DO UPDATE SET count = count + excluded.count
+    ''', (cutoff,))
+    cursor.execute(
+        'SELECT COUNT(*) FROM memory_access_log WHERE accessed_at < ? AND memory_id IS NOT NULL', (cutoff,)
+    )
+    rolled_up = cursor.fetchone()[0]
+
+    cursor.execute('DELETE FROM memory_access_log WHERE accessed_at < ?', (cutoff,))
+    return {"rolled_up": rolled_up, "pruned": cursor.rowcount, "cutoff": cutoff}
+
+
+def write_events(cursor: sqlite3.Cursor, events: List[Event]) -> None:
+    """Write a batch of events; access_count increments are aggregated per entry."""
+    cursor.executemany(
+        'INSERT INTO memory_access_log (memory_id, access_type, query, accessed_at) VALUES (?, ?, ?, ?)',
+        events
+    )
+
+    counts: Counter = Counter()
+    latest: Dict[int, str] = {}
+    for memory_id, access_type, _, accessed_at in events:
+        if access_type in COUNTED_ACCESS_TYPES:
+            counts[memory_id] += 1
+            latest[memory_id] = max(latest.get(memory_id, accessed_at), accessed_at)
+
+    cursor.executemany('''
+        UPDATE memory_entries
+        SET access_count = COALESCE(access_count, 0) + ?,
+            last_accessed = MAX(COALESCE(last_accessed, ?), ?)
+        WHERE id = ?
+    ''', [(n, latest[memory_id], latest[memory_id], memory_id) for memory_id, n in counts.items()])
+
+
+class AccessLogBuffer:
+    """
+    Thread-safe write-behind buffer for memory access events.
+
+    Args:
+        connect: Returns a DB connection (memory_db.get_connection); closed after each flush
+        mode: 'buffered', 'sync' or 'off'
+        batch_size: Pending events that wake the flusher early
+        flush_interval: Seconds between background flushes
+        maintenance: Optional callable run by the background thread after
+            each flush (database errors are ignored)
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        mode: str = ACCESS_LOG_MODE,
+        batch_size: int = FLUSH_BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        maintenance: Optional[Callable[[], Any]] = None
+    ):
+        if mode not in ACCESS_LOG_MODES:
+            raise ValueError(f"Invalid access log mode. Must be one of: {ACCESS_LOG_MODES}")
+        self.connect = connect
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.maintenance = maintenance
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._events: List[Event] = []
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._flushed = 0
+        self._dropped = 0
+
+    def record(self, memory_id: int, access_type: str, query: Optional[str] = None) -> None:
+        """Record one access event."""
+        self.record_many([memory_id], access_type, query)
+
+    def record_many(self, memory_ids: Iterable[int], access_type: str, query: Optional[str] = None) -> None:
+        """Record the same access (e.g. one search) for several entries."""
+        if self.mode == 'off':
+            return
+        accessed_at = _timestamp()
+        events = [(memory_id, access_type, query, accessed_at) for memory_id in memory_ids]
+        if not events:
+            return
+
+        with self._lock:
+            self._check_fork()
+            self._events.extend(events)
+            pending = len(self._events)
+
+        if self.mode == 'sync':
+            self.flush()
+            return
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write all pending events now; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                self._check_fork()
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            try:
+                conn = self.connect()
+                try:
+                    write_events(conn.cursor(), events)
+                    conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                # Keep the events for the next flush, oldest first
+                with self._lock:
+                    self._events = events + self._events
+                    overflow = len(self._events) - MAX_PENDING
+                    if overflow > 0:
+                        del self._events[:overflow]
+                        self._dropped += overflow
+                return 0
+
+            self._flushed += len(events)
+            return len(events)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer counters for get_stats."""
+        with self._lock:
+            pending = len(self._events)
+        return {
+            "mode": self.mode,
+            "pending": pending,
+            "flushed": self._flushed,
+            "dropped": self._dropped
+        }
+
+    def _check_fork(self) -> None:
+        # Events buffered by the parent belong to the parent (caller holds _lock)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._events = []
+            self._thread = None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='memory-access-log', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.maintenance is not None:
+                try:
+                    self.maintenance()
+                except sqlite3.Error:
+                    pass
@@ -0,0 +1,651 @@
+"""
+Tool: Approximate Nearest-Neighbour Index
+Purpose: Optional IVF-flat index over the persistent vector index (data/memory.vec)
+
+Rows of the memory-mapped embedding matrix are clustered with spherical
+k-means into `nlist` inverted lists. A query scores the centroids, probes the
+`nprobe` closest lists and rescans only their rows exactly, so search cost
+scales with the probed lists instead of the whole corpus.
+
+The index file (data/memory.ivf) holds:
+- A fixed 64-byte header: magic, dimensions, nlist, synced vector-index
+  generation, capacity, list slots
+- The centroid matrix (nlist x dimensions float32)
+- One int32 list assignment per vector-index row (-1 = unassigned); deleted
+  entries keep their list with the TOMBSTONE bit set
+- The inverted lists, CSR-style: per-list start offsets (nlist + 1 int64) and
+  used lengths (nlist int64) into one int32 array of row positions. Each list
+  is laid out with spare slots so new rows are appended in place; when a list
+  runs out of room the lists are re-laid out from the assignments.
+
+A query gathers only the probed lists' slots, then keeps the rows whose
+current assignment is one of the probes (dropping tombstones and slots left
+behind when an overwritten row moved to another list).
+
+Vector-index writes keep the IVF index in step while holding the
+vector-index lock, so updates apply in generation order: upsert_vectors()
+assigns and appends the written rows, rebuild_index() reassigns every row
+with the existing centroids, and delete_entry() sets tombstones. If the
+index still falls behind (generation mismatch) or is disabled, semantic
+search uses exact brute-force scoring.
+
+Usage:
+    python tools/memory/ann_index.py --build                 # Train/rebuild the IVF index
+    python tools/memory/ann_index.py --build --nlist 256     # Explicit number of lists
+    python tools/memory/ann_index.py --stats                 # Show index status
+    python tools/memory/ann_index.py --benchmark             # Recall/latency vs exact search
+    python tools/memory/ann_index.py --benchmark --nprobe 1,4,16 --queries 200
+
+Dependencies:
+    - numpy
+    - sqlite3 (stdlib)
+
+Env Vars:
+    - MEMORY_ANN_INDEX (optional, "ivf" to enable ANN search; default off)
+    - MEMORY_ANN_NPROBE (optional, lists probed per query; higher = better recall, slower)
+
+Output:
+    JSON result with success status and index info
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import struct
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+import numpy as np
+
+# Import from sibling modules
+sys.path.insert(0, str(Path(__file__).parent))
+import memory_db
+import vector_index
+from vector_engine import VectorEngine, normalize_rows, normalize_vector, top_k
+
+MAGIC = b'ELIVF002'
+HEADER = struct.Struct('<8sIIQQQ')  # magic, dims, nlist, vec_generation, capacity, slots
+HEADER_SIZE = 64
+UNASSIGNED = -1
+TOMBSTONE = 0x40000000
+
+DEFAULT_NPROBE = 8
+MAX_NLIST = 4096
+TRAIN_SAMPLE_SIZE = 50_000
+TRAIN_ITERATIONS = 10
+ASSIGN_CHUNK_ROWS = 65_536
+
+# Spare slots per inverted list: a quarter of its size, at least this many
+LIST_MIN_SLACK = 16
+
+
+def ann_enabled() -> bool:
+    """True if ANN search is switched on via MEMORY_ANN_INDEX."""
+    return os.getenv('MEMORY_ANN_INDEX', 'off').strip().lower() in ('ivf', 'on', 'true', '1')
+
+
+def default_nprobe() -> int:
+    """Lists probed per query (MEMORY_ANN_NPROBE, default 8)."""
+    try:
+        return max(1, int(os.getenv('MEMORY_ANN_NPROBE', DEFAULT_NPROBE)))
+    except ValueError:
+        return DEFAULT_NPROBE
+
+
+def ann_path() -> Path:
+    """Path of the IVF index file (next to memory.vec)."""
+    return vector_index.index_path().with_suffix('.ivf')
+
+
+def read_header(path: Optional[Path] = None) -> Optional[Dict[str, int]]:
+    """Read the IVF header, or None if the file is missing or invalid."""
+    path = path or ann_path()
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, dims, nlist, vec_generation, capacity, slots = HEADER.unpack(raw)
+    if magic != MAGIC:
+        return None
+    return {"dims": dims, "nlist": nlist, "vec_generation": vec_generation,
+            "capacity": capacity, "slots": slots}
+
+
+def _write_header(f, header: Dict[str, int]) -> None:
+    f.seek(0)
+    f.write(HEADER.pack(
+        MAGIC, header["dims"], header["nlist"], header["vec_generation"], header["capacity"], header["slots"]
+    ).ljust(HEADER_SIZE, b'\0'))
+
+
+def _assignments_offset(header: Dict[str, int]) -> int:
+    return HEADER_SIZE + header["nlist"] * header["dims"] * 4
+
+
+def _map_centroids(path: Path, header: Dict[str, int]) -> np.ndarray:
+    return np.memmap(path, dtype=np.float32, mode='r', offset=HEADER_SIZE,
+                     shape=(header["nlist"], header["dims"]))
+
+
+def _map_assignments(path: Path, header: Dict[str, int], mode: str = 'r') -> np.ndarray:
+    return np.memmap(path, dtype=np.int32, mode=mode, offset=_assignments_offset(header),
+                     shape=(header["capacity"],))
+
+
+def _lists_offset(header: Dict[str, int]) -> int:
+    return _assignments_offset(header) + header["capacity"] * 4
+
+
+def _map_lists(path: Path, header: Dict[str, int], mode: str = 'r') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Memory-map the inverted lists: (starts, lengths, slots)."""
+    nlist = header["nlist"]
+    offset = _lists_offset(header)
+    starts = np.memmap(path, dtype=np.int64, mode='r', offset=offset, shape=(nlist + 1,))
+    lengths = np.memmap(path, dtype=np.int64, mode=mode, offset=offset + (nlist + 1) * 8, shape=(nlist,))
+    slots = np.memmap(path, dtype=np.int32, mode=mode, offset=offset + (2 * nlist + 1) * 8,
+                      shape=(header["slots"],))
+    return starts, lengths, slots
+
+
+def build_lists(assignments: np.ndarray, nlist: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lay out inverted lists (CSR with spare slots) from per-row assignments.
+
+    Tombstoned rows stay in their list so clearing the bit restores them.
+
+    Returns:
+        (starts, lengths, slots): list i holds the row positions
+        slots[starts[i]:starts[i] + lengths[i]]
+    """
+    rows = np.flatnonzero(assignments != UNASSIGNED)
+    labels = assignments[rows] & ~TOMBSTONE
+    order = np.argsort(labels, kind='stable')
+    rows, labels = rows[order], labels[order]
+
+    lengths = np.bincount(labels, minlength=nlist).astype(np.int64)
+    starts = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(lengths + np.maximum(lengths // 4, LIST_MIN_SLACK), out=starts[1:])
+    first = np.cumsum(lengths) - lengths
+
+    slots = np.full(int(starts[-1]), UNASSIGNED, dtype=np.int32)
+    slots[starts[labels] + np.arange(rows.size) - first[labels]] = rows
+    return starts, lengths, slots
+
+
+def _write_file(path: Path, header: Dict[str, int], centroids: np.ndarray, assignments: np.ndarray) -> Dict[str, int]:
+    """
+    Write a complete IVF file atomically (temp file + os.replace), laying
+    out fresh inverted lists from the assignments.
+
+    Returns:
+        The header as written (with its slot count)
+    """
+    padded = np.full(header["capacity"], UNASSIGNED, dtype=np.int32)
+    padded[:assignments.shape[0]] = assignments
+    starts, lengths, slots = build_lists(padded, header["nlist"])
+    header = {**header, "slots": slots.size}
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        _write_header(f, header)
+        f.seek(HEADER_SIZE)
+        f.write(np.ascontiguousarray(centroids, dtype=np.float32).tobytes())
+        f.write(padded.tobytes())
+        f.write(starts.tobytes())
+        f.write(lengths.tobytes())
+        f.write(slots.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return header
+
+
+def assign_lists(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (max dot product) for every row, computed in chunks."""
+    labels = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(matrix[start:start + ASSIGN_CHUNK_ROWS])
+        labels[start:start + chunk.shape[0]] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(matrix: np.ndarray, nlist: int, iterations: int = TRAIN_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means over (a sample of) the normalized rows.
+
+    Args:
+        matrix: Normalized embedding matrix
+        nlist: Number of clusters
+        iterations: Lloyd iterations
+        seed: RNG seed for reproducible training
+
+    Returns:
+        Normalized centroid matrix (nlist x dims)
+    """
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    if n > TRAIN_SAMPLE_SIZE:
+        sample = np.asarray(matrix[np.sort(rng.choice(n, TRAIN_SAMPLE_SIZE, replace=False))])
+    else:
+        sample = np.asarray(matrix)
+
+    centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign_lists(sample, centroids)
+        counts = np.bincount(labels, minlength=nlist)
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        nonempty = counts > 0
+
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+        # Re-seed empty lists from random rows so every list stays usable
+        empty = np.flatnonzero(~nonempty)
+        if empty.size:
+            sums[empty] = sample[rng.choice(sample.shape[0], empty.size, replace=False)]
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+def _inactive_rows(ids: np.ndarray) -> np.ndarray:
+    """Mask of vector-index rows whose entries are inactive or gone."""
+    conn = memory_db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM memory_entries WHERE is_active = 1')
+        active_ids = np.fromiter((row['id'] for row in cursor.fetchall()), dtype=np.int64)
+    finally:
+        conn.close()
+    return ~np.isin(ids, active_ids)
+
+
+def build_index(nlist: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Train centroids and assign every vector-index row to a list.
+
+    Args:
+        nlist: Number of inverted lists (default: sqrt of row count)
+
+    Returns:
+        dict with success status and index info
+    """
+    vec_path = vector_index.index_path()
+    if vector_index.read_header(vec_path) is None:
+        rebuilt = vector_index.rebuild_index()
+        if not rebuilt.get('success'):
+            return rebuilt
+
+    with vector_index.file_lock(vec_path):
+        vec_header = vector_index.read_header(vec_path)
+        engine = VectorEngine(
+            vector_index._map_ids(vec_path, vec_header),
+            vector_index._map_matrix(vec_path, vec_header)
+        )
+        if not len(engine):
+            return {"success": False, "error": "Vector index is empty; embed entries first"}
+
+        if nlist is None:
+            nlist = int(math.sqrt(len(engine)))
+        nlist = max(1, min(nlist, MAX_NLIST, len(engine)))
+
+        started = time.perf_counter()
+        centroids = train_centroids(engine.matrix, nlist)
+        assignments = assign_lists(engine.matrix, centroids)
+
+        assignments[_inactive_rows(engine.ids)] |= TOMBSTONE
+
+        header = {
+            "dims": engine.dimensions,
+            "nlist": nlist,
+            "vec_generation": vec_header["generation"],
+            "capacity": vec_header["capacity"],
+            "slots": 0
+        }
+        path = ann_path()
+        with vector_index.file_lock(path):
+            header = _write_file(path, header, centroids, assignments)
+
+    return {
+        "success": True,
+        "path": str(path),
+        "rows": len(engine),
+        "nlist": nlist,
+        "vec_generation": header["vec_generation"],
+        "build_seconds": round(time.perf_counter() - started, 3),
+        "message": f"IVF index built with {nlist} lists over {len(engine)} rows"
+    }
+
+
+def insert_rows(rows: Sequence[int], vectors: np.ndarray, generation: int, capacity: int) -> bool:
+    """
+    Assign freshly upserted vector-index rows to their nearest lists.
+
+    Called by vector_index.upsert_vectors() while it holds the vector-index
+    lock, so writes from different processes are applied in generation
+    order. Only applied when the IVF index was in sync right before the
+    write (vec generation == generation - 1); otherwise the index stays stale
+    and search falls back to exact scoring until --build.
+
+    Rows that changed list are appended to the new list's spare slots (the
+    old slot is left behind and skipped at query time); if a list is full or
+    the vector index grew, the file is rewritten with fresh lists.
+
+    Args:
+        rows: Vector-index row positions written by one upsert
+        vectors: Their normalized vectors (len(rows) x dims)
+        generation: Vector-index generation after that write
+        capacity: Vector-index capacity after that write
+
+    Returns:
+        True if the rows were assigned
+    """
+    path = ann_path()
+    if read_header(path) is None:
+        return False
+
+    with vector_index.file_lock(path):
+        header = read_header(path)
+        if header is None or header["vec_generation"] != generation - 1:
+            return False
+        if vectors.ndim != 2 or vectors.shape[1] != header["dims"]:
+            return False
+
+        rows = np.asarray(rows, dtype=np.int64)
+        labels = assign_lists(vectors, np.asarray(_map_centroids(path, header)))
+        header["vec_generation"] = generation
+
+        assignments = _map_assignments(path, header, mode='r+')
+        previous = np.full(rows.size, UNASSIGNED, dtype=np.int32)
+        inside = rows < header["capacity"]
+        previous[inside] = assignments[rows[inside]]
+        moved = (previous & ~TOMBSTONE) != labels
+
+        starts, lengths, slots = _map_lists(path, header, mode='r+')
+        added = np.bincount(labels[moved], minlength=header["nlist"])
+        if capacity > header["capacity"] or np.any(lengths + added > np.diff(starts)):
+            updated = np.full(max(capacity, header["capacity"]), UNASSIGNED, dtype=np.int32)
+            updated[:header["capacity"]] = assignments
+            updated[rows] = labels
+            centroids = np.array(_map_centroids(path, header))
+            del assignments, starts, lengths, slots
+            _write_file(path, {**header, "capacity": updated.size}, centroids, updated)
+            return True
+
+        assignments[rows] = labels
+        assignments.flush()
+        moved_rows = rows[moved]
+        moved_labels = labels[moved]
+        order = np.argsort(moved_labels, kind='stable')
+        moved_rows, moved_labels = moved_rows[order], moved_labels[order]
+        first = np.cumsum(added) - added
+        slots[starts[moved_labels] + lengths[moved_labels] + np.arange(moved_rows.size) - first[moved_labels]] = moved_rows
+        slots.flush()
+        lengths += added
+        lengths.flush()
+        del assignments, starts, lengths, slots
+
+        with open(path, 'r+b') as f:
+            _write_header(f, header)
+    return True
+
+
+def reassign_rows(ids: np.ndarray, matrix: np.ndarray, generation: int, capacity: int) -> bool:
+    """
+    Re-assign every row of a rebuilt vector index with the existing centroids.
+
+    Called by vector_index.rebuild_index() while it holds the vector-index
+    lock (a rebuild moves rows, so incremental updates cannot follow it).
+    The centroids are kept; run --build to retrain them.
+
+    Returns:
+        True if the IVF index was rewritten for the new generation
+    """
+    path = ann_path()
+    if read_header(path) is None:
+        return False
+
+    with vector_index.file_lock(path):
+        header = read_header(path)
+        if header is None:
+            return False
+        if len(ids) and matrix.shape[1] != header["dims"]:
+            # Centroids of another embedding size are useless; drop the index
+            path.unlink()
+            return False
+
+        centroids = np.array(_map_centroids(path, header))
+        assignments = assign_lists(matrix, centroids)
+        assignments[_inactive_rows(ids)] |= TOMBSTONE
+        _write_file(path, {**header, "vec_generation": generation, "capacity": capacity}, centroids, assignments)
+    return True
+
+
+def set_tombstone(entry_id: int, deleted: bool = True) -> bool:
+    """
+    Mark (or clear) an entry's row as deleted so ANN probes skip it.
+
+    Returns:
+        True if the tombstone bit changed
+    """
+    path = ann_path()
+    if read_header(path) is None:
+        return False
+
+    # Hold the vector-index lock so the row cannot move under a rebuild
+    with vector_index.file_lock(vector_index.index_path()):
+        row = vector_index.find_row(entry_id)
+        if row is None:
+            return False
+        with vector_index.file_lock(path):
+            header = read_header(path)
+            if header is None or row >= header["capacity"]:
+                return False
+            assignments = _map_assignments(path, header, mode='r+')
+            current = int(assignments[row])
+            if current == UNASSIGNED:
+                return False
+            updated = current | TOMBSTONE if deleted else current & ~TOMBSTONE
+            if updated != current:
+                assignments[row] = updated
+                assignments.flush()
+            del assignments
+    return updated != current
+
+
+def is_synced(engine: VectorEngine, header: Optional[Dict[str, int]] = None) -> bool:
+    """True if the IVF index covers exactly the rows of this mapped engine."""
+    header = header or read_header()
+    return (
+        header is not None
+        and engine.generation is not None
+        and header["vec_generation"] == engine.generation
+        and header["dims"] == engine.dimensions
+        and header["capacity"] >= len(engine)
+    )
+
+
+def candidate_rows(engine: VectorEngine, query: Sequence[float], nprobe: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Shortlist matrix rows from the `nprobe` lists closest to the query.
+
+    Returns:
+        Row positions to score exactly, or None if the index cannot be used
+        (missing, stale, or nprobe covers every list) and the caller should
+        scan the whole matrix.
+    """
+    path = ann_path()
+    header = read_header(path)
+    if not is_synced(engine, header):
+        return None
+
+    nprobe = nprobe or default_nprobe()
+    if nprobe >= header["nlist"]:
+        return None
+
+    q = normalize_vector(query)
+    if q.shape[0] != header["dims"]:
+        return None
+
+    centroid_scores = np.asarray(_map_centroids(path, header) @ q)
+    probes, _ = top_k(centroid_scores, nprobe)
+    starts, lengths, slots = _map_lists(path, header)
+    rows = np.concatenate([slots[starts[p]:starts[p] + lengths[p]] for p in probes])
+    rows = rows[rows < len(engine)]
+    # Current assignment must still be a probed list (drops tombstones and moved rows)
+    assignments = _map_assignments(path, header)
+    return np.unique(rows[np.isin(assignments[rows], probes.astype(np.int32))]).astype(np.int64)
+
+
+def get_ann_stats() -> Dict[str, Any]:
+    """Report IVF index status and list balance."""
+    path = ann_path()
+    header = read_header(path)
+    engine = vector_index.open_index()
+
+    stats: Dict[str, Any] = {
+        "path": str(path),
+        "enabled": ann_enabled(),
+        "nprobe": default_nprobe(),
+        "exists": header is not None,
+        "synced": engine is not None and is_synced(engine, header),
+    }
+    if header is not None:
+        rows = len(engine) if engine is not None else 0
+        assignments = np.asarray(_map_assignments(path, header)[:rows])
+        live = assignments[(assignments >= 0) & ((assignments & TOMBSTONE) == 0)]
+        sizes = np.bincount(live, minlength=header["nlist"]) if live.size else np.zeros(header["nlist"], dtype=np.int64)
+        stats.update({
+            "nlist": header["nlist"],
+            "dimensions": header["dims"],
+            "vec_generation": header["vec_generation"],
+            "assigned_rows": int(live.size),
+            "tombstoned_rows": int(((assignments >= 0) & ((assignments & TOMBSTONE) != 0)).sum()),
+            "largest_list": int(sizes.max()) if sizes.size else 0,
+            "mean_list": round(float(sizes.mean()), 1) if sizes.size else 0,
+            "size_bytes": path.stat().st_size
+        })
+    return {"success": True, "stats": stats}
+
+
+def benchmark(
+    queries: int = 100,
+    limit: int = 10,
+    nprobes: Optional[List[int]] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Compare ANN and exact search on stored vectors used as queries.
+
+    No embedding API calls are made: each query is a randomly chosen stored
+    vector, excluded from its own results.
+
+    Args:
+        queries: Number of query vectors
+        limit: Top-k compared
+        nprobes: nprobe values to sweep
+        seed: RNG seed for query selection
+
+    Returns:
+        dict with recall@k and mean latency per nprobe, plus exact latency
+    """
+    engine = vector_index.open_index()
+    header = read_header()
+    if engine is None or not len(engine):
+        return {"success": False, "error": "Vector index is empty; embed entries first"}
+    if not is_synced(engine, header):
+        return {"success": False, "error": "IVF index missing or stale; run --build first"}
+
+    nprobes = nprobes or [1, 2, 4, 8, 16, 32]
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(engine), min(queries, len(engine)), replace=False)
+    query_vectors = [np.array(engine.matrix[i]) for i in picks]
+    query_ids = [[int(engine.ids[i])] for i in picks]
+
+    exact_results = []
+    started = time.perf_counter()
+    for vec, exclude in zip(query_vectors, query_ids):
+        ranked, _ = engine.search(vec, limit=limit, exclude_ids=exclude)
+        exact_results.append({entry_id for entry_id, _ in ranked})
+    exact_ms = (time.perf_counter() - started) * 1000 / len(query_vectors)
+
+    sweeps = []
+    for nprobe in nprobes:
+        if nprobe >= header["nlist"]:
+            continue
+        hits = 0
+        expected = 0
+        scanned = 0
+        started = time.perf_counter()
+        for vec, exclude, truth in zip(query_vectors, query_ids, exact_results):
+            rows = candidate_rows(engine, vec, nprobe)
+            ranked, _ = engine.search(vec, limit=limit, exclude_ids=exclude, candidate_rows=rows)
+            hits += len(truth & {entry_id for entry_id, _ in ranked})
+            expected += len(truth)
+            scanned += len(rows)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(query_vectors)
+        sweeps.append({
+            "nprobe": nprobe,
+            f"recall_at_{limit}": round(hits / expected, 4) if expected else 1.0,
+            "mean_latency_ms": round(elapsed_ms, 3),
+            "mean_rows_scanned": round(scanned / len(query_vectors), 1),
+            "speedup": round(exact_ms / elapsed_ms, 2) if elapsed_ms else None
+        })
+
+    return {
+        "success": True,
+        "rows": len(engine),
+        "nlist": header["nlist"],
+        "queries": len(query_vectors),
+        "limit": limit,
+        "exact_mean_latency_ms": round(exact_ms, 3),
+        "ann": sweeps,
+        "message": f"Benchmarked {len(sweeps)} nprobe settings over {len(query_vectors)} queries"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Approximate Nearest-Neighbour (IVF) Index')
+    parser.add_argument('--build', action='store_true', help='Train and build the IVF index')
+    parser.add_argument('--nlist', type=int, help='Number of inverted lists for --build')
+    parser.add_argument('--stats', action='store_true', help='Show IVF index statistics')
+    parser.add_argument('--benchmark', action='store_true', help='Measure recall/latency against exact search')
+    parser.add_argument('--queries', type=int, default=100, help='Query count for --benchmark')
+    parser.add_argument('--limit', type=int, default=10, help='Top-k for --benchmark')
+    parser.add_argument('--nprobe', help='Comma-separated nprobe values for --benchmark')
+
+    args = parser.parse_args()
+
+    result = None
+
+    if args.build:
+        result = build_index(nlist=args.nlist)
+
+    elif args.benchmark:
+        nprobes = [int(n) for n in args.nprobe.split(',')] if args.nprobe else None
+        result = benchmark(queries=args.queries, limit=args.limit, nprobes=nprobes)
+
+    elif args.stats:
+        result = get_ann_stats()
+
+    else:
+        parser.print_help()
+        sys.exit(0)
+
+    if result:
+        if result.get('success'):
+            print(f"OK {result.get('message', 'Success')}")
+        else:
+            print(f"ERROR {result.get('error', 'Unknown error')}")
+            sys.exit(1)
+
+        print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Tool: BM25 Inverted Index
+Purpose: Persistent, incrementally maintained keyword index for memory entries
+
+Stores the BM25 statistics in SQLite next to memory_entries:
+- bm25_postings(term, entry_id, tf)   term frequencies per document
+- bm25_documents(entry_id, length)    token count per document
+- bm25_terms(term, df)                document frequency per term
+- bm25_stats(key, value)              doc_count and total_length
+
+memory_db.py keeps the index in sync inside the same transaction as
+add_entry / update_entry / delete_entry (only active entries are indexed).
+Queries walk the postings of the query terms only, so keyword search costs
+time proportional to the matches instead of re-tokenizing the corpus.
+
+Usage:
+    python tools/memory/bm25_index.py --rebuild                 # Rebuild from memory_entries
+    python tools/memory/bm25_index.py --stats                   # Show index size
+    python tools/memory/bm25_index.py --query "image generation"
+
+Dependencies:
+    - sqlite3 (stdlib)
+
+Output:
+    JSON result with success status
+"""
+
+import re
+import sys
+import json
+import math
+import sqlite3
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set
+
+# BM25 parameters (same defaults as hybrid_search.simple_bm25_score)
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Simple tokenizer for BM25."""
+    # Lowercase, remove punctuation, split on whitespace
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    tokens = text.split()
+    # Remove very short tokens
+    return [t for t in tokens if len(t) > 1]
+
+
+def create_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the index tables (called from memory_db.init_db)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bm25_postings (
+            term TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, entry_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bm25_documents (
+            entry_id INTEGER PRIMARY KEY,
+            length INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bm25_terms (
+            term TEXT PRIMARY KEY,
+            df INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bm25_stats (
+            key TEXT PRIMARY KEY,
+            value REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bm25_postings_entry ON bm25_postings(entry_id)')
+
+
+def _bump_stats(cursor: sqlite3.Cursor, docs: int, length: int) -> None:
+    cursor.executemany('''
+        INSERT INTO bm25_stats (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = value + excluded.value
+    ''', [('doc_count', docs), ('total_length', length)])
+
+
+def index_document(cursor: sqlite3.Cursor, entry_id: int, content: str) -> None:
+    """Add one document's postings (caller removes any previous version first)."""
+    tokens = tokenize(content or '')
+    counts = Counter(tokens)
+
+    cursor.execute('INSERT OR REPLACE INTO bm25_documents (entry_id, length) VALUES (?, ?)',
+                   (entry_id, len(tokens)))
+    cursor.executemany('INSERT INTO bm25_postings (term, entry_id, tf) VALUES (?, ?, ?)',
+                       [(term, entry_id, tf) for term, tf in counts.items()])
+    cursor.executemany('''
+        INSERT INTO bm25_terms (term, df) VALUES (?, 1)
+        ON CONFLICT(term) DO UPDATE SET df = df + 1
+    ''', [(term,) for term in counts])
+    _bump_stats(cursor, 1, len(tokens))
+
+
+def remove_document(cursor: sqlite3.Cursor, entry_id: int) -> bool:
+    """Remove one document's postings; returns False if it was not indexed."""
+    cursor.execute('SELECT length FROM bm25_documents WHERE entry_id = ?', (entry_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    length = row[0]
+
+    cursor.execute('SELECT term FROM bm25_postings WHERE entry_id = ?', (entry_id,))
+    terms = [(r[0],) for r in cursor.fetchall()]
+    cursor.executemany('UPDATE bm25_terms SET df = df - 1 WHERE term = ?', terms)
+    cursor.executemany('DELETE FROM bm25_terms WHERE term = ? AND df <= 0', terms)
+    cursor.execute('DELETE FROM bm25_postings WHERE entry_id = ?', (entry_id,))
+    cursor.execute('DELETE FROM bm25_documents WHERE entry_id = ?', (entry_id,))
+    _bump_stats(cursor, -1, -length)
+    return True
+
+
+def rebuild(cursor: sqlite3.Cursor) -> int:
+    """Re-create the whole index from active memory_entries; returns documents indexed."""
+    for table in ('bm25_postings', 'bm25_documents', 'bm25_terms', 'bm25_stats'):
+        cursor.execute(f'DELETE FROM {table}')
+    _bump_stats(cursor, 0, 0)
+
+    cursor.execute('SELECT id, content FROM memory_entries WHERE is_active = 1')
+    rows = cursor.fetchall()
+    for entry_id, content in rows:
+        index_document(cursor, entry_id, content)
+    return len(rows)
+
+
+def is_built(cursor: sqlite3.Cursor) -> bool:
+    """True once the index has been populated (see rebuild)."""
+    cursor.execute("SELECT 1 FROM bm25_stats WHERE key = 'doc_count'")
+    return cursor.fetchone() is not None
+
+
+def score(
+    cursor: sqlite3.Cursor,
+    query: str,
+    entry_type: Optional[str] = None,
+    k1: float = K1,
+    b: float = B,
+    allowed_ids: Optional[Set[int]] = None
+) -> Dict[int, float]:
+    """
+    BM25 scores for every document containing at least one query term.
+
+    Args:
+        cursor: Database cursor
+        query: Search query
+        entry_type: Optional type filter
+        k1: Term frequency saturation
+        b: Length normalization
+        allowed_ids: If given, postings of other entries are skipped
+            (the search_filters.py prefilter set)
+
+    Returns:
+        dict of entry_id -> raw BM25 score
+    """
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return {}
+
+    cursor.execute("SELECT key, value FROM bm25_stats")
+    stats = {row[0]: row[1] for row in cursor.fetchall()}
+    doc_count = stats.get('doc_count', 0)
+    if doc_count <= 0:
+        return {}
+    avg_doc_len = (stats.get('total_length', 0) / doc_count) or 1
+
+    query_counts = Counter(query_tokens)
+    terms = list(query_counts)
+    placeholders = ','.join('?' * len(terms))
+
+    cursor.execute(f'SELECT term, df FROM bm25_terms WHERE term IN ({placeholders})', terms)
+    idf = {
+        term: math.log((doc_count - df + 0.5) / (df + 0.5) + 1)
+        for term, df in cursor.fetchall()
+    }
+    if not idf:
+        return {}
+
+    type_join = 'JOIN memory_entries e ON e.id = p.entry_id AND e.type = ?' if entry_type else ''
+    params: List[Any] = ([entry_type] if entry_type else []) + list(idf)
+    cursor.execute(f'''
+        SELECT p.term, p.entry_id, p.tf, d.length
+        FROM bm25_postings p
+        JOIN bm25_documents d ON d.entry_id = p.entry_id
+        {type_join}
+        WHERE p.term IN ({','.join('?' * len(idf))})
+    ''', params)
+
+    scores: Dict[int, float] = {}
+    for term, entry_id, tf, doc_len in cursor.fetchall():
+        if allowed_ids is not None and entry_id not in allowed_ids:
+            continue
+        denominator = tf + k1 * (1 - b + b * (doc_len / avg_doc_len))
+        # Repeated query terms count once per occurrence, as in simple_bm25_score
+        contribution = query_counts[term] * idf[term] * (tf * (k1 + 1)) / denominator
+        scores[entry_id] = scores.get(entry_id, 0.0) + contribution
+    return scores
+
+
+def get_index_stats(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """Index size summary."""
+    cursor.execute("SELECT key, value FROM bm25_stats")
+    stats = {row[0]: row[1] for row in cursor.fetchall()}
+    cursor.execute('SELECT COUNT(*) FROM bm25_terms')
+    terms = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM bm25_postings')
+    postings = cursor.fetchone()[0]
+    doc_count = int(stats.get('doc_count', 0))
+    return {
+        "documents": doc_count,
+        "terms": terms,
+        "postings": postings,
+        "avg_doc_length": round(stats.get('total_length', 0) / doc_count, 2) if doc_count else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BM25 Inverted Index')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index from memory_entries')
+    parser.add_argument('--stats', action='store_true', help='Show index statistics')
+    parser.add_argument('--query', help='Score a query against the index')
+    parser.add_argument('--type', help='Filter by memory type (with --query)')
+    parser.add_argument('--limit', type=int, default=10, help='Maximum results for --query')
+
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from memory_db import get_connection
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if args.rebuild:
+            count = rebuild(cursor)
+            conn.commit()
+            result = {"success": True, "documents": count, "message": f"BM25 index rebuilt with {count} documents"}
+        elif args.stats:
+            result = {"success": True, "stats": get_index_stats(cursor)}
+        elif args.query:
+            scores = score(cursor, args.query, entry_type=args.type)
+            ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:args.limit]
+            result = {
+                "success": True,
+                "query": args.query,
+                "matches": len(scores),
+                "results": [{"id": entry_id, "bm25_raw": round(value, 4)} for entry_id, value in ranked]
+            }
+        else:
+            parser.print_help()
+            sys.exit(0)
+    finally:
+        conn.close()
+
+    print(f"OK {result.get('message', 'Success')}")
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Tool: Memory Context Builder
+Purpose: Pack the session-start memory context into a token budget
+
+load_all_memory / format_as_markdown inject all of MEMORY.md, every loaded
+daily log and the recent DB entries whatever their size. This builder splits
+that context into snippets instead:
+
+- MEMORY.md: one snippet per bullet (or paragraph), under its section heading
+- daily logs: one snippet per key event
+- DB entries: the loaded recent entries, plus hybrid_search hits for --query
+
+Each snippet is scored
+
+    0.4 * importance/10 + 0.3 * recency + 0.3 * relevance
+
+where recency halves every RECENCY_HALF_LIFE_HOURS (MEMORY.md is curated and
+counts as current), and relevance is the normalized hybrid_search score for
+DB entries, or query-term overlap for file snippets (0 without a query).
+Snippets are packed greedily by score until the budget is spent, duplicate
+log/DB lines are kept once, and the result is rendered in the familiar
+layout (MEMORY.md sections, then logs by date, then entries). Token counts
+use a chars/4 estimate, headings included.
+
+Usage (via memory_read.py):
+    python tools/memory/memory_read.py --budget 1500
+    python tools/memory/memory_read.py --budget 800 --query "deploy pipeline" --include-db
+
+Dependencies:
+    - hybrid_search.py (only when a query searches the database)
+
+Output:
+    Packed markdown plus token accounting (library module)
+"""
+
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bm25_index import tokenize
+
+# Score weights (relevance weight only applies when there is a query)
+IMPORTANCE_WEIGHT = 0.4
+RECENCY_WEIGHT = 0.3
+RELEVANCE_WEIGHT = 0.3
+
+RECENCY_HALF_LIFE_HOURS = 48
+
+# Importance assumed for snippets without one
+MEMORY_FILE_IMPORTANCE = 8
+LOG_EVENT_IMPORTANCE = 5
+
+# DB candidates pulled in by hybrid_search for a query
+QUERY_SEARCH_LIMIT = 20
+
+CHARS_PER_TOKEN = 4
+
+# File furniture rather than memory: blockquote notes, *italic* footers, "(Add ...)" placeholders
+_MEMORY_SKIP_RE = re.compile(r'^(>.*|\*[^*].*\*|[-*] \(.*\))$')
+
+# "- 14:05 [insight] Learned X #infra" as written by memory_write.append_to_daily_log
+_EVENT_RE = re.compile(r'^(?:(\d{1,2}:\d{2})\s*)?(?:\[(\w+)\]\s*)?(.*?)(?:\s+#[\w-]+)?$')
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate (~4 characters per token for English text)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _dedupe_key(text: str) -> str:
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+
+def _recency(at: Optional[datetime], now: datetime) -> float:
+    if at is None:
+        return 0.0
+    age_hours = max((now - at).total_seconds() / 3600, 0.0)
+    return 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+
+
+def _overlap(query_terms: set, text: str) -> float:
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(tokenize(text))) / len(query_terms)
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    """created_at (SQLite CURRENT_TIMESTAMP, UTC) as an aware datetime."""
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def memory_file_snippets(content: str) -> List[Dict[str, Any]]:
+    """
+    Split MEMORY.md into bullet / paragraph snippets.
+
+    Args:
+        content: MEMORY.md text
+
+    Returns:
+        Snippets with group (section heading), text and file order
+    """
+    snippets = []
+    heading = None
+    paragraph: List[str] = []
+
+    def flush():
+        if paragraph:
+            snippets.append({"group": heading, "text": ' '.join(paragraph)})
+            paragraph.clear()
+
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if line.startswith('## '):
+            flush()
+            heading = line[3:].strip()
+        elif line.startswith('# ') or stripped in ('', '---') or _MEMORY_SKIP_RE.match(stripped):
+            flush()
+        elif stripped.startswith(('- ', '* ')):
+            flush()
+            snippets.append({"group": heading, "text": stripped[2:].strip()})
+        else:
+            paragraph.append(stripped)
+    flush()
+    return snippets
+
+
+def log_event_snippets(log: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Key events of one daily log (read_daily_log result) as snippets with a timestamp."""
+    snippets = []
+    for event in log.get('key_events') or []:
+        match = _EVENT_RE.match(event.strip())
+        time_str, _, body = match.groups()
+        at = None
+        try:
+            at = datetime.fromisoformat(f"{log['date']}T{time_str or '00:00'}").astimezone()
+        except ValueError:
+            pass
+        snippets.append({
+            "group": log['date'],
+            "text": event.strip(),
+            "key": _dedupe_key(body or event),
+            "at": at
+        })
+    return snippets
+
+
+def search_db(query: str, limit: int = QUERY_SEARCH_LIMIT) -> Optional[List[Dict[str, Any]]]:
+    """
+    Query-relevant DB entries via hybrid_search, with normalized relevance.
+
+    Returns:
+        Entries with relevance in [0, 1] and created_at, or None if search
+        is unavailable
+    """
+    try:
+        from hybrid_search import hybrid_search
+        from memory_db import get_connection
+    except ImportError:
+        return None
+
+    result = hybrid_search(query, limit=limit)
+    if not result.get('success'):
+        return None
+    hits = result.get('results', [])
+    if not hits:
+        return []
+
+    top = max(hit['score'] for hit in hits) or 1.0
+    ids = [hit['id'] for hit in hits]
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT id, created_at FROM memory_entries WHERE id IN ({",".join("?" * len(ids))})', ids
+        )
+        created = {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+    return [{
+        "id": hit['id'],
+        "type": hit['type'],
+        "content": hit['content'],
+        "importance": hit.get('importance'),
+        "created_at": created.get(hit['id']),
+        "relevance": hit['score'] / top
+    } for hit in hits]
+
+
+def _candidates(
+    memory_context: Dict[str, Any],
+    query: Optional[str],
+    search_database: bool
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Every snippet of the context, scored (plus query hits from the DB)."""
+    now = datetime.now(timezone.utc)
+    query_terms = set(tokenize(query)) if query else set()
+    relevance_weight = RELEVANCE_WEIGHT if query else 0.0
+    candidates = []
+
+    def add(source, group, text, importance, recency, relevance, key=None):
+        importance = max(1, min(int(importance or 0) or LOG_EVENT_IMPORTANCE, 10))
+        score = (
+            IMPORTANCE_WEIGHT * importance / 10
+            + RECENCY_WEIGHT * recency
+            + relevance_weight * relevance
+        )
+        candidates.append({
+            "source": source,
+            "group": group,
+            "text": text,
+            "key": key or _dedupe_key(text),
+            "score": round(score, 4),
+            "tokens": estimate_tokens(f"- {text}\n"),
+            "order": len(candidates)
+        })
+
+    memory = memory_context.get('memory_file') or {}
+    if memory.get('success'):
+        for snippet in memory_file_snippets(memory['content']):
+            add('memory', snippet['group'], snippet['text'], MEMORY_FILE_IMPORTANCE, 1.0,
+                _overlap(query_terms, snippet['text']))
+
+    for log in memory_context.get('daily_logs') or []:
+        if not log.get('success'):
+            continue
+        for snippet in log_event_snippets(log):
+            add('log', snippet['group'], snippet['text'], LOG_EVENT_IMPORTANCE,
+                _recency(snippet['at'], now), _overlap(query_terms, snippet['text']), key=snippet['key'])
+
+    search_error = None
+    hits = None
+    if query and search_database:
+        hits = search_db(query)
+        if hits is None:
+            search_error = "hybrid_search unavailable; relevance from term overlap only"
+    relevance = {hit['id']: hit['relevance'] for hit in hits or []}
+
+    entries = {entry['id']: entry for entry in memory_context.get('db_entries') or []}
+    for hit in hits or []:
+        entries.setdefault(hit['id'], hit)
+    for entry_id, entry in entries.items():
+        text = f"[{entry.get('type', 'fact')}] {entry.get('content', '')}"
+        entry_relevance = relevance.get(entry_id, 0.0) if hits is not None else _overlap(query_terms, text)
+        add('entry', None, text, entry.get('importance'), _recency(_utc(entry.get('created_at')), now),
+            entry_relevance, key=_dedupe_key(entry.get('content', '')))
+
+    return candidates, search_error
+
+
+def _headers(item: Dict[str, Any]) -> List[str]:
+    """Headings an item is rendered under (outermost first)."""
+    if item['source'] == 'memory':
+        return ["# Persistent Memory"] + ([f"## {item['group']}"] if item['group'] else [])
+    if item['source'] == 'log':
+        return [f"## Daily Log: {item['group']}"]
+    return ["## Memory Entries"]
+
+
+def render(packed: List[Dict[str, Any]]) -> str:
+    """Render packed snippets grouped like format_as_markdown (source, then original order)."""
+    rank = {'memory': 0, 'log': 1, 'entry': 2}
+    lines = []
+    opened = set()
+    for item in sorted(packed, key=lambda i: (rank[i['source']], i['order'])):
+        for header in _headers(item):
+            if header not in opened:
+                opened.add(header)
+                if lines and lines[-1]:
+                    lines.append('')
+                lines.extend([header, ''])
+        lines.append(f"- {item['text']}")
+    return '\n'.join(lines)
+
+
+def build_context(
+    memory_context: Dict[str, Any],
+    budget: int,
+    query: Optional[str] = None,
+    search_database: bool = True
+) -> Dict[str, Any]:
+    """
+    Pack a loaded memory context into a token budget.
+
+    Args:
+        memory_context: Result from memory_read.load_all_memory()
+        budget: Maximum estimated tokens of the rendered markdown
+        query: Optional query; adds relevance scoring and hybrid_search hits
+        search_database: Whether a query may search memory.db
+
+    Returns:
+        dict with markdown, estimated tokens and packing counts
+    """
+    if budget <= 0:
+        return {"success": False, "error": "Budget must be a positive number of tokens"}
+
+    candidates, search_error = _candidates(memory_context, query, search_database)
+
+    packed = []
+    seen = set()
+    opened = set()
+    used = 0
+    for item in sorted(candidates, key=lambda i: (-i['score'], i['order'])):
+        if item['key'] and item['key'] in seen:
+            continue
+        headers = [h for h in _headers(item) if h not in opened]
+        cost = item['tokens'] + sum(estimate_tokens(f"\n{h}\n\n") for h in headers)
+        if used + cost > budget:
+            continue
+        used += cost
+        opened.update(headers)
+        seen.add(item['key'])
+        packed.append(item)
+
+    markdown = render(packed)
+    result = {
+        "success": True,
+        "budget": budget,
+        "tokens": estimate_tokens(markdown),
+        "query": query,
+        "candidates": len(candidates),
+        "included": len(packed),
+        "dropped": len(candidates) - len(packed),
+        "included_by_source": {
+            source: sum(1 for item in packed if item['source'] == source)
+            for source in ('memory', 'log', 'entry')
+        },
+        "markdown": markdown
+    }
+    if search_error:
+        result["search_error"] = search_error
+    return result
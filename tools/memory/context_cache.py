@@ -0,0 +1,207 @@
+"""
+Tool: Memory Context Cache
+Purpose: Reuse the rendered session-start memory context across sessions
+
+memory_read.load_all_memory re-reads MEMORY.md, every recent daily log and
+(optionally) SQLite on each session start. This cache keeps the loaded
+context (including the parsed MEMORY.md sections) and its format_as_markdown
+rendering in one JSON file next to memory.db, keyed by the load options and
+validated by a fingerprint of what they were built from:
+
+- (mtime_ns, size) of MEMORY.md and of each daily log in the window
+- today's date (the log window moves at midnight)
+- the database high-water marks, MAX(updated_at) / MAX(id) of memory_entries
+  and daily_logs, when DB entries or DB-backed logs are part of the context
+- a valid_until time for the DB window (the oldest included entry leaving
+  the --db-hours window)
+
+A hit is one stat per file, two indexed MAX() lookups when the DB is
+involved, and one small file read. memory_write.py invalidates the cache
+after every write; writes from elsewhere are caught by the fingerprint.
+A context whose high-water mark is the current second is not stored, since
+a write later in that second would not move the mark.
+
+Used by memory_read.py and memory_write.py.
+
+Dependencies:
+    - sqlite3 (stdlib)
+
+Env Vars:
+    - MEMORY_CONTEXT_CACHE (optional, on (default) or off)
+
+Output:
+    Cached context payloads (library module)
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).parent))
+import memory_db
+
+CONTEXT_CACHE_ENABLED = os.getenv('MEMORY_CONTEXT_CACHE', 'on').strip().lower() not in ('off', 'false', '0')
+
+# Distinct load-option combinations kept (most recently stored win)
+MAX_CACHED_CONTEXTS = 8
+
+CACHE_VERSION = 1
+
+
+def cache_path() -> Path:
+    """Cache file next to memory.db (data/memory.context.json)."""
+    return memory_db.DB_PATH.with_suffix('.context.json')
+
+
+def file_marks(paths: List[Path]) -> Dict[str, Optional[List[int]]]:
+    """(mtime_ns, size) per path, None for a missing file."""
+    marks: Dict[str, Optional[List[int]]] = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            marks[str(path)] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            marks[str(path)] = None
+    return marks
+
+
+def db_marks() -> Optional[List[Any]]:
+    """
+    High-water marks of memory_entries and daily_logs.
+
+    Each MAX() is its own subquery so both are index seeks on
+    idx_memory_updated / idx_daily_logs_updated (a combined MAX(a), MAX(b)
+    scans the whole index). None if the database is unavailable.
+    """
+    if not memory_db.DB_PATH.exists():
+        return None
+    try:
+        conn = memory_db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(memory_db.HIGH_WATER_SQL.format(table='memory_entries'))
+            entries = list(cursor.fetchone())
+            cursor.execute(memory_db.HIGH_WATER_SQL.format(table='daily_logs'))
+            logs = list(cursor.fetchone())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return entries + logs
+
+
+def fingerprint(paths: List[Path], include_db: bool) -> Dict[str, Any]:
+    """
+    Fingerprint of the sources a context is built from.
+
+    Args:
+        paths: Files read (MEMORY.md, daily logs)
+        include_db: Whether the context reads SQLite
+
+    Returns:
+        dict compared for equality on lookup
+    """
+    return {
+        "version": CACHE_VERSION,
+        "today": datetime.now().date().isoformat(),
+        "files": file_marks(paths),
+        "db": db_marks() if include_db else None
+    }
+
+
+def _read() -> Dict[str, Any]:
+    try:
+        data = json.loads(cache_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def lookup(key: str, current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Cached payload for `key` if it was built from the same sources.
+
+    Args:
+        key: Load options key (see memory_read.load_session_context)
+        current: fingerprint() of the sources now
+
+    Returns:
+        The stored payload, or None on a miss
+    """
+    if not CONTEXT_CACHE_ENABLED:
+        return None
+    entry = _read().get(key)
+    if not entry or entry.get("fingerprint") != current:
+        return None
+    valid_until = entry.get("valid_until")
+    if valid_until and datetime.now().isoformat() >= valid_until:
+        return None
+    return entry.get("payload")
+
+
+def _settled(current: Dict[str, Any]) -> bool:
+    """False if a DB high-water mark is the current second (a same-second write would be missed)."""
+    marks = current.get("db") or []
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return not any(isinstance(mark, str) and mark >= now for mark in marks[0::2])
+
+
+def store(
+    key: str,
+    current: Dict[str, Any],
+    payload: Dict[str, Any],
+    valid_until: Optional[str] = None
+) -> bool:
+    """
+    Save a payload under `key` (atomic replace of the cache file).
+
+    Args:
+        key: Load options key
+        current: fingerprint() taken before the context was loaded
+        payload: JSON-serializable context and rendering
+        valid_until: Local ISO time after which the payload is stale
+
+    Returns:
+        True if stored
+    """
+    if not CONTEXT_CACHE_ENABLED or not _settled(current):
+        return False
+
+    data = _read()
+    data.pop(key, None)
+    data[key] = {
+        "fingerprint": current,
+        "valid_until": valid_until,
+        "stored_at": datetime.now().isoformat(),
+        "payload": payload
+    }
+    for stale in list(data)[:-MAX_CACHED_CONTEXTS]:
+        del data[stale]
+
+    path = cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+    except OSError:
+        return False
+    return True
+
+
+def invalidate() -> None:
+    """Drop every cached context (called after memory writes)."""
+    try:
+        cache_path().unlink()
+    except OSError:
+        pass
@@ -3,23 +3,44 @@ Tool: Memory Embedding Generator
 Purpose: Generate vector embeddings for memory entries to enable semantic search
 
 Uses OpenAI's text-embedding-3-small model (1536 dimensions, ~$0.02/1M tokens)
+by default. MEMORY_EMBEDDING_PROVIDER=hashing or sentence-transformers swaps in
+an in-process local encoder (embedding_providers.py) for offline use and
+millisecond query embedding; vectors are stored under that provider's model
+name, and search refuses to compare vectors from different models.
+MEMORY_EMBEDDING_DIMENSIONS requests shorter vectors via the API's `dimensions`
+parameter (e.g. 256 or 512 for small deployments: proportionally less storage
+and scoring work). Each stored vector records its size; search refuses to
+compare vectors of different sizes. After changing the setting, run --reindex:
+text-embedding-3 vectors are Matryoshka-trained, so larger stored vectors are
+truncated into the cache and no API calls are needed to shrink them.
 Stores embeddings as BLOBs in SQLite for use with sqlite-vec or manual cosine similarity.
+Vectors are also cached by (content hash, model, dimensions) in embedding_cache, so
+re-embedding unchanged text (reindex, repeated queries) costs no API calls.
 
 Usage:
     python tools/memory/embed_memory.py --all              # Embed all entries without embeddings
     python tools/memory/embed_memory.py --id 5             # Embed a specific entry
     python tools/memory/embed_memory.py --content "text"   # Get embedding for arbitrary text
-    python tools/memory/embed_memory.py --stats            # Show embedding statistics
-    python tools/memory/embed_memory.py --reindex          # Re-embed all entries
+    python tools/memory/embed_memory.py --stats            # Show embedding statistics (incl. quantization recall)
+    python tools/memory/embed_memory.py --reindex          # Re-embed all entries (also migrates to new dimensions)
+    python tools/memory/embed_memory.py --all --batch-size 500 --max-inputs 256  # Larger batched requests
+
+For concurrent, rate-limited and resumable runs see embed_worker.py.
 
 Dependencies:
-    - openai
+    - openai (for the default provider)
+    - sentence-transformers (optional, for the sentence-transformers provider)
     - numpy (for serialization)
     - sqlite3 (stdlib)
 
 Env Vars:
-    - OPENAI_API_KEY (required)
+    - OPENAI_API_KEY (required for the openai provider)
     - HELICONE_API_KEY (optional, for observability)
+    - MEMORY_EMBEDDING_PROVIDER (optional, openai (default), hashing or sentence-transformers)
+    - MEMORY_EMBEDDING_MODEL (optional, overrides the provider's default model)
+    - MEMORY_EMBEDDING_DIMENSIONS (optional, output dimensions, default per provider: 1536 / 512 / 384)
+    - MEMORY_EMBEDDING_CACHE_MAX (optional, embedding_cache LRU size cap, default 100000)
+    - MEMORY_EMBEDDING_DTYPE (optional, stored vector encoding: float32, float16 or int8)
 
 Output:
     JSON result with success status and embedding info
@@ -31,7 +52,7 @@ import json
 import argparse
 import struct
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from dotenv import load_dotenv
 
 # Load environment
@@ -39,11 +60,10 @@ load_dotenv()
 
 # Check for OpenAI
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     HAS_OPENAI = True
 except ImportError:
     HAS_OPENAI = False
-    print("Warning: openai package not installed. Run: pip install openai", file=sys.stderr)
 
 # Import memory_db functions
 sys.path.insert(0, str(Path(__file__).parent))
@@ -51,16 +71,45 @@ try:
     from memory_db import (
         get_entries_without_embeddings,
         store_embedding,
+        store_embeddings,
         fetch_entry_readonly,
-        get_connection
+        connection,
+        compute_content_hash,
+        get_cached_embeddings,
+        put_cached_embeddings,
+        seed_embedding_cache,
+        EMBEDDING_JOIN
+    )
+    from embedding_providers import (
+        EMBEDDING_PROVIDER,
+        CACHED_PROVIDERS,
+        default_model,
+        default_dimensions,
+        get_local_client,
+        provider_config_error
     )
 except ImportError:
     print("Error: Could not import memory_db", file=sys.stderr)
     sys.exit(1)
 
+if not HAS_OPENAI and EMBEDDING_PROVIDER == 'openai':
+    print("Warning: openai package not installed. Run: pip install openai", file=sys.stderr)
+
 # Constants
-EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSIONS = 1536
+EMBEDDING_MODEL = os.getenv('MEMORY_EMBEDDING_MODEL') or default_model()
+EMBEDDING_DIMENSIONS = int(os.getenv('MEMORY_EMBEDDING_DIMENSIONS') or default_dimensions())
+
+# Local hashing vectors are cheaper to recompute than to look up
+USE_EMBEDDING_CACHE = EMBEDDING_PROVIDER in CACHED_PROVIDERS
+
+# Models that accept `dimensions` and whose vectors stay valid when truncated
+MATRYOSHKA_MODELS = ('text-embedding-3-small', 'text-embedding-3-large')
+
+# Batching limits for embeddings.create (the API accepts up to 2048 inputs and
+# ~300k tokens per request; stay under both with some headroom)
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 250_000
+CHARS_PER_TOKEN = 4
 
 
 def get_openai_client():
@@ -84,6 +133,57 @@ def get_openai_client():
         return OpenAI(api_key=api_key)
 
 
+def get_async_openai_client():
+    """Get AsyncOpenAI client with optional Helicone proxy (used by embed_worker.py)."""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable not set")
+
+    helicone_key = os.getenv('HELICONE_API_KEY')
+    if helicone_key:
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url="https://oai.helicone.ai/v1",
+            default_headers={
+                "Helicone-Auth": f"Bearer {helicone_key}",
+                "Helicone-Property-Tool": "embed_worker"
+            }
+        )
+    else:
+        return AsyncOpenAI(api_key=api_key)
+
+
+def get_embedding_client():
+    """Embedding client for MEMORY_EMBEDDING_PROVIDER (OpenAI, or an in-process local encoder)."""
+    if EMBEDDING_PROVIDER == 'openai':
+        return get_openai_client()
+    return get_local_client(EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+
+
+def get_async_embedding_client():
+    """Async counterpart of get_embedding_client (used by embed_worker.py)."""
+    if EMBEDDING_PROVIDER == 'openai':
+        return get_async_openai_client()
+    return get_local_client(EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, use_async=True)
+
+
+def provider_error() -> Optional[str]:
+    """Why the configured provider cannot embed, or None if it can."""
+    config_error = provider_config_error(EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+    if config_error:
+        return config_error
+    if EMBEDDING_PROVIDER == 'openai' and not HAS_OPENAI:
+        return "openai package not installed"
+    return None
+
+
+def embedding_request_options() -> Dict[str, Any]:
+    """Extra embeddings.create arguments: the output size for models that support it."""
+    if EMBEDDING_MODEL in MATRYOSHKA_MODELS:
+        return {"dimensions": EMBEDDING_DIMENSIONS}
+    return {}
+
+
 def embedding_to_bytes(embedding: List[float]) -> bytes:
     """Convert embedding list to bytes for storage."""
     return struct.pack(f'{len(embedding)}f', *embedding)
@@ -95,37 +195,59 @@ def bytes_to_embedding(data: bytes) -> List[float]:
     return list(struct.unpack(f'{count}f', data))
 
 
-def generate_embedding(text: str, client=None) -> Dict[str, Any]:
+def generate_embedding(text: str, client=None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Generate embedding for a text string.
 
     Args:
         text: Text to embed
         client: Optional OpenAI client (creates one if not provided)
+        use_cache: Reuse/store the vector in embedding_cache (keyed by content hash)
 
     Returns:
         dict with embedding and metadata
     """
-    if not HAS_OPENAI:
-        return {"success": False, "error": "openai package not installed"}
+    content_hash = compute_content_hash(text)
+    use_cache = use_cache and USE_EMBEDDING_CACHE
+    if use_cache:
+        hits = get_cached_embeddings([content_hash], EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+        if content_hash in hits:
+            embedding = bytes_to_embedding(hits[content_hash])
+            return {
+                "success": True,
+                "embedding": embedding,
+                "model": EMBEDDING_MODEL,
+                "dimensions": len(embedding),
+                "cached": True,
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}
+            }
 
-    if client is None:
-        client = get_openai_client()
+    if provider_error():
+        return {"success": False, "error": provider_error()}
 
     try:
+        if client is None:
+            client = get_embedding_client()
+
         response = client.embeddings.create(
             model=EMBEDDING_MODEL,
             input=text,
-            encoding_format="float"
+            encoding_format="float",
+            **embedding_request_options()
         )
 
         embedding = response.data[0].embedding
+        if use_cache:
+            put_cached_embeddings(
+                [(content_hash, embedding_to_bytes(embedding))], EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+            )
 
         return {
             "success": True,
             "embedding": embedding,
             "model": EMBEDDING_MODEL,
             "dimensions": len(embedding),
+            "cached": False,
             "usage": {
                 "prompt_tokens": response.usage.prompt_tokens,
                 "total_tokens": response.usage.total_tokens
@@ -135,13 +257,167 @@ def generate_embedding(text: str, client=None) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
-def embed_entry(entry_id: int, client=None) -> Dict[str, Any]:
+def lookup_cached(texts: List[str], use_cache: bool = True) -> Tuple[List[Optional[List[float]]], List[int]]:
+    """
+    Resolve texts against embedding_cache.
+
+    Returns:
+        (embeddings in input order with None for misses,
+         indices of the first occurrence of each distinct missing text)
+    """
+    hashes = [compute_content_hash(text) for text in texts]
+    use_cache = use_cache and USE_EMBEDDING_CACHE
+    hits = get_cached_embeddings(hashes, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS) if use_cache else {}
+
+    embeddings: List[Optional[List[float]]] = []
+    misses: List[int] = []
+    seen_missing = set()
+    for i, content_hash in enumerate(hashes):
+        if content_hash in hits:
+            embeddings.append(bytes_to_embedding(hits[content_hash]))
+        else:
+            embeddings.append(None)
+            if content_hash not in seen_missing:
+                seen_missing.add(content_hash)
+                misses.append(i)
+    return embeddings, misses
+
+
+def fill_misses(
+    texts: List[str],
+    embeddings: List[Optional[List[float]]],
+    misses: List[int],
+    generated: List[Optional[List[float]]],
+    use_cache: bool = True
+) -> None:
+    """Place generated vectors for `misses` (and duplicate texts) into `embeddings` and cache them."""
+    by_hash: Dict[str, List[float]] = {}
+    for i, embedding in zip(misses, generated):
+        if embedding is not None:
+            by_hash[compute_content_hash(texts[i])] = embedding
+
+    for i, text in enumerate(texts):
+        if embeddings[i] is None:
+            embeddings[i] = by_hash.get(compute_content_hash(text))
+
+    if use_cache and USE_EMBEDDING_CACHE and by_hash:
+        put_cached_embeddings(
+            [(content_hash, embedding_to_bytes(embedding)) for content_hash, embedding in by_hash.items()],
+            EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for request budgeting."""
+    return max(1, len(text) // CHARS_PER_TOKEN + 1)
+
+
+def plan_batches(
+    entries: List[Dict[str, Any]],
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST
+) -> List[List[Dict[str, Any]]]:
+    """
+    Split entries into request batches under an input-count and token budget.
+
+    Args:
+        entries: Entries with 'id' and 'content'
+        max_inputs: Maximum texts per request
+        max_tokens: Maximum estimated tokens per request
+
+    Returns:
+        List of entry batches
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+
+    for entry in entries:
+        tokens = estimate_tokens(entry.get('content') or '')
+        if current and (len(current) >= max_inputs or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(entry)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def generate_embeddings(texts: List[str], client=None, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Generate embeddings for several texts in one API request.
+
+    Texts already in embedding_cache are not sent; duplicate texts are sent once.
+
+    Args:
+        texts: Texts to embed
+        client: Optional OpenAI client (creates one if not provided)
+        use_cache: Reuse/store vectors in embedding_cache
+
+    Returns:
+        dict with embeddings in input order and usage metadata
+    """
+    embeddings, misses = lookup_cached(texts, use_cache)
+    usage = {"prompt_tokens": 0, "total_tokens": 0}
+
+    if misses:
+        if provider_error():
+            return {"success": False, "error": provider_error()}
+
+        try:
+            if client is None:
+                client = get_embedding_client()
+
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[texts[i] for i in misses],
+                encoding_format="float",
+                **embedding_request_options()
+            )
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        result = batch_response_to_result(response, len(misses))
+        usage = result['usage']
+        fill_misses(texts, embeddings, misses, result['embeddings'], use_cache)
+
+    return {
+        "success": True,
+        "embeddings": embeddings,
+        "model": EMBEDDING_MODEL,
+        "cached": len(texts) - len(misses),
+        "usage": usage
+    }
+
+
+def batch_response_to_result(response, count: int) -> Dict[str, Any]:
+    """Map a batched embeddings response back to input order (by item index)."""
+    embeddings: List[Optional[List[float]]] = [None] * count
+    for item in response.data:
+        embeddings[item.index] = item.embedding
+
+    return {
+        "success": True,
+        "embeddings": embeddings,
+        "model": EMBEDDING_MODEL,
+        "usage": {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "total_tokens": response.usage.total_tokens
+        }
+    }
+
+
+def embed_entry(entry_id: int, client=None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Generate and store embedding for a memory entry.
 
     Args:
         entry_id: Memory entry ID
         client: Optional OpenAI client
+        use_cache: Reuse/store the vector in embedding_cache
 
     Returns:
         dict with success status
@@ -158,7 +434,7 @@ def embed_entry(entry_id: int, client=None) -> Dict[str, Any]:
         return {"success": False, "error": f"Entry {entry_id} has no content"}
 
     # Generate embedding
-    embed_result = generate_embedding(content, client)
+    embed_result = generate_embedding(content, client, use_cache=use_cache)
     if not embed_result.get('success'):
         return embed_result
 
@@ -172,23 +448,43 @@ def embed_entry(entry_id: int, client=None) -> Dict[str, Any]:
         "content_preview": content[:100] + "..." if len(content) > 100 else content,
         "dimensions": embed_result['dimensions'],
         "tokens_used": embed_result['usage']['total_tokens'],
+        "cached": embed_result.get('cached', False),
         "model": EMBEDDING_MODEL
     }
 
 
-def embed_all_pending(batch_size: int = 50, client=None) -> Dict[str, Any]:
+def embed_all_pending(
+    batch_size: int = 50,
+    client=None,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    use_cache: bool = True
+) -> Dict[str, Any]:
     """
-    Embed all entries that don't have embeddings yet.
+    Embed entries that don't have embeddings yet (up to batch_size, most important first).
+
+    Pending entries are sent in batched requests (up to `max_inputs` texts and
+    `max_tokens` estimated tokens each), and each request's vectors are written
+    in one transaction.
 
     Args:
         batch_size: Number of entries to process
         client: Optional OpenAI client
+        max_inputs: Maximum texts per embeddings request
+        max_tokens: Maximum estimated tokens per embeddings request
+        use_cache: Reuse vectors from embedding_cache for unchanged content
 
     Returns:
         dict with batch results
     """
+    if provider_error():
+        return {"success": False, "error": provider_error()}
+
     if client is None:
-        client = get_openai_client()
+        try:
+            client = get_embedding_client()
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
 
     # Get entries without embeddings
     pending = get_entries_without_embeddings(limit=batch_size)
@@ -199,29 +495,75 @@ def embed_all_pending(batch_size: int = 50, client=None) -> Dict[str, Any]:
     if not entries:
         return {"success": True, "message": "No entries need embedding", "processed": 0}
 
+    return embed_entries(entries, client, max_inputs=max_inputs, max_tokens=max_tokens, use_cache=use_cache)
+
+
+def embed_entries(
+    entries: List[Dict[str, Any]],
+    client,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Embed and store the given entries in batched requests.
+
+    Args:
+        entries: Dicts with id and content
+        client: Embedding client (get_embedding_client)
+        max_inputs: Maximum texts per embeddings request
+        max_tokens: Maximum estimated tokens per embeddings request
+        use_cache: Reuse vectors from embedding_cache for unchanged content
+
+    Returns:
+        dict with counts and a per-entry outcome list
+    """
     results = {
         "success": True,
         "processed": 0,
         "failed": 0,
         "total_tokens": 0,
+        "requests": 0,
+        "cache_hits": 0,
         "entries": []
     }
 
-    for entry in entries:
-        entry_id = entry['id']
-        result = embed_entry(entry_id, client)
+    def record(entry_id: int, success: bool, error: Optional[str] = None) -> None:
+        results['processed' if success else 'failed'] += 1
+        results['entries'].append({"id": entry_id, "success": success, "error": error})
 
-        if result.get('success'):
-            results['processed'] += 1
-            results['total_tokens'] += result.get('tokens_used', 0)
+    embeddable = []
+    for entry in entries:
+        if entry.get('content'):
+            embeddable.append(entry)
         else:
-            results['failed'] += 1
-
-        results['entries'].append({
-            "id": entry_id,
-            "success": result.get('success', False),
-            "error": result.get('error')
-        })
+            record(entry['id'], False, f"Entry {entry['id']} has no content")
+
+    for batch in plan_batches(embeddable, max_inputs=max_inputs, max_tokens=max_tokens):
+        embed_result = generate_embeddings([entry['content'] for entry in batch], client, use_cache=use_cache)
+        results['requests'] += 1
+        if not embed_result.get('success'):
+            for entry in batch:
+                record(entry['id'], False, embed_result.get('error'))
+            continue
+
+        results['total_tokens'] += embed_result['usage']['total_tokens']
+        results['cache_hits'] += embed_result.get('cached', 0)
+
+        items = []
+        for entry, embedding in zip(batch, embed_result['embeddings']):
+            if embedding is None:
+                record(entry['id'], False, "No embedding returned")
+            else:
+                items.append((entry['id'], embedding_to_bytes(embedding)))
+
+        store_result = store_embeddings(items, EMBEDDING_MODEL)
+        missing = set(store_result.get('missing_ids', []))
+        for entry_id, _ in items:
+            if entry_id in missing:
+                record(entry_id, False, f"Memory entry {entry_id} not found")
+            else:
+                record(entry_id, True)
 
     # Calculate cost (~$0.02 per 1M tokens)
     results['estimated_cost'] = f"${(results['total_tokens'] / 1_000_000) * 0.02:.6f}"
@@ -229,36 +571,63 @@ def embed_all_pending(batch_size: int = 50, client=None) -> Dict[str, Any]:
     return results
 
 
-def reindex_all(batch_size: int = 100, client=None) -> Dict[str, Any]:
+def reindex_all(
+    batch_size: int = 100,
+    client=None,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    use_cache: bool = True
+) -> Dict[str, Any]:
     """
     Re-embed all entries (regenerate all embeddings).
 
     Args:
-        batch_size: Number of entries to process per batch
+        batch_size: Number of entries to fetch and embed per pass
         client: Optional OpenAI client
+        max_inputs: Maximum texts per embeddings request
+        max_tokens: Maximum estimated tokens per embeddings request
+        use_cache: Reuse vectors from embedding_cache for unchanged content
 
     Returns:
         dict with reindex results
     """
+    if provider_error():
+        return {"success": False, "error": provider_error()}
+
     if client is None:
-        client = get_openai_client()
+        try:
+            client = get_embedding_client()
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+    # Keep current vectors reachable by content hash so unchanged entries
+    # are restored from the cache instead of re-embedded (truncated to the
+    # configured size when MEMORY_EMBEDDING_DIMENSIONS was lowered)
+    if use_cache and USE_EMBEDDING_CACHE:
+        seed_embedding_cache(
+            EMBEDDING_MODEL,
+            EMBEDDING_DIMENSIONS if EMBEDDING_MODEL in MATRYOSHKA_MODELS else None
+        )
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    # Clear existing embeddings
-    cursor.execute('UPDATE memory_entries SET embedding = NULL, embedding_model = NULL')
-    conn.commit()
-    conn.close()
+        # Clear existing embeddings (vectors from other models stay in memory_embeddings)
+        cursor.execute('UPDATE memory_entries SET embedding_model = NULL')
+        cursor.execute('DELETE FROM memory_embeddings WHERE model = ?', (EMBEDDING_MODEL,))
 
     # Embed until no pending entries remain.
     total_processed = 0
     total_failed = 0
     total_tokens = 0
+    cache_hits = 0
     batches: list[dict[str, Any]] = []
 
     while True:
-        batch_result = embed_all_pending(batch_size=batch_size, client=client)
+        batch_result = embed_all_pending(
+            batch_size=batch_size, client=client, max_inputs=max_inputs, max_tokens=max_tokens,
+            use_cache=use_cache
+        )
         if not batch_result.get("success"):
             return batch_result
 
@@ -267,6 +636,7 @@ def reindex_all(batch_size: int = 100, client=None) -> Dict[str, Any]:
         total_processed += processed
         total_failed += failed
         total_tokens += int(batch_result.get("total_tokens", 0))
+        cache_hits += int(batch_result.get("cache_hits", 0))
         batches.append(batch_result)
 
         if processed == 0:
@@ -277,6 +647,7 @@ def reindex_all(batch_size: int = 100, client=None) -> Dict[str, Any]:
         "processed": total_processed,
         "failed": total_failed,
         "total_tokens": total_tokens,
+        "cache_hits": cache_hits,
         "estimated_cost": f"${(total_tokens / 1_000_000) * 0.02:.6f}",
         "batches": len(batches),
     }
@@ -284,39 +655,63 @@ def reindex_all(batch_size: int = 100, client=None) -> Dict[str, Any]:
 
 def get_embedding_stats() -> Dict[str, Any]:
     """Get statistics about embeddings in the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Total entries
-    cursor.execute('SELECT COUNT(*) as total FROM memory_entries WHERE is_active = 1')
-    total = cursor.fetchone()['total']
-
-    # With embeddings
-    cursor.execute('SELECT COUNT(*) as count FROM memory_entries WHERE embedding IS NOT NULL AND is_active = 1')
-    with_embeddings = cursor.fetchone()['count']
-
-    # Without embeddings
-    cursor.execute('SELECT COUNT(*) as count FROM memory_entries WHERE embedding IS NULL AND is_active = 1')
-    without_embeddings = cursor.fetchone()['count']
-
-    # By model
-    cursor.execute('''
-        SELECT embedding_model, COUNT(*) as count
-        FROM memory_entries
-        WHERE embedding IS NOT NULL AND is_active = 1
-        GROUP BY embedding_model
-    ''')
-    by_model = {row['embedding_model']: row['count'] for row in cursor.fetchall()}
-
-    # Average content length for entries with embeddings
-    cursor.execute('''
-        SELECT AVG(LENGTH(content)) as avg_length
-        FROM memory_entries
-        WHERE embedding IS NOT NULL AND is_active = 1
-    ''')
-    avg_length = cursor.fetchone()['avg_length'] or 0
-
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        # Total entries
+        cursor.execute('SELECT COUNT(*) as total FROM memory_entries WHERE is_active = 1')
+        total = cursor.fetchone()['total']
+
+        # With embeddings
+        cursor.execute('SELECT COUNT(*) as count FROM memory_entries WHERE embedding_model IS NOT NULL AND is_active = 1')
+        with_embeddings = cursor.fetchone()['count']
+
+        # Without embeddings
+        cursor.execute('SELECT COUNT(*) as count FROM memory_entries WHERE embedding_model IS NULL AND is_active = 1')
+        without_embeddings = cursor.fetchone()['count']
+
+        # By model
+        cursor.execute('''
+            SELECT embedding_model, COUNT(*) as count
+            FROM memory_entries
+            WHERE embedding_model IS NOT NULL AND is_active = 1
+            GROUP BY embedding_model
+        ''')
+        by_model = {row['embedding_model']: row['count'] for row in cursor.fetchall()}
+
+        # Active vector sizes; more than one (or one != configured) needs --reindex,
+        # as does any active model other than the configured one
+        cursor.execute(f'''
+            SELECT v.dims, COUNT(*) as count
+            FROM memory_entries e
+            {EMBEDDING_JOIN}
+            WHERE e.is_active = 1
+            GROUP BY v.dims
+        ''')
+        by_dimensions = {row['dims']: row['count'] for row in cursor.fetchall()}
+
+        # Average content length for entries with embeddings
+        cursor.execute('''
+            SELECT AVG(LENGTH(content)) as avg_length
+            FROM memory_entries
+            WHERE embedding_model IS NOT NULL AND is_active = 1
+        ''')
+        avg_length = cursor.fetchone()['avg_length'] or 0
+
+        # Content-hash embedding cache
+        cursor.execute('''
+            SELECT COUNT(*) as entries, COALESCE(SUM(hit_count), 0) as hits, COALESCE(SUM(LENGTH(embedding)), 0) as bytes
+            FROM embedding_cache
+        ''')
+        cache = dict(cursor.fetchone())
+
+        # Every stored vector, including inactive models kept side by side
+        cursor.execute('''
+            SELECT model, dims, dtype, COUNT(*) as count, SUM(LENGTH(vector)) as bytes
+            FROM memory_embeddings
+            GROUP BY model, dims, dtype
+        ''')
+        stored = [dict(row) for row in cursor.fetchall()]
 
     return {
         "success": True,
@@ -325,12 +720,44 @@ def get_embedding_stats() -> Dict[str, Any]:
             "with_embeddings": with_embeddings,
             "without_embeddings": without_embeddings,
             "coverage_percent": round(with_embeddings / total * 100, 1) if total > 0 else 0,
+            "provider": EMBEDDING_PROVIDER,
+            "model": EMBEDDING_MODEL,
             "by_model": by_model,
-            "avg_content_length": round(avg_length, 0)
+            "mixed_models": len(by_model) > 1,
+            "dimensions": EMBEDDING_DIMENSIONS,
+            "by_dimensions": by_dimensions,
+            "needs_reindex": (
+                any(model != EMBEDDING_MODEL for model in by_model)
+                or any(dims != EMBEDDING_DIMENSIONS for dims in by_dimensions)
+            ),
+            "avg_content_length": round(avg_length, 0),
+            "stored_vectors": stored,
+            "cache": cache,
+            "quantization": _quantization_stats()
         }
     }
 
 
+def _quantization_stats() -> Dict[str, Any]:
+    """Configured encodings plus recall of quantized vs exact search over the vector index."""
+    import quantization
+    report: Dict[str, Any] = {
+        "storage_dtype": quantization.EMBEDDING_DTYPE,
+        "scan_encoding": quantization.SCAN_ENCODING,
+        "rescore_factor": quantization.RESCORE_FACTOR
+    }
+    if not quantization.HAS_NUMPY:
+        return report
+    try:
+        import vector_index
+        engine = vector_index.open_index()
+    except (ImportError, OSError):
+        return report
+    if engine is not None and len(engine):
+        report["recall"] = quantization.measure_recall(engine.matrix)
+    return report
+
+
 def main():
     parser = argparse.ArgumentParser(description='Memory Embedding Generator')
     parser.add_argument('--all', action='store_true', help='Embed all entries without embeddings')
@@ -339,6 +766,11 @@ def main():
     parser.add_argument('--reindex', action='store_true', help='Re-embed all entries')
     parser.add_argument('--stats', action='store_true', help='Show embedding statistics')
     parser.add_argument('--batch-size', type=int, default=50, help='Batch size for --all')
+    parser.add_argument('--max-inputs', type=int, default=MAX_INPUTS_PER_REQUEST,
+                       help='Maximum texts per embeddings request')
+    parser.add_argument('--max-tokens', type=int, default=MAX_TOKENS_PER_REQUEST,
+                       help='Maximum estimated tokens per embeddings request')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the content-hash embedding cache')
 
     args = parser.parse_args()
 
@@ -349,24 +781,26 @@ def main():
 
     elif args.content:
         # Just get embedding for text
-        if not HAS_OPENAI:
-            print("Error: openai package not installed")
+        if provider_error():
+            print(f"Error: {provider_error()}")
             sys.exit(1)
-        result = generate_embedding(args.content)
+        result = generate_embedding(args.content, use_cache=not args.no_cache)
         # Don't print full embedding, just metadata
         if result.get('success'):
             result['embedding_preview'] = result['embedding'][:5] + ['...']
             del result['embedding']
 
     elif args.id:
-        result = embed_entry(args.id)
+        result = embed_entry(args.id, use_cache=not args.no_cache)
 
     elif args.reindex:
         print("Re-indexing all entries (this will clear existing embeddings)...")
-        result = reindex_all(batch_size=args.batch_size)
+        result = reindex_all(batch_size=args.batch_size, max_inputs=args.max_inputs, max_tokens=args.max_tokens,
+                             use_cache=not args.no_cache)
 
     elif args.all:
-        result = embed_all_pending(batch_size=args.batch_size)
+        result = embed_all_pending(batch_size=args.batch_size, max_inputs=args.max_inputs,
+                                   max_tokens=args.max_tokens, use_cache=not args.no_cache)
 
     else:
         parser.print_help()
@@ -0,0 +1,507 @@
+"""
+Tool: Async Embedding Worker
+Purpose: Concurrent, rate-limited and resumable embedding of memory entries
+
+Runs batched embeddings.create requests on AsyncOpenAI (or the configured
+local provider, see embedding_providers.py) with:
+- A bounded concurrency semaphore
+- Requests-per-minute and tokens-per-minute governors (sliding 60s window)
+- Jittered exponential backoff on 429 / 5xx responses and connection errors
+  (honours Retry-After)
+- A checkpoint row in `embedding_checkpoints` so an interrupted reindex
+  (crash, Ctrl-C, or a batch that still fails after retries) resumes after
+  the last fully stored entry ID
+
+Unlike embed_memory.reindex_all, the reindex job overwrites embeddings in
+place instead of clearing them first, so search keeps working while it runs.
+The exception is a MEMORY_EMBEDDING_DIMENSIONS change: search refuses to mix
+vector sizes until every entry is re-embedded, so prefer
+embed_memory.py --reindex for that (it shrinks vectors from the cache).
+
+Usage:
+    python tools/memory/embed_worker.py --all                            # Embed entries without embeddings
+    python tools/memory/embed_worker.py --reindex                        # Re-embed all active entries (resumes)
+    python tools/memory/embed_worker.py --reindex --restart              # Ignore checkpoint, start over
+    python tools/memory/embed_worker.py --reindex --concurrency 8 --rpm 3000 --tpm 1000000
+    python tools/memory/embed_worker.py --status                         # Show job checkpoints
+
+Dependencies:
+    - openai (AsyncOpenAI)
+    - sqlite3 (stdlib)
+
+Env Vars:
+    - OPENAI_API_KEY (required for the openai provider)
+    - HELICONE_API_KEY (optional, for observability)
+    - MEMORY_EMBEDDING_PROVIDER (optional, openai (default), hashing or sentence-transformers)
+
+Output:
+    JSON result with success status and job totals
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+# Import from sibling modules
+sys.path.insert(0, str(Path(__file__).parent))
+try:
+    from embed_memory import (
+        EMBEDDING_MODEL,
+        EMBEDDING_DIMENSIONS,
+        MATRYOSHKA_MODELS,
+        MAX_INPUTS_PER_REQUEST,
+        MAX_TOKENS_PER_REQUEST,
+        USE_EMBEDDING_CACHE,
+        get_async_embedding_client,
+        provider_error,
+        batch_response_to_result,
+        embedding_request_options,
+        embedding_to_bytes,
+        estimate_tokens,
+        plan_batches,
+        lookup_cached,
+        fill_misses
+    )
+    from memory_db import get_connection, store_embeddings, seed_embedding_cache
+except ImportError as e:
+    print(f"Error importing modules: {e}", file=sys.stderr)
+    sys.exit(1)
+
+# Defaults sized for a typical text-embedding-3-small tier
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPM = 3000
+DEFAULT_TPM = 1_000_000
+DEFAULT_BATCH_INPUTS = 256
+PAGE_SIZE = 2000
+
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+JOB_REINDEX = 'reindex'
+JOB_PENDING = 'pending'
+
+
+class RateLimiter:
+    """
+    Sliding-window governor for requests and tokens per minute.
+
+    acquire() waits until one more request carrying `tokens` fits inside both
+    budgets for the trailing 60 seconds. A limit of 0 disables that budget.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: deque = deque()
+        self._tokens_in_window = 0
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _fits(self, tokens: int) -> bool:
+        if self.rpm and len(self._events) >= self.rpm:
+            return False
+        # A single oversized request is allowed into an empty window
+        if self.tpm and self._events and self._tokens_in_window + tokens > self.tpm:
+            return False
+        return True
+
+    async def acquire(self, tokens: int) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._fits(tokens):
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                wait = self.WINDOW_SECONDS - (now - self._events[0][0])
+                await asyncio.sleep(max(wait, 0.01))
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None and getattr(error, 'response', None) is not None:
+        status = getattr(error.response, 'status_code', None)
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('retry-after') if hasattr(headers, 'get') else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+async def embed_batch(
+    client,
+    texts: List[str],
+    limiter: RateLimiter,
+    stats: Dict[str, Any],
+    max_retries: int = MAX_RETRIES
+) -> Dict[str, Any]:
+    """
+    Embed one batch of texts, retrying rate-limit, server and connection errors.
+
+    Args:
+        client: AsyncOpenAI client
+        texts: Texts to embed
+        limiter: Shared RPM/TPM governor
+        stats: Shared counters (requests, retries)
+        max_retries: Retries before giving up on the batch
+
+    Returns:
+        dict with embeddings in input order, as embed_memory.generate_embeddings
+    """
+    tokens = sum(estimate_tokens(text) for text in texts)
+    attempt = 0
+    while True:
+        await limiter.acquire(tokens)
+        stats['requests'] += 1
+        try:
+            response = await client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts,
+                encoding_format="float",
+                **embedding_request_options()
+            )
+            return batch_response_to_result(response, len(texts))
+        except Exception as e:
+            status = _status_code(e)
+            # No status means the request never got a response (connection
+            # error or timeout), which is worth retrying too
+            if (status is not None and status not in RETRYABLE_STATUS) or attempt >= max_retries:
+                return {"success": False, "error": str(e)}
+            stats['retries'] += 1
+            await asyncio.sleep(backoff_delay(attempt, _retry_after(e)))
+            attempt += 1
+
+
+def load_checkpoint(job: str) -> Optional[Dict[str, Any]]:
+    """Get the saved checkpoint for a job, if any."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM embedding_checkpoints WHERE job = ?', (job,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def save_checkpoint(job: str, state: Dict[str, Any], completed: bool = False) -> None:
+    """Upsert a job checkpoint (last fully stored entry ID and running totals)."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO embedding_checkpoints (job, model, last_id, processed, failed, total_tokens, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT(job) DO UPDATE SET
+                model = excluded.model,
+                last_id = excluded.last_id,
+                processed = excluded.processed,
+                failed = excluded.failed,
+                total_tokens = excluded.total_tokens,
+                updated_at = CURRENT_TIMESTAMP,
+                completed_at = excluded.completed_at
+        ''', (job, EMBEDDING_MODEL, state['last_id'], state['processed'], state['failed'],
+              state['total_tokens'], completed))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def reset_checkpoint(job: str) -> None:
+    """Delete a job checkpoint so the next run starts from the beginning."""
+    conn = get_connection()
+    try:
+        conn.execute('DELETE FROM embedding_checkpoints WHERE job = ?', (job,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _fetch_page(job: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        condition = 'is_active = 1' if job == JOB_REINDEX else 'embedding_model IS NULL AND is_active = 1'
+        cursor.execute(f'''
+            SELECT id, content
+            FROM memory_entries
+            WHERE {condition} AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, limit))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+async def run_job(
+    job: str,
+    client=None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    max_inputs: int = DEFAULT_BATCH_INPUTS,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    resume: bool = True,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Embed entries for a job with bounded concurrency and rate governors.
+
+    Entries are processed in ID order. The checkpoint's last_id only advances
+    past a batch once it and every earlier batch are stored, so a resumed run
+    never skips entries (at most it re-embeds the in-flight batches).
+
+    Args:
+        job: JOB_REINDEX (all active entries) or JOB_PENDING (entries without embeddings)
+        client: Optional AsyncOpenAI client
+        concurrency: Maximum in-flight requests
+        rpm: Requests per minute budget (0 = unlimited)
+        tpm: Estimated tokens per minute budget (0 = unlimited)
+        max_inputs: Maximum texts per request
+        max_tokens: Maximum estimated tokens per request
+        resume: Continue from the saved checkpoint if the job is unfinished
+        use_cache: Reuse vectors from embedding_cache for unchanged content
+
+    Returns:
+        dict with job totals
+    """
+    if provider_error():
+        return {"success": False, "error": provider_error()}
+
+    if client is None:
+        try:
+            client = get_async_embedding_client()
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+    checkpoint = load_checkpoint(job) if resume else None
+    if checkpoint and not checkpoint.get('completed_at') and checkpoint.get('model') == EMBEDDING_MODEL:
+        state = {k: checkpoint[k] or 0 for k in ('last_id', 'processed', 'failed', 'total_tokens')}
+        resumed_from = state['last_id']
+    else:
+        reset_checkpoint(job)
+        state = {'last_id': 0, 'processed': 0, 'failed': 0, 'total_tokens': 0}
+        resumed_from = None
+        if job == JOB_REINDEX and use_cache and USE_EMBEDDING_CACHE and EMBEDDING_MODEL in MATRYOSHKA_MODELS:
+            # A dimension change can then be served by truncating stored vectors
+            await asyncio.to_thread(seed_embedding_cache, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+    save_checkpoint(job, state)
+
+    stats = {'requests': 0, 'retries': 0, 'cache_hits': 0}
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    errors: List[Dict[str, Any]] = []
+
+    # Batches complete out of order; track them so last_id only covers a
+    # contiguous prefix of finished work.
+    outstanding: deque = deque()
+    finished: Dict[int, Tuple[int, int, int]] = {}
+    sequence = 0
+
+    def advance_watermark() -> None:
+        moved = False
+        while outstanding and outstanding[0][0] in finished:
+            seq, last_id = outstanding.popleft()
+            processed, failed, tokens = finished.pop(seq)
+            state['last_id'] = last_id
+            state['processed'] += processed
+            state['failed'] += failed
+            state['total_tokens'] += tokens
+            moved = True
+        if moved:
+            save_checkpoint(job, state)
+
+    async def process(seq: int, batch: List[Dict[str, Any]]) -> None:
+        texts = [entry['content'] for entry in batch]
+        embeddings, misses = await asyncio.to_thread(lookup_cached, texts, use_cache)
+        tokens_used = 0
+        stats['cache_hits'] += len(texts) - sum(1 for embedding in embeddings if embedding is None)
+
+        if misses:
+            async with semaphore:
+                result = await embed_batch(client, [texts[i] for i in misses], limiter, stats)
+
+            if not result.get('success'):
+                # Leave the batch unfinished so the watermark stops before it and
+                # a resumed run retries it.
+                errors.append({"ids": [entry['id'] for entry in batch], "error": result.get('error')})
+                return
+            await asyncio.to_thread(fill_misses, texts, embeddings, misses, result['embeddings'], use_cache)
+            tokens_used = result['usage']['total_tokens']
+
+        items = [
+            (entry['id'], embedding_to_bytes(embedding))
+            for entry, embedding in zip(batch, embeddings)
+            if embedding is not None
+        ]
+        stored = await asyncio.to_thread(store_embeddings, items, EMBEDDING_MODEL)
+        processed = stored.get('stored', 0)
+        finished[seq] = (processed, len(batch) - processed, tokens_used)
+        advance_watermark()
+
+    started = time.perf_counter()
+    after_id = state['last_id']
+    # Keep memory bounded without draining at page boundaries: a couple of
+    # batches per request slot are queued so the next one is ready (cache
+    # lookup done) when a request finishes.
+    max_pending = 2 * max(1, concurrency)
+    pending: set = set()
+
+    async def wait_for_slot(limit: int) -> None:
+        nonlocal pending
+        while len(pending) > limit:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+
+    while not errors:
+        page = await asyncio.to_thread(_fetch_page, job, after_id, PAGE_SIZE)
+        if not page:
+            break
+        after_id = page[-1]['id']
+
+        embeddable = [entry for entry in page if entry.get('content')]
+        for batch in plan_batches(embeddable, max_inputs=max_inputs, max_tokens=max_tokens):
+            await wait_for_slot(max_pending - 1)
+            if errors:
+                break
+            outstanding.append((sequence, batch[-1]['id']))
+            pending.add(asyncio.create_task(process(sequence, batch)))
+            sequence += 1
+        else:
+            # Entries without content at the end of the page are skipped; a
+            # finished marker lets the watermark pass them once earlier
+            # batches are stored.
+            outstanding.append((sequence, after_id))
+            finished[sequence] = (0, 0, 0)
+            sequence += 1
+            advance_watermark()
+
+    await wait_for_slot(0)
+
+    elapsed = time.perf_counter() - started
+    if errors:
+        return {
+            "success": False,
+            "job": job,
+            "error": f"{len(errors)} batch(es) failed after retries: {errors[0]['error']}",
+            "resume_from_id": state['last_id'],
+            "processed": state['processed'],
+            "requests": stats['requests'],
+            "retries": stats['retries'],
+            "elapsed_seconds": round(elapsed, 2),
+            "errors": errors[:20]
+        }
+
+    save_checkpoint(job, state, completed=True)
+
+    return {
+        "success": True,
+        "job": job,
+        "resumed_from_id": resumed_from,
+        "processed": state['processed'],
+        "failed": state['failed'],
+        "total_tokens": state['total_tokens'],
+        "requests": stats['requests'],
+        "retries": stats['retries'],
+        "cache_hits": stats['cache_hits'],
+        "elapsed_seconds": round(elapsed, 2),
+        "estimated_cost": f"${(state['total_tokens'] / 1_000_000) * 0.02:.6f}",
+        "message": f"{job} job embedded {state['processed']} entries"
+    }
+
+
+def get_job_status() -> Dict[str, Any]:
+    """List saved embedding job checkpoints."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM embedding_checkpoints ORDER BY job')
+        return {"success": True, "jobs": [dict(row) for row in cursor.fetchall()]}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async Embedding Worker')
+    parser.add_argument('--all', action='store_true', help='Embed all entries without embeddings')
+    parser.add_argument('--reindex', action='store_true', help='Re-embed all active entries')
+    parser.add_argument('--restart', action='store_true', help='Ignore any saved checkpoint')
+    parser.add_argument('--status', action='store_true', help='Show job checkpoints')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum in-flight requests')
+    parser.add_argument('--rpm', type=int, default=DEFAULT_RPM, help='Requests per minute (0 = unlimited)')
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TPM, help='Tokens per minute (0 = unlimited)')
+    parser.add_argument('--max-inputs', type=int, default=DEFAULT_BATCH_INPUTS,
+                       help=f'Maximum texts per request (API limit {MAX_INPUTS_PER_REQUEST})')
+    parser.add_argument('--max-tokens', type=int, default=MAX_TOKENS_PER_REQUEST,
+                       help='Maximum estimated tokens per request')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the content-hash embedding cache')
+
+    args = parser.parse_args()
+
+    result = None
+
+    if args.status:
+        result = get_job_status()
+
+    elif args.reindex or args.all:
+        job = JOB_REINDEX if args.reindex else JOB_PENDING
+        if args.restart:
+            reset_checkpoint(job)
+        result = asyncio.run(run_job(
+            job,
+            concurrency=args.concurrency,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            max_inputs=args.max_inputs,
+            max_tokens=args.max_tokens,
+            resume=not args.restart,
+            use_cache=not args.no_cache
+        ))
+
+    else:
+        parser.print_help()
+        sys.exit(0)
+
+    if result:
+        if result.get('success'):
+            print(f"OK {result.get('message', 'Success')}")
+        else:
+            print(f"ERROR {result.get('error', 'Unknown error')}")
+            sys.exit(1)
+
+        print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Tool: Embedding Providers
+Purpose: Local, in-process embedding backends behind the OpenAI client interface
+
+embed_memory.py talks to every provider through `client.embeddings.create(...)`
+and reads `response.data[i].index / .embedding` and `response.usage`, so the
+local backends here expose that same shape and the embedding, caching, batching
+and worker code paths stay provider-agnostic.
+
+Providers (MEMORY_EMBEDDING_PROVIDER):
+- openai:                OpenAI embeddings API (default; see embed_memory.get_openai_client)
+- hashing:               feature-hashing encoder (word unigrams + bigrams and
+                         character trigrams, signed hashing into a fixed number
+                         of dimensions, sublinear tf, L2-normalized). No
+                         dependencies, deterministic, sub-millisecond per
+                         query; captures lexical rather than semantic overlap.
+- sentence-transformers: a SentenceTransformer model (default all-MiniLM-L6-v2),
+                         loaded once per process and batch-encoded on CPU.
+
+Each provider stores vectors under its own model name (memory_entries.
+embedding_model), so switching providers leaves a detectably mixed corpus until
+embed_memory.py --reindex has run; search refuses to compare across models.
+
+Dependencies:
+    - sentence-transformers (optional, for the sentence-transformers provider)
+
+Env Vars:
+    - MEMORY_EMBEDDING_PROVIDER (optional, openai (default), hashing or sentence-transformers)
+    - MEMORY_EMBEDDING_MODEL (optional, overrides the provider's default model)
+
+Output:
+    OpenAI-compatible embedding responses (library module)
+"""
+
+import os
+import re
+import sys
+import math
+import asyncio
+import hashlib
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any, Tuple
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    SentenceTransformer = None
+    HAS_SENTENCE_TRANSFORMERS = False
+
+EMBEDDING_PROVIDERS = ['openai', 'hashing', 'sentence-transformers']
+
+# Provider -> (default model, default dimensions)
+PROVIDER_DEFAULTS: Dict[str, Tuple[str, int]] = {
+    'openai': ('text-embedding-3-small', 1536),
+    'hashing': ('hashing-v1', 512),
+    'sentence-transformers': ('all-MiniLM-L6-v2', 384),
+}
+
+# Providers whose vectors are worth keeping in embedding_cache (recomputing a
+# hashing vector is cheaper than the cache round trip)
+CACHED_PROVIDERS = ('openai', 'sentence-transformers')
+
+EMBEDDING_PROVIDER = os.getenv('MEMORY_EMBEDDING_PROVIDER', 'openai').strip().lower() or 'openai'
+
+# An unknown provider is reported by provider_config_error() (embedding is
+# refused, search degrades to keyword-only); defaults resolve as for openai
+INVALID_PROVIDER = None
+if EMBEDDING_PROVIDER not in EMBEDDING_PROVIDERS:
+    INVALID_PROVIDER = EMBEDDING_PROVIDER
+    EMBEDDING_PROVIDER = 'openai'
+    print(f"Warning: unknown MEMORY_EMBEDDING_PROVIDER {INVALID_PROVIDER!r}; "
+          f"must be one of {EMBEDDING_PROVIDERS}", file=sys.stderr)
+
+_WORD_RE = re.compile(r'\w+')
+
+# Relative weights of the hashed feature families
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25
+
+# Loaded SentenceTransformer models, keyed by model name (one load per process)
+_models: Dict[str, Any] = {}
+
+
+def default_model(provider: str = EMBEDDING_PROVIDER) -> str:
+    """Default model name for a provider."""
+    return PROVIDER_DEFAULTS[provider][0]
+
+
+def default_dimensions(provider: str = EMBEDDING_PROVIDER) -> int:
+    """Default output dimensions for a provider."""
+    return PROVIDER_DEFAULTS[provider][1]
+
+
+# ---------------------------------------------------------------------------
+# Encoders
+# ---------------------------------------------------------------------------
+
+def _features(text: str) -> Dict[str, float]:
+    """Weighted hashing features: words, adjacent word pairs, character trigrams."""
+    words = _WORD_RE.findall(text.lower())
+    features: Dict[str, float] = {}
+    for word in words:
+        key = 'w:' + word
+        features[key] = features.get(key, 0.0) + WORD_WEIGHT
+        padded = f'<{word}>'
+        for i in range(len(padded) - 2):
+            key = 'c:' + padded[i:i + 3]
+            features[key] = features.get(key, 0.0) + TRIGRAM_WEIGHT
+    for first, second in zip(words, words[1:]):
+        key = f'b:{first} {second}'
+        features[key] = features.get(key, 0.0) + BIGRAM_WEIGHT
+    return features
+
+
+def hashing_vector(text: str, dims: int) -> List[float]:
+    """
+    Encode text with the hashing trick.
+
+    Each feature's 64-bit blake2b digest picks a dimension (low bits mod dims)
+    and a sign (top bit), which keeps collisions unbiased. Counts are damped
+    with 1 + log(weight) and the vector is L2-normalized.
+    """
+    vector = [0.0] * dims
+    for feature, weight in _features(text).items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        value = 1.0 + math.log(weight) if weight > 1.0 else weight
+        vector[digest % dims] += -value if digest >> 63 else value
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        vector = [v / norm for v in vector]
+    return vector
+
+
+class HashingEncoder:
+    """Feature-hashing encoder (no model to load)."""
+
+    def __init__(self, dims: int):
+        self.dims = dims
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return [hashing_vector(text, self.dims) for text in texts]
+
+
+class SentenceTransformerEncoder:
+    """SentenceTransformer model, loaded once per process and shared."""
+
+    def __init__(self, model: str, dims: int):
+        if not HAS_SENTENCE_TRANSFORMERS:
+            raise ValueError("sentence-transformers package not installed. Run: pip install sentence-transformers")
+        if model not in _models:
+            _models[model] = SentenceTransformer(model, device='cpu')
+        self.model = _models[model]
+        native = self.model.get_sentence_embedding_dimension()
+        if native != dims:
+            raise ValueError(
+                f"Model {model} produces {native}-dimension vectors; set MEMORY_EMBEDDING_DIMENSIONS={native}"
+            )
+        self.dims = dims
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.tolist()
+
+
+# ---------------------------------------------------------------------------
+# OpenAI-compatible clients
+# ---------------------------------------------------------------------------
+
+class LocalEmbeddings:
+    """`client.embeddings` for a local encoder."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def create(self, model: str, input, encoding_format: str = "float", **kwargs) -> SimpleNamespace:
+        texts = input if isinstance(input, list) else [input]
+        vectors = self.encoder.encode(texts)
+        # Local inference is free; report no billable tokens
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=vector) for i, vector in enumerate(vectors)],
+            usage=SimpleNamespace(prompt_tokens=0, total_tokens=0)
+        )
+
+
+class AsyncLocalEmbeddings(LocalEmbeddings):
+    """Awaitable `client.embeddings` (encoding runs in a worker thread)."""
+
+    async def create(self, model: str, input, encoding_format: str = "float", **kwargs) -> SimpleNamespace:
+        return await asyncio.to_thread(super().create, model, input, encoding_format, **kwargs)
+
+
+def _encoder(provider: str, model: str, dims: int):
+    if provider == 'hashing':
+        return HashingEncoder(dims)
+    if provider == 'sentence-transformers':
+        return SentenceTransformerEncoder(model, dims)
+    raise ValueError(f"Invalid local provider. Must be one of: {EMBEDDING_PROVIDERS[1:]}")
+
+
+def provider_config_error(provider: str, model: str, dims: int) -> Optional[str]:
+    """
+    Why a provider cannot embed with this configuration, or None if it can.
+
+    Checks the MEMORY_EMBEDDING_PROVIDER value, and for sentence-transformers
+    that the package is installed and the model's output size matches `dims`
+    (loads the model once per process, like the encoder itself).
+
+    Args:
+        provider: Resolved provider name
+        model: Model name
+        dims: Configured output dimensions
+
+    Returns:
+        Error message, or None
+    """
+    if INVALID_PROVIDER is not None:
+        return f"Unknown MEMORY_EMBEDDING_PROVIDER {INVALID_PROVIDER!r}. Must be one of: {EMBEDDING_PROVIDERS}"
+    if provider == 'sentence-transformers':
+        try:
+            SentenceTransformerEncoder(model, dims)
+        except (ValueError, OSError) as e:
+            return str(e)
+    return None
+
+
+def get_local_client(provider: str, model: str, dims: int, use_async: bool = False) -> SimpleNamespace:
+    """
+    OpenAI-compatible client for a local provider.
+
+    Args:
+        provider: 'hashing' or 'sentence-transformers'
+        model: Model name (recorded as embedding_model; selects the ST model)
+        dims: Output dimensions
+        use_async: Return an AsyncOpenAI-style client (for embed_worker.py)
+
+    Returns:
+        Object with an `embeddings.create(model=, input=, ...)` method
+    """
+    encoder = _encoder(provider, model, dims)
+    embeddings = AsyncLocalEmbeddings(encoder) if use_async else LocalEmbeddings(encoder)
+    return SimpleNamespace(embeddings=embeddings)
@@ -0,0 +1,214 @@
+"""
+Tool: Rank Fusion
+Purpose: Combine ranked candidate lists (BM25, vector) into one ranking
+
+Fusion methods:
+- linear: weighted sum of the rankers' scores (bm25 is max-normalized,
+  semantic is raw cosine); the original hybrid_search formula
+- rrf:    weighted reciprocal rank fusion, sum(w / (k + rank)), scaled so a
+          document ranked first by every ranker scores 1.0
+- zscore: weighted sum of per-list z-scores, squashed to 0-1 with a logistic
+
+fuse_adaptive() grows the candidate pool per ranker (limit, 2*limit, ...)
+and stops as soon as the top-k cannot change: for linear and rrf it checks
+the best score any unseen or partially seen document could still reach
+(threshold-algorithm bound). zscore normalizes over each whole run, so no
+prefix can settle its top-k; it fetches max_pool candidates in one round.
+
+Used by hybrid_search.py.
+
+Dependencies:
+    - none (stdlib only)
+
+Output:
+    Fused [(entry_id, score, {ranker: score}), ...] lists
+"""
+
+import math
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+FUSION_METHODS = ['linear', 'rrf', 'zscore']
+
+# Standard RRF damping constant
+RRF_K = 60
+
+# Ranked run: [(entry_id, score), ...] best first
+Run = List[Tuple[int, float]]
+
+
+def _contributions(
+    runs: Dict[str, Run],
+    weights: Dict[str, float],
+    method: str,
+    rrf_k: int = RRF_K
+) -> Dict[int, Dict[str, float]]:
+    """Per-document, per-ranker weighted contribution to the fused score."""
+    contributions: Dict[int, Dict[str, float]] = {}
+
+    if method == 'rrf':
+        scale = sum(weights.get(name, 0) for name in runs) / (rrf_k + 1) or 1
+        for name, run in runs.items():
+            w = weights.get(name, 0)
+            for rank, (entry_id, _) in enumerate(run, start=1):
+                contributions.setdefault(entry_id, {})[name] = w / (rrf_k + rank) / scale
+    elif method == 'zscore':
+        for name, run in runs.items():
+            w = weights.get(name, 0)
+            if not run:
+                continue
+            values = [score for _, score in run]
+            mean = sum(values) / len(values)
+            std = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)) or 1
+            for entry_id, score in run:
+                contributions.setdefault(entry_id, {})[name] = w * (score - mean) / std
+    else:
+        for name, run in runs.items():
+            w = weights.get(name, 0)
+            for entry_id, score in run:
+                contributions.setdefault(entry_id, {})[name] = w * score
+
+    return contributions
+
+
+def _missing_caps(
+    runs: Dict[str, Run],
+    weights: Dict[str, float],
+    method: str,
+    pool: int,
+    rrf_k: int = RRF_K
+) -> Dict[str, float]:
+    """Largest contribution a document absent from each run could still have."""
+    caps = {}
+    scale = sum(weights.get(name, 0) for name in runs) / (rrf_k + 1) or 1
+    for name, run in runs.items():
+        if len(run) < pool:
+            # Ranker exhausted: absent documents contribute nothing
+            caps[name] = 0.0
+        elif method == 'rrf':
+            caps[name] = weights.get(name, 0) / (rrf_k + len(run) + 1) / scale
+        else:
+            caps[name] = weights.get(name, 0) * run[-1][1]
+    return caps
+
+
+def fuse(
+    runs: Dict[str, Run],
+    weights: Dict[str, float],
+    method: str = 'linear',
+    rrf_k: int = RRF_K
+) -> List[Tuple[int, float, Dict[str, float]]]:
+    """
+    Fuse ranked runs into one ranking.
+
+    Args:
+        runs: Ranker name -> [(entry_id, score), ...] best first
+        weights: Ranker name -> weight
+        method: 'linear', 'rrf' or 'zscore'
+        rrf_k: RRF damping constant
+
+    Returns:
+        [(entry_id, fused score, {ranker: original score}), ...] best first
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Invalid fusion method. Must be one of: {FUSION_METHODS}")
+
+    contributions = _contributions(runs, weights, method, rrf_k)
+    original = {name: dict(run) for name, run in runs.items()}
+
+    if method == 'zscore':
+        # Documents missing from a run take that run's lowest z-score
+        floors = {
+            name: min((c[name] for c in contributions.values() if name in c), default=0.0)
+            for name in runs
+        }
+        fused = {
+            entry_id: 1 / (1 + math.exp(-sum(parts.get(name, floors[name]) for name in runs)))
+            for entry_id, parts in contributions.items()
+        }
+    else:
+        fused = {entry_id: sum(parts.values()) for entry_id, parts in contributions.items()}
+
+    ranked = sorted(fused.items(), key=lambda x: (-x[1], x[0]))
+    return [
+        (entry_id, score, {name: original[name][entry_id] for name in runs if entry_id in original[name]})
+        for entry_id, score in ranked
+    ]
+
+
+def _top_k_settled(
+    runs: Dict[str, Run],
+    weights: Dict[str, float],
+    method: str,
+    pool: int,
+    limit: int,
+    rrf_k: int
+) -> bool:
+    """True if no unseen or partially seen document can still enter the top-k."""
+    caps = _missing_caps(runs, weights, method, pool, rrf_k)
+    contributions = _contributions(runs, weights, method, rrf_k)
+
+    low = {entry_id: sum(parts.values()) for entry_id, parts in contributions.items()}
+    ranked = sorted(low, key=lambda entry_id: -low[entry_id])
+    if len(ranked) < limit:
+        return all(cap == 0 for cap in caps.values())
+
+    kth = low[ranked[limit - 1]]
+    challenger = sum(caps.values())
+    for entry_id in ranked[limit:]:
+        missing = sum(cap for name, cap in caps.items() if name not in contributions[entry_id])
+        challenger = max(challenger, low[entry_id] + missing)
+    # Members' order may still shift as pools grow, but the set is final
+    return kth >= challenger
+
+
+def fuse_adaptive(
+    fetchers: Dict[str, Callable[[int], Run]],
+    weights: Dict[str, float],
+    limit: int,
+    method: str = 'linear',
+    initial_pool: Optional[int] = None,
+    max_pool: Optional[int] = None,
+    rrf_k: int = RRF_K
+) -> Tuple[List[Tuple[int, float, Dict[str, float]]], Dict[str, Any]]:
+    """
+    Fuse rankers while growing their candidate pools only as far as needed.
+
+    Args:
+        fetchers: Ranker name -> function returning its top-n run for pool size n
+        weights: Ranker name -> weight
+        limit: Number of fused results wanted
+        method: 'linear', 'rrf' or 'zscore'
+        initial_pool: First pool size per ranker (default: limit)
+        max_pool: Largest pool size per ranker (default: 8 * limit)
+        rrf_k: RRF damping constant
+
+    Returns:
+        (fused ranking, stats dict with pool, rounds and early_stop)
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Invalid fusion method. Must be one of: {FUSION_METHODS}")
+
+    pool = max(1, initial_pool or limit)
+    max_pool = max(pool, max_pool or limit * 8)
+    if method == 'zscore':
+        # Z-scores depend on every candidate in a run, so a partial pool
+        # can rank differently from the full one
+        pool = max_pool
+    rounds = 0
+
+    while True:
+        rounds += 1
+        runs = {name: fetch(pool) for name, fetch in fetchers.items()}
+        fused = fuse(runs, weights, method, rrf_k)
+
+        exhausted = all(len(run) < pool for run in runs.values())
+        settled = method != 'zscore' and _top_k_settled(runs, weights, method, pool, limit, rrf_k)
+
+        if exhausted or settled or pool >= max_pool:
+            return fused, {
+                "pool": pool,
+                "rounds": rounds,
+                "early_stop": settled and not exhausted and pool < max_pool
+            }
+
+        pool = min(pool * 2, max_pool)
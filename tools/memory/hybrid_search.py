@@ -3,9 +3,16 @@ Tool: Hybrid Memory Search
 Purpose: Combined BM25 (keyword) + Vector (semantic) search for optimal retrieval
 
 This implements Moltbot's hybrid search approach:
-- BM25 for exact token matching (good for specific terms)
+- BM25 for exact token matching (good for specific terms), served from the
+  persistent inverted index in bm25_index.py or from SQLite FTS5
 - Vector search for semantic similarity (good for meaning)
-- Combined scoring: 0.7 * bm25 + 0.3 * cosine (configurable)
+- Combined scoring: 0.7 * bm25 + 0.3 * cosine (configurable), or reciprocal
+  rank / z-score fusion (fusion.py) over adaptively sized candidate pools
+
+Metadata filters (--filter, see search_filters.py) restrict both rankers
+before scoring: the vector ranker scores only eligible rows, BM25 skips
+postings outside the eligible id set and FTS5 applies the same conditions in
+SQL. Expired entries are left out unless the filter says expired=include.
 
 Usage:
     python tools/memory/hybrid_search.py --query "GPT image generation"
@@ -13,10 +20,13 @@ Usage:
     python tools/memory/hybrid_search.py --query "meeting" --bm25-weight 0.5
     python tools/memory/hybrid_search.py --query "learned" --semantic-only
     python tools/memory/hybrid_search.py --query "API key" --keyword-only
+    python tools/memory/hybrid_search.py --query '"image gen*"' --keyword-mode fts
+    python tools/memory/hybrid_search.py --query "meeting" --fusion rrf
+    python tools/memory/hybrid_search.py --query "deploy" --filter "type=fact,event tag=infra importance>=5"
 
 Dependencies:
     - openai (for embeddings)
-    - rank_bm25 (optional, falls back to simple TF-IDF)
+    - rank_bm25 (optional, only used when scoring a pre-loaded entry list)
     - sqlite3 (stdlib)
 
 Env Vars:
@@ -30,10 +40,11 @@ import os
 import sys
 import json
 import argparse
-import re
+import heapq
 import math
+import sqlite3
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Set, Tuple
 from collections import Counter
 from dotenv import load_dotenv
 
@@ -43,9 +54,13 @@ load_dotenv()
 # Import from sibling modules
 sys.path.insert(0, str(Path(__file__).parent))
 try:
-    from semantic_search import semantic_search, cosine_similarity
+    from semantic_search import semantic_search, cosine_similarity, EmbeddingRanking
+    from fusion import FUSION_METHODS, fuse_adaptive
     from embed_memory import generate_embedding, bytes_to_embedding
-    from memory_db import get_connection, search_entries
+    from memory_db import connection, get_connection, search_entries, build_fts_query
+    import bm25_index
+    from bm25_index import tokenize
+    from search_filters import normalize_filter, parse_filter, compile_filter, is_restrictive, matching_ids, expired_ids
 except ImportError as e:
     print(f"Error importing modules: {e}", file=sys.stderr)
     sys.exit(1)
@@ -57,15 +72,8 @@ try:
 except ImportError:
     HAS_BM25 = False
 
-
-def tokenize(text: str) -> List[str]:
-    """Simple tokenizer for BM25."""
-    # Lowercase, remove punctuation, split on whitespace
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    tokens = text.split()
-    # Remove very short tokens
-    return [t for t in tokens if len(t) > 1]
+# Keyword backends: Python-scored inverted index, or FTS5 MATCH + bm25() in SQLite
+KEYWORD_MODES = ['index', 'fts']
 
 
 def simple_bm25_score(query_tokens: List[str], doc_tokens: List[str],
@@ -94,39 +102,172 @@ def simple_bm25_score(query_tokens: List[str], doc_tokens: List[str],
 
 def get_all_entries_for_bm25() -> List[Dict[str, Any]]:
     """Get all active entries for BM25 indexing."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, type, content, source, importance, tags, created_at
+            FROM memory_entries
+            WHERE is_active = 1
+            ORDER BY importance DESC
+        ''')
+
+        entries = [dict(row) for row in cursor.fetchall()]
+    return entries
+
 
-    cursor.execute('''
+def _fetch_entries(cursor, entry_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch result rows for the given IDs only, as an id -> row dict."""
+    if not entry_ids:
+        return {}
+    placeholders = ','.join('?' * len(entry_ids))
+    cursor.execute(f'''
         SELECT id, type, content, source, importance, tags, created_at
         FROM memory_entries
-        WHERE is_active = 1
-        ORDER BY importance DESC
-    ''')
+        WHERE id IN ({placeholders})
+    ''', entry_ids)
+    return {row['id']: dict(row) for row in cursor.fetchall()}
 
-    entries = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return entries
+
+def keyword_id_filter(cursor, filters: Dict[str, Any]) -> Tuple[Optional[Set[int]], Set[int]]:
+    """
+    Id restriction for the inverted-index keyword path.
+
+    Returns:
+        (allowed ids, or None when only the default active/unexpired rule
+        applies; expired ids to drop in that case)
+    """
+    if is_restrictive(filters):
+        return set(matching_ids(cursor, filters)), set()
+    if filters.get('include_expired'):
+        return None, set()
+    return None, expired_ids(cursor)
+
+
+def keyword_candidates(
+    cursor,
+    query: str,
+    limit: int = 20,
+    entry_type: Optional[str] = None,
+    mode: str = 'index',
+    filters: Optional[Dict[str, Any]] = None,
+    id_filter: Optional[Tuple[Optional[Set[int]], Set[int]]] = None
+) -> List[Tuple[int, float, float]]:
+    """
+    Top keyword matches on an open connection, without loading entry rows.
+
+    Args:
+        cursor: Database cursor
+        query: Search query
+        limit: Maximum candidates
+        entry_type: Optional type filter
+        mode: 'index' (bm25_index.py) or 'fts' (SQLite FTS5); FTS falls
+            back to the inverted index if this SQLite build lacks FTS5
+        filters: Optional metadata filter (see search_filters.py)
+        id_filter: Precomputed keyword_id_filter(cursor, filters), for
+            callers that request several pool sizes per query
+
+    Returns:
+        [(entry_id, max-normalized score, raw score), ...] best first
+    """
+    filters = normalize_filter(filters, entry_type)
+    raw = None
+    if mode == 'fts':
+        # Terms are OR-ed so partial matches still rank
+        match = build_fts_query(query, operator='OR')
+        if not match:
+            return []
+        conditions, params = compile_filter(filters, alias='e')
+        try:
+            cursor.execute(f'''
+                SELECT e.id, -bm25(memory_fts) AS score
+                FROM memory_fts
+                JOIN memory_entries e ON e.id = memory_fts.rowid
+                WHERE memory_fts MATCH ? AND {" AND ".join(conditions)}
+                ORDER BY bm25(memory_fts)
+                LIMIT ?
+            ''', [match] + params + [limit])
+            raw = {row[0]: row[1] for row in cursor.fetchall()}
+        except sqlite3.OperationalError:
+            raw = None
+    if raw is None:
+        allowed, excluded = id_filter if id_filter is not None else keyword_id_filter(cursor, filters)
+        raw = bm25_index.score(cursor, query, allowed_ids=allowed)
+        for entry_id in excluded:
+            raw.pop(entry_id, None)
+    if not raw:
+        return []
+
+    max_score = max(raw.values()) or 1
+    ranked = heapq.nsmallest(limit, raw.items(), key=lambda x: (-x[1], x[0]))
+    return [(entry_id, score / max_score, score) for entry_id, score in ranked]
+
+
+def indexed_bm25_search(
+    query: str,
+    limit: int = 20,
+    entry_type: Optional[str] = None,
+    mode: str = 'index',
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    BM25 keyword search over a persistent index (inverted index or FTS5).
+
+    Only the postings of the query terms are read, and entry rows are
+    fetched for the returned page only.
+
+    Args:
+        query: Search query
+        limit: Maximum results
+        entry_type: Optional type filter
+        mode: 'index' or 'fts' (see keyword_candidates)
+        filters: Optional metadata filter (see search_filters.py)
+
+    Returns:
+        List of entries with BM25 scores
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        ranked = keyword_candidates(
+            cursor, query, limit=limit, entry_type=entry_type, mode=mode, filters=filters
+        )
+        rows = _fetch_entries(cursor, [entry_id for entry_id, _, _ in ranked])
+    finally:
+        conn.close()
+
+    return [{
+        **rows[entry_id],
+        "bm25_score": round(score, 4),
+        "bm25_raw": round(raw, 4)
+    } for entry_id, score, raw in ranked if entry_id in rows]
 
 
 def bm25_search(
     query: str,
     entries: Optional[List[Dict]] = None,
-    limit: int = 20
+    limit: int = 20,
+    entry_type: Optional[str] = None,
+    mode: str = 'index',
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform BM25 keyword search.
 
     Args:
         query: Search query
-        entries: Optional pre-loaded entries
+        entries: Optional pre-loaded entries to score in memory; when omitted
+            the persistent index selected by mode is used
         limit: Maximum results
+        entry_type: Optional type filter (persistent indexes only)
+        mode: 'index' (bm25_index.py) or 'fts' (SQLite FTS5)
+        filters: Optional metadata filter (persistent indexes only)
 
     Returns:
         List of entries with BM25 scores
     """
     if entries is None:
-        entries = get_all_entries_for_bm25()
+        return indexed_bm25_search(query, limit=limit, entry_type=entry_type, mode=mode, filters=filters)
 
     if not entries:
         return []
@@ -187,7 +328,11 @@ def hybrid_search(
     semantic_weight: float = 0.3,
     min_score: float = 0.1,
     semantic_only: bool = False,
-    keyword_only: bool = False
+    keyword_only: bool = False,
+    keyword_mode: str = 'index',
+    fusion: str = 'linear',
+    max_candidates: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Perform hybrid BM25 + semantic search.
@@ -201,6 +346,12 @@ def hybrid_search(
         min_score: Minimum combined score
         semantic_only: Only use semantic search
         keyword_only: Only use keyword search
+        keyword_mode: Keyword backend, 'index' or 'fts' (see bm25_search)
+        fusion: Score fusion, 'linear', 'rrf' or 'zscore' (see fusion.py)
+        max_candidates: Largest candidate pool per ranker (default 8 * limit);
+            pools start at limit and stop growing once the top-k is settled
+        filters: Optional metadata filter applied to both rankers before
+            scoring (see search_filters.py)
 
     Returns:
         dict with combined results
@@ -210,24 +361,26 @@ def hybrid_search(
         "query": query,
         "method": "hybrid",
         "weights": {"bm25": bm25_weight, "semantic": semantic_weight},
+        "keyword_mode": keyword_mode,
+        "fusion": fusion,
         "results": []
     }
 
-    # Get entries for BM25
-    all_entries = get_all_entries_for_bm25()
+    if fusion not in FUSION_METHODS:
+        return {"success": False, "error": f"Invalid fusion method. Must be one of: {FUSION_METHODS}"}
 
-    # Filter by type if specified
-    if entry_type:
-        all_entries = [e for e in all_entries if e.get('type') == entry_type]
+    if keyword_mode not in KEYWORD_MODES:
+        return {"success": False, "error": f"Invalid keyword mode. Must be one of: {KEYWORD_MODES}"}
 
-    if not all_entries:
-        results["message"] = "No entries found"
-        return results
+    try:
+        filters = normalize_filter(filters, entry_type)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
 
     # Keyword-only search
     if keyword_only:
         results["method"] = "keyword_only"
-        bm25_results = bm25_search(query, all_entries, limit=limit)
+        bm25_results = bm25_search(query, limit=limit, mode=keyword_mode, filters=filters)
         results["results"] = [{
             "id": r["id"],
             "type": r["type"],
@@ -241,7 +394,7 @@ def hybrid_search(
     # Semantic-only search
     if semantic_only:
         results["method"] = "semantic_only"
-        sem_results = semantic_search(query, entry_type=entry_type, limit=limit, threshold=0.3)
+        sem_results = semantic_search(query, limit=limit, threshold=0.3, filters=filters)
         if sem_results.get("success"):
             results["results"] = [{
                 "id": r["id"],
@@ -253,48 +406,74 @@ def hybrid_search(
             } for r in sem_results.get("results", [])]
         return results
 
-    # Full hybrid search
-    # Step 1: BM25 search (get more candidates than needed)
-    bm25_results = bm25_search(query, all_entries, limit=limit * 3)
-    bm25_scores = {r["id"]: r["bm25_score"] for r in bm25_results}
-
-    # Step 2: Semantic search on candidates
-    sem_results = semantic_search(query, entry_type=entry_type, limit=limit * 3, threshold=0.2)
-    semantic_scores = {}
-    if sem_results.get("success"):
-        semantic_scores = {r["id"]: r["similarity"] for r in sem_results.get("results", [])}
-
-    # Step 3: Combine scores
-    all_ids = set(bm25_scores.keys()) | set(semantic_scores.keys())
-    combined = []
-
-    for entry_id in all_ids:
-        bm25 = bm25_scores.get(entry_id, 0)
-        semantic = semantic_scores.get(entry_id, 0)
-
-        # Combined score
-        combined_score = (bm25_weight * bm25) + (semantic_weight * semantic)
-
-        if combined_score >= min_score:
-            # Find the entry data
-            entry_data = next((e for e in all_entries if e["id"] == entry_id), None)
-            if entry_data:
-                combined.append({
-                    "id": entry_id,
-                    "type": entry_data["type"],
-                    "content": entry_data["content"],
-                    "score": round(combined_score, 4),
-                    "bm25_score": round(bm25, 4) if bm25 > 0 else None,
-                    "semantic_score": round(semantic, 4) if semantic > 0 else None,
-                    "importance": entry_data.get("importance")
-                })
-
-    # Sort by combined score
-    combined.sort(key=lambda x: x["score"], reverse=True)
-
-    results["results"] = combined[:limit]
-    results["total_candidates"] = len(all_ids)
-    results["above_threshold"] = len(combined)
+    # Full hybrid search: one connection, both rankers feeding id-keyed
+    # runs into the fusion step, rows fetched once for the final page
+    embed_result = generate_embedding(query)
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+
+        ranking = None
+        if embed_result.get("success"):
+            try:
+                ranking = EmbeddingRanking(cursor, embed_result["embedding"], 0.2, filters=filters)
+            except ValueError as e:
+                # e.g. mixed embedding sizes: fall back to keyword ranking only
+                results["semantic_error"] = str(e)
+                ranking = None
+
+        id_filter = keyword_id_filter(cursor, filters) if keyword_mode == 'index' else None
+
+        def keyword_run(pool: int) -> List[Tuple[int, float]]:
+            return [
+                (entry_id, score)
+                for entry_id, score, _ in keyword_candidates(
+                    cursor, query, limit=pool, mode=keyword_mode, filters=filters, id_filter=id_filter
+                )
+            ]
+
+        def semantic_run(pool: int) -> List[Tuple[int, float]]:
+            return ranking.top(pool)[0] if ranking else []
+
+        fused, pool_stats = fuse_adaptive(
+            {"bm25": keyword_run, "semantic": semantic_run},
+            {"bm25": bm25_weight, "semantic": semantic_weight},
+            limit,
+            method=fusion,
+            max_pool=max_candidates
+        )
+        results["candidate_pool"] = pool_stats
+
+        if not fused:
+            results["message"] = "No entries found"
+            results["total_candidates"] = 0
+            results["above_threshold"] = 0
+            return results
+
+        scored = [item for item in fused if item[1] >= min_score]
+        page = scored[:limit]
+        rows = _fetch_entries(cursor, [entry_id for entry_id, _, _ in page])
+    finally:
+        conn.close()
+
+    results["results"] = []
+    for entry_id, combined_score, parts in page:
+        if entry_id not in rows:
+            continue
+        bm25 = parts.get("bm25", 0)
+        semantic = parts.get("semantic", 0)
+        results["results"].append({
+            "id": entry_id,
+            "type": rows[entry_id]["type"],
+            "content": rows[entry_id]["content"],
+            "score": round(combined_score, 4),
+            "bm25_score": round(bm25, 4) if bm25 > 0 else None,
+            "semantic_score": round(semantic, 4) if semantic > 0 else None,
+            "importance": rows[entry_id].get("importance")
+        })
+    results["total_candidates"] = len(fused)
+    results["above_threshold"] = len(scored)
 
     return results
 
@@ -314,9 +493,24 @@ def main():
                        help='Only use semantic/vector search')
     parser.add_argument('--keyword-only', action='store_true',
                        help='Only use keyword/BM25 search')
+    parser.add_argument('--keyword-mode', choices=KEYWORD_MODES, default='index',
+                       help='Keyword backend: index (BM25 inverted index) or fts (SQLite FTS5)')
+    parser.add_argument('--fusion', choices=FUSION_METHODS, default='linear',
+                       help='Score fusion: linear (weighted sum), rrf (reciprocal rank) or zscore')
+    parser.add_argument('--max-candidates', type=int,
+                       help='Largest candidate pool per ranker (default 8x limit)')
+    parser.add_argument('--filter', help='Metadata filter, e.g. "source=user tag=python importance>=5 created>=2026-01-01"')
 
     args = parser.parse_args()
 
+    filters = None
+    if args.filter:
+        try:
+            filters = parse_filter(args.filter)
+        except ValueError as e:
+            print(f"ERROR {e}")
+            sys.exit(1)
+
     # Normalize weights
     total_weight = args.bm25_weight + args.semantic_weight
     if total_weight == 0:
@@ -332,7 +526,11 @@ def main():
         semantic_weight=sem_w,
         min_score=args.min_score,
         semantic_only=args.semantic_only,
-        keyword_only=args.keyword_only
+        keyword_only=args.keyword_only,
+        keyword_mode=args.keyword_mode,
+        fusion=args.fusion,
+        max_candidates=args.max_candidates,
+        filters=filters
     )
 
     if result.get('success'):
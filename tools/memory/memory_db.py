@@ -5,37 +5,63 @@ Purpose: SQLite CRUD operations for persistent memory entries with embedding sup
 This matches Moltbot's memory architecture:
 - Markdown files for human-readable memory (MEMORY.md, daily logs)
 - SQLite for structured storage and vector search
-- Embeddings stored as BLOBs for semantic search
+- Embeddings stored as BLOBs in memory_embeddings (one row per entry and model)
+- Embeddings mirrored into a memory-mapped index file (data/memory.vec)
+  and an optional IVF ANN index (data/memory.ivf)
 
 Usage:
     python tools/memory/memory_db.py --action add --type fact --content "User prefers GPT for images"
     python tools/memory/memory_db.py --action add --type preference --content "Dark mode enabled" --source user
     python tools/memory/memory_db.py --action search --query "image generation preferences"
-    python tools/memory/memory_db.py --action list [--type fact|preference|event|insight]
+    python tools/memory/memory_db.py --action search --query '"dark mode" pref*' --mode fts
+    python tools/memory/memory_db.py --action list [--type fact|preference|event|insight] [--tag python]
+    python tools/memory/memory_db.py --action search --query "deploy" --tag infra,ops
+    python tools/memory/memory_db.py --action tags                 # Tag counts from the memory_tags index
     python tools/memory/memory_db.py --action get --id 5
     python tools/memory/memory_db.py --action delete --id 5
     python tools/memory/memory_db.py --action stats
     python tools/memory/memory_db.py --action recent --hours 24
+    python tools/memory/memory_db.py --action import --file entries.jsonl [--embed]
+    python tools/memory/memory_db.py --action maintenance          # WAL checkpoint + PRAGMA optimize
+    python tools/memory/memory_db.py --action compact [--retention-days 30] [--full]
+    python tools/memory/memory_db.py --action check-plans         # Fail if a hot query misses its index
 
 Dependencies:
     - sqlite3 (stdlib)
     - json (stdlib)
     - openai (for embeddings, optional)
 
+Env Vars:
+    - MEMORY_DB_PROFILE (optional, storage profile: wal (default), durable, rollback)
+    - MEMORY_DB_BUSY_TIMEOUT_MS (optional, wait for locks this long, default 5000)
+    - MEMORY_DB_MAINTENANCE_SECONDS (optional, interval for checkpoint/optimize, default 300)
+    - MEMORY_ACCESS_LOG (optional, access tracking: buffered (default), sync, off = read-only)
+    - MEMORY_ACCESS_LOG_RETENTION_DAYS (optional, raw access events kept before daily rollup, default 30)
+    - MEMORY_COMPACT_SECONDS (optional, interval for scheduled rollup + incremental vacuum, default 86400, 0 = off)
+
 Output:
     JSON result with success status and data
 """
 
 import os
+import re
 import sys
 import json
+import time
 import sqlite3
 import argparse
 import hashlib
+import atexit
 import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator, Iterable, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+import bm25_index
+import access_log
+import quantization
 
 # Database path
 DB_PATH = Path(__file__).parent.parent.parent / "data" / "memory.db"
@@ -46,8 +72,104 @@ VALID_TYPES = ['fact', 'preference', 'event', 'insight', 'task', 'relationship']
 # Valid sources
 VALID_SOURCES = ['user', 'inferred', 'session', 'external', 'system']
 
+# Maximum rows kept in embedding_cache before least-recently-used eviction
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('MEMORY_EMBEDDING_CACHE_MAX', '100000'))
+
+# Model recorded for embeddings stored without one (and for migrated BLOBs)
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# Join from memory_entries (as e) to its active embedding (as v.vector);
+# memory_entries.embedding_model names the model whose vector search uses
+EMBEDDING_JOIN = 'JOIN memory_embeddings v ON v.entry_id = e.id AND v.model = e.embedding_model'
+
+# Unexpired-entry condition; format with alias='' or e.g. alias='e.'
+NOT_EXPIRED = "({alias}expires_at IS NULL OR {alias}expires_at > datetime('now'))"
+
+# Read queries issued both by their callers and by check_query_plans (HOT_QUERIES)
+STATS_BY_TYPE_SQL = 'SELECT type, COUNT(*) as count FROM memory_entries WHERE is_active = 1 GROUP BY type'
+STATS_BY_SOURCE_SQL = 'SELECT source, COUNT(*) as count FROM memory_entries WHERE is_active = 1 GROUP BY source'
+STATS_TOTAL_SQL = 'SELECT COUNT(*) as total FROM memory_entries'
+STATS_WITH_EMBEDDINGS_SQL = (
+    'SELECT COUNT(*) as count FROM memory_entries WHERE embedding_model IS NOT NULL AND is_active = 1'
+)
+STATS_MOST_ACCESSED_SQL = (
+    'SELECT id, content, access_count FROM memory_entries WHERE is_active = 1 ORDER BY access_count DESC LIMIT 5'
+)
+NEEDS_EMBEDDING_SQL = (
+    'SELECT id, content, type FROM memory_entries WHERE embedding_model IS NULL AND is_active = 1 '
+    'ORDER BY importance DESC, created_at DESC LIMIT ?'
+)
+# Active vectors from a model other than ? (two seeks on idx_memory_embedded_expiry)
+OTHER_MODELS_SQL = (
+    'SELECT EXISTS (SELECT 1 FROM memory_entries WHERE embedding_model IS NOT NULL AND is_active = 1 '
+    'AND embedding_model < ?) OR EXISTS (SELECT 1 FROM memory_entries WHERE embedding_model IS NOT NULL '
+    'AND is_active = 1 AND embedding_model > ?)'
+)
+EXPIRED_IDS_SQL = (
+    "SELECT id FROM memory_entries WHERE expires_at IS NOT NULL AND is_active = 1 AND expires_at <= datetime('now')"
+)
+# High-water mark of a table (memory_entries or daily_logs); format with table=
+HIGH_WATER_SQL = 'SELECT (SELECT MAX(updated_at) FROM {table}), (SELECT MAX(id) FROM {table})'
+
+# Rows per transaction for add_entries_bulk / --action import
+BULK_BATCH_SIZE = 500
+
+# Invalid/failed rows listed individually in a bulk import result (the rest are counted)
+BULK_MAX_REPORTED_ROWS = 1000
+
+# Keyword modes for search_entries: substring LIKE scan or ranked FTS5 MATCH
+SEARCH_MODES = ['like', 'fts']
+
 _schema_initialized = False
 _schema_lock = threading.Lock()
+# Set by init_db(); False when SQLite was built without FTS5
+_fts_available = False
+
+# Storage profiles applied to every new connection. WAL lets readers and the
+# single writer proceed concurrently; mmap/cache keep read-heavy search in memory.
+STORAGE_PROFILES: Dict[str, Dict[str, Any]] = {
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,   # negative = KiB
+        'temp_store': 'MEMORY',
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    # For filesystems without shared-memory support (e.g. network mounts)
+    'rollback': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -16 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+STORAGE_PROFILE = os.getenv('MEMORY_DB_PROFILE', 'wal')
+BUSY_TIMEOUT_MS = int(os.getenv('MEMORY_DB_BUSY_TIMEOUT_MS', '5000'))
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv('MEMORY_DB_MAINTENANCE_SECONDS', '300'))
+
+_last_maintenance = time.monotonic()
+
+# Access log rollup + incremental vacuum (see compact); the last run is
+# recorded in maintenance_runs so short-lived CLI processes share the schedule
+COMPACT_INTERVAL_SECONDS = float(os.getenv('MEMORY_COMPACT_SECONDS', '86400'))
+
+# Idle connections kept per thread, and prepared statements cached per connection
+POOL_SIZE_PER_THREAD = 4
+STATEMENT_CACHE_SIZE = 256
+
+_pool_local = threading.local()
+_pool_lock = threading.RLock()
+_pool_all: set = set()
+_pool_idle: set = set()
+_pool_key: Optional[tuple] = None
 
 
 def _table_exists(cursor: sqlite3.Cursor, table_name: str) -> bool:
@@ -63,6 +185,80 @@ def _column_names(cursor: sqlite3.Cursor, table_name: str) -> set[str]:
     return {row[1] for row in cursor.fetchall()}
 
 
+def _ensure_embeddings_schema(cursor: sqlite3.Cursor, columns: set[str]) -> None:
+    """
+    Create memory_embeddings and move inline memory_entries.embedding BLOBs into it.
+
+    Vectors live in their own table so metadata scans over memory_entries do
+    not page through kilobytes of BLOB per row, and an entry can keep
+    embeddings from several models side by side. memory_entries.embedding_model
+    stays as the pointer to the vector search uses.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS memory_embeddings (
+            entry_id INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            dims INTEGER NOT NULL,
+            dtype TEXT NOT NULL DEFAULT 'float32',
+            vector BLOB NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (entry_id, model)
+        )
+    ''')
+
+    if "embedding" not in columns:
+        return
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO memory_embeddings (entry_id, model, dims, dtype, vector)
+        SELECT id, COALESCE(NULLIF(embedding_model, ''), ?), LENGTH(embedding) / 4, 'float32', embedding
+        FROM memory_entries
+        WHERE embedding IS NOT NULL
+    ''', (DEFAULT_EMBEDDING_MODEL,))
+    cursor.execute('''
+        UPDATE memory_entries SET embedding_model = COALESCE(NULLIF(embedding_model, ''), ?)
+        WHERE embedding IS NOT NULL
+    ''', (DEFAULT_EMBEDDING_MODEL,))
+    cursor.execute('''
+        UPDATE memory_entries SET embedding_model = NULL
+        WHERE embedding_model IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM memory_embeddings v
+            WHERE v.entry_id = memory_entries.id AND v.model = memory_entries.embedding_model
+        )
+    ''')
+
+    # Partial indexes on the old column block DROP COLUMN; init_db recreates them
+    cursor.execute('DROP INDEX IF EXISTS idx_memory_needs_embedding')
+    cursor.execute('DROP INDEX IF EXISTS idx_memory_embedded_model')
+    try:
+        cursor.execute('ALTER TABLE memory_entries DROP COLUMN embedding')
+    except sqlite3.OperationalError:
+        # SQLite < 3.35: keep the column but release its pages
+        cursor.execute('UPDATE memory_entries SET embedding = NULL WHERE embedding IS NOT NULL')
+
+
+def _ensure_tags_schema(cursor: sqlite3.Cursor) -> None:
+    """
+    Create memory_tags, the normalized tag index (one row per entry and tag).
+
+    memory_entries.tags keeps the JSON list as entered (it feeds the FTS
+    mirror); tag filters seek on memory_tags instead of scanning that text.
+    The table is backfilled from the JSON column when first created.
+    """
+    created = not _table_exists(cursor, "memory_tags")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS memory_tags (
+            tag TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tag, entry_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_tags_entry ON memory_tags(entry_id, position)')
+    if created:
+        rebuild_tag_index(cursor)
+
+
 def _ensure_memory_entries_schema(conn: sqlite3.Connection, cursor: sqlite3.Cursor) -> None:
     """
     Ensure existing memory_entries table is compatible with this tool.
@@ -88,7 +284,6 @@ def _ensure_memory_entries_schema(conn: sqlite3.Connection, cursor: sqlite3.Curs
         ("updated_at", "DATETIME DEFAULT CURRENT_TIMESTAMP"),
         ("last_accessed", "DATETIME"),
         ("access_count", "INTEGER DEFAULT 0"),
-        ("embedding", "BLOB"),
         ("embedding_model", "TEXT"),
         ("tags", "TEXT"),
         ("context", "TEXT"),
@@ -108,6 +303,8 @@ def _ensure_memory_entries_schema(conn: sqlite3.Connection, cursor: sqlite3.Curs
     cursor.execute("UPDATE memory_entries SET access_count = 0 WHERE access_count IS NULL")
     cursor.execute("UPDATE memory_entries SET is_active = 1 WHERE is_active IS NULL")
 
+    _ensure_embeddings_schema(cursor, columns)
+
     cursor.execute(
         "SELECT id, content FROM memory_entries WHERE content_hash IS NULL OR content_hash = ''"
     )
@@ -120,13 +317,375 @@ def _ensure_memory_entries_schema(conn: sqlite3.Connection, cursor: sqlite3.Curs
     conn.commit()
 
 
+def _ensure_fts_schema(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the FTS5 mirror of memory_entries(content, tags, context).
+
+    memory_fts is an external-content table: it stores only the index, and
+    triggers keep it in step with inserts, deletes and text-column updates.
+    A newly created mirror is populated from existing rows.
+    """
+    global _fts_available
+    existed = _table_exists(cursor, 'memory_fts')
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+                content, tags, context,
+                content='memory_entries', content_rowid='id'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; search_entries(mode='fts') reports it
+        _fts_available = False
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS memory_fts_insert AFTER INSERT ON memory_entries BEGIN
+            INSERT INTO memory_fts (rowid, content, tags, context)
+            VALUES (new.id, new.content, new.tags, new.context);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS memory_fts_delete AFTER DELETE ON memory_entries BEGIN
+            INSERT INTO memory_fts (memory_fts, rowid, content, tags, context)
+            VALUES ('delete', old.id, old.content, old.tags, old.context);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS memory_fts_update AFTER UPDATE OF content, tags, context ON memory_entries BEGIN
+            INSERT INTO memory_fts (memory_fts, rowid, content, tags, context)
+            VALUES ('delete', old.id, old.content, old.tags, old.context);
+            INSERT INTO memory_fts (rowid, content, tags, context)
+            VALUES (new.id, new.content, new.tags, new.context);
+        END
+    ''')
+    if not existed:
+        cursor.execute("INSERT INTO memory_fts (memory_fts) VALUES ('rebuild')")
+    _fts_available = True
+
+
 def _open_connection() -> sqlite3.Connection:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(
+        str(DB_PATH),
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Pooled connections never leave their thread; close_pool() may
+        # close them from another thread at exit
+        check_same_thread=False
+    )
     conn.row_factory = sqlite3.Row
+    _apply_storage_profile(conn)
     return conn
 
 
+def _init_auto_vacuum() -> None:
+    """
+    Create a new database file with incremental auto-vacuum.
+
+    The mode only takes effect before the first table and the WAL switch
+    write the header, so it is set once here; existing databases switch on
+    their next full VACUUM (compact --full).
+    """
+    if DB_PATH.exists() and DB_PATH.stat().st_size > 0:
+        return
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(DB_PATH), timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def _apply_storage_profile(conn: sqlite3.Connection) -> None:
+    """Set the configured profile's pragmas (once per pooled connection)."""
+    profile = STORAGE_PROFILES.get(STORAGE_PROFILE, STORAGE_PROFILES['wal'])
+    conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT_MS)}')
+    try:
+        conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+    except sqlite3.OperationalError:
+        # Another connection holds a lock; the mode is persistent, so a
+        # later connection will switch it
+        pass
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+    conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+    conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+    conn.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+
+
+def run_maintenance(checkpoint: str = 'PASSIVE') -> Dict[str, Any]:
+    """
+    Checkpoint the WAL and refresh query-planner statistics.
+
+    scheduled_maintenance() also runs it every MAINTENANCE_INTERVAL_SECONDS
+    from the access-log flusher thread; PASSIVE checkpoints never wait for
+    readers.
+
+    Args:
+        checkpoint: wal_checkpoint mode (PASSIVE, FULL, RESTART, TRUNCATE)
+
+    Returns:
+        dict with checkpoint counters
+    """
+    global _last_maintenance
+    if checkpoint.upper() not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        return {"success": False, "error": "Invalid checkpoint mode"}
+
+    conn = get_connection()
+    try:
+        _last_maintenance = time.monotonic()
+        busy, wal_pages, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({checkpoint.upper()})').fetchone()
+        conn.execute('PRAGMA optimize')
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        "success": True,
+        "journal_mode": journal_mode,
+        "checkpoint": checkpoint.upper(),
+        "busy": bool(busy),
+        "wal_pages": wal_pages,
+        "checkpointed_pages": checkpointed,
+        "message": f"Checkpointed {max(checkpointed, 0)} WAL pages and ran PRAGMA optimize"
+    }
+
+
+def _database_bytes(conn: sqlite3.Connection) -> Dict[str, int]:
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return {"bytes": page_size * page_count, "free_bytes": page_size * freelist}
+
+
+def _compaction_due(conn: sqlite3.Connection) -> bool:
+    if COMPACT_INTERVAL_SECONDS <= 0:
+        return False
+    row = conn.execute(
+        "SELECT 1 FROM maintenance_runs WHERE task = 'compact' AND last_run > datetime('now', ?)",
+        (f'-{int(COMPACT_INTERVAL_SECONDS)} seconds',)
+    ).fetchone()
+    return row is None
+
+
+def _compact(conn: sqlite3.Connection, retention_days: int, full: bool) -> Dict[str, Any]:
+    """Roll up and prune the access log, then return free pages to the filesystem."""
+    before = _database_bytes(conn)
+    cursor = conn.cursor()
+    counts = access_log.rollup(cursor, retention_days)
+    cursor.execute('''
+        INSERT INTO maintenance_runs (task, last_run) VALUES ('compact', CURRENT_TIMESTAMP)
+        ON CONFLICT(task) DO UPDATE SET last_run = excluded.last_run
+    ''')
+    conn.commit()
+
+    auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    if full:
+        # Also converts databases created before auto_vacuum was enabled
+        conn.execute('VACUUM')
+        vacuum = 'full'
+    elif auto_vacuum == 2:
+        # executescript steps the pragma to completion; execute() frees one page
+        conn.executescript('PRAGMA incremental_vacuum;')
+        vacuum = 'incremental'
+    else:
+        vacuum = 'skipped'
+    after = _database_bytes(conn)
+
+    return {
+        **counts,
+        "vacuum": vacuum,
+        "bytes_before": before["bytes"],
+        "bytes_after": after["bytes"],
+        "reclaimed_bytes": before["bytes"] - after["bytes"],
+        "free_bytes": after["free_bytes"]
+    }
+
+
+def compact(retention_days: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Roll raw access events into daily aggregates, prune them and vacuum.
+
+    scheduled_maintenance() runs it every COMPACT_INTERVAL_SECONDS (with
+    incremental vacuum only); full=True runs VACUUM, which rewrites the whole file and switches
+    older databases to incremental auto-vacuum.
+
+    Args:
+        retention_days: Days of raw access events to keep (default: MEMORY_ACCESS_LOG_RETENTION_DAYS)
+        full: Run a full VACUUM instead of incremental_vacuum
+
+    Returns:
+        dict with rollup counts and reclaimed bytes
+    """
+    days = access_log.RETENTION_DAYS if retention_days is None else retention_days
+    if days < 0:
+        return {"success": False, "error": "retention_days must be >= 0"}
+
+    access_tracker.flush()
+    conn = get_connection()
+    try:
+        result = _compact(conn, days, full)
+        # Shrink the WAL too, so the reclaimed space shows on disk
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+
+    return {
+        "success": True,
+        "retention_days": days,
+        **result,
+        "message": f"Rolled up {result['rolled_up']} access events, reclaimed {result['reclaimed_bytes']} bytes"
+    }
+
+
+def scheduled_maintenance() -> None:
+    """
+    Periodic upkeep, run by the access-log flusher thread after each flush
+    (never on a borrower's connection release, so reads never pay for it).
+
+    Every MAINTENANCE_INTERVAL_SECONDS: a passive WAL checkpoint and
+    PRAGMA optimize, plus the access-log rollup and incremental vacuum
+    when a compaction is due.
+    """
+    global _last_maintenance
+    if time.monotonic() - _last_maintenance < MAINTENANCE_INTERVAL_SECONDS:
+        return
+    _last_maintenance = time.monotonic()
+    with connection() as conn:
+        conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        conn.execute('PRAGMA optimize')
+        if _compaction_due(conn):
+            _compact(conn, access_log.RETENTION_DAYS, full=False)
+
+
+class PooledConnection:
+    """
+    A connection borrowed from the per-thread pool.
+
+    Behaves like sqlite3.Connection; close() rolls back anything left
+    uncommitted and hands the connection back instead of closing it, so
+    existing `conn = get_connection() ... conn.close()` code borrows too.
+    """
+
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a returned connection.")
+        return getattr(self._conn, name)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._conn is not None:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        self.close()
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            _release(conn)
+
+    def __del__(self):
+        # A borrower that forgot close() still returns the connection
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class _IdleConnections(list):
+    """Per-thread idle list; closes its connections when the thread exits."""
+
+    def __del__(self):
+        for conn in self:
+            with _pool_lock:
+                _pool_all.discard(conn)
+                _pool_idle.discard(conn)
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _thread_pool() -> List[sqlite3.Connection]:
+    """Idle connections for this thread, reset if DB_PATH or the process changed."""
+    global _pool_key
+    key = (str(DB_PATH), os.getpid())
+    if _pool_key != key:
+        with _pool_lock:
+            if _pool_key != key:
+                if _pool_key is not None and _pool_key[1] == key[1]:
+                    close_pool()
+                else:
+                    # Forked: the parent's connections are not ours to close
+                    _pool_all.clear()
+                    _pool_idle.clear()
+                _pool_key = key
+    if getattr(_pool_local, 'key', None) != key:
+        _pool_local.key = key
+        _pool_local.idle = _IdleConnections()
+    return _pool_local.idle
+
+
+def _release(conn: sqlite3.Connection) -> None:
+    if conn.in_transaction:
+        conn.rollback()
+    idle = _thread_pool()
+    with _pool_lock:
+        if conn in _pool_all and len(idle) < POOL_SIZE_PER_THREAD:
+            idle.append(conn)
+            _pool_idle.add(conn)
+            return
+        # Pool full, or retired by close_pool() while it was borrowed
+        _pool_all.discard(conn)
+    conn.close()
+
+
+def close_pool() -> None:
+    """
+    Retire every pooled connection (all threads); the pool refills on demand.
+
+    Idle connections are closed here. Connections currently borrowed by
+    another thread are only detached from the pool, and close when their
+    borrower releases them.
+    """
+    with _pool_lock:
+        conns = list(_pool_idle & _pool_all)
+        _pool_all.clear()
+        _pool_idle.clear()
+    for i, conn in enumerate(conns):
+        try:
+            if i == 0:
+                # Recommended before closing: refresh planner stats if stale
+                conn.execute('PRAGMA optimize')
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _pool_local.idle = _IdleConnections()
+
+
+atexit.register(close_pool)
+
+# Write-behind access tracking; reads never write to SQLite themselves.
+# Registered after close_pool so the exit flush runs before the pool closes.
+access_tracker = access_log.AccessLogBuffer(lambda: get_connection(), maintenance=scheduled_maintenance)
+atexit.register(access_tracker.flush)
+
+
+def flush_access_log() -> int:
+    """Write buffered access events now; returns the number written."""
+    return access_tracker.flush()
+
+
 def init_db() -> None:
     """Initialize/upgrade schema once per process."""
     global _schema_initialized
@@ -135,6 +694,7 @@ def init_db() -> None:
     with _schema_lock:
         if _schema_initialized:
             return
+        _init_auto_vacuum()
         conn = _open_connection()
         try:
             cursor = conn.cursor()
@@ -153,7 +713,6 @@ def init_db() -> None:
                     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     last_accessed DATETIME,
                     access_count INTEGER DEFAULT 0,
-                    embedding BLOB,
                     embedding_model TEXT,
                     tags TEXT,
                     context TEXT,
@@ -190,13 +749,116 @@ def init_db() -> None:
                 )
             ''')
 
+            # Daily rollups of pruned access events (see access_log.rollup)
+            access_log.create_schema(cursor)
+
+            # Last run of scheduled maintenance tasks (compact)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_runs (
+                    task TEXT PRIMARY KEY,
+                    last_run DATETIME
+                )
+            ''')
+
+            # Progress of long-running embedding jobs (embed_worker.py)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS embedding_checkpoints (
+                    job TEXT PRIMARY KEY,
+                    model TEXT,
+                    last_id INTEGER DEFAULT 0,
+                    processed INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    total_tokens INTEGER DEFAULT 0,
+                    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    completed_at DATETIME
+                )
+            ''')
+
+            # Embeddings keyed by content, reused across entries, reindexes and queries
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    content_hash TEXT NOT NULL,
+                    embedding_model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    hit_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (content_hash, embedding_model, dimensions)
+                )
+            ''')
+
             # Indexes for performance
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_type ON memory_entries(type)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_source ON memory_entries(source)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_created ON memory_entries(created_at)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_active ON memory_entries(is_active)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_importance ON memory_entries(importance)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_logs_date ON daily_logs(date)')
+            # High-water marks for the session context cache (context_cache.db_marks)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_updated ON memory_entries(updated_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_logs_updated ON daily_logs(updated_at)')
+
+            # Composite/partial indexes matching the hot queries' filter + sort
+            # (is_active = 1, then ORDER BY importance DESC, created_at DESC);
+            # check_query_plans() verifies they are used
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_rank
+                ON memory_entries(importance DESC, created_at DESC) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_type_rank
+                ON memory_entries(type, importance DESC, created_at DESC) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_source_rank
+                ON memory_entries(source, importance DESC, created_at DESC) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_created
+                ON memory_entries(created_at) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_type_created
+                ON memory_entries(type, created_at) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_active_accessed
+                ON memory_entries(access_count DESC) WHERE is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_needs_embedding
+                ON memory_entries(importance DESC, created_at DESC)
+                WHERE embedding_model IS NULL AND is_active = 1
+            ''')
+            # Model probe and the search prefilter's eligible-id scan; covering
+            # (is_active is repeated as a column for the planner), so expiry is
+            # checked without touching table rows
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_embedded_expiry
+                ON memory_entries(embedding_model, expires_at, is_active)
+                WHERE embedding_model IS NOT NULL AND is_active = 1
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_memory_expiring
+                ON memory_entries(expires_at) WHERE expires_at IS NOT NULL AND is_active = 1
+            ''')
+            cursor.execute('DROP INDEX IF EXISTS idx_memory_embedded_model')
+            # Superseded by the partial indexes; a low-selectivity is_active
+            # index otherwise wins the planner's choice and forces a sort
+            cursor.execute('DROP INDEX IF EXISTS idx_memory_active')
+            cursor.execute('DROP INDEX IF EXISTS idx_memory_importance')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used)')
+
+            # Full-text mirror for ranked keyword search
+            _ensure_fts_schema(cursor)
+
+            # Normalized tag index; backfilled once from memory_entries.tags
+            _ensure_tags_schema(cursor)
+
+            # Inverted index for keyword search (see bm25_index.py); backfilled once
+            bm25_index.create_schema(cursor)
+            if not bm25_index.is_built(cursor):
+                bm25_index.rebuild(cursor)
 
             conn.commit()
             _schema_initialized = True
@@ -204,10 +866,38 @@ def init_db() -> None:
             conn.close()
 
 
-def get_connection() -> sqlite3.Connection:
-    """Get database connection (schema init is handled once by init_db())."""
+def get_connection() -> PooledConnection:
+    """
+    Borrow a database connection (schema init is handled once by init_db()).
+
+    Connections are cached per thread: close() returns it to the pool, and a
+    nested borrow in the same thread gets a separate connection so it never
+    shares another caller's open transaction.
+    """
     init_db()
-    return _open_connection()
+    idle = _thread_pool()
+    while idle:
+        conn = idle.pop()
+        with _pool_lock:
+            # Skip connections closed by close_pool() from another thread
+            if conn in _pool_all:
+                _pool_idle.discard(conn)
+                return PooledConnection(conn)
+    conn = _open_connection()
+    with _pool_lock:
+        _pool_all.add(conn)
+    return PooledConnection(conn)
+
+
+@contextmanager
+def connection() -> Iterator[PooledConnection]:
+    """
+    Borrow a connection for the duration of a with-block.
+
+    Commits on success, rolls back on error, then returns it to the pool.
+    """
+    with get_connection() as conn:
+        yield conn
 
 
 def row_to_dict(row) -> Optional[Dict]:
@@ -215,10 +905,10 @@ def row_to_dict(row) -> Optional[Dict]:
     if row is None:
         return None
     d = dict(row)
-    # Don't include raw embedding blob in output
-    if 'embedding' in d and d['embedding']:
+    # Vectors live in memory_embeddings; embedding_model marks the active one
+    d.pop('embedding', None)
+    if d.get('embedding_model'):
         d['has_embedding'] = True
-        del d['embedding']
     return d
 
 
@@ -227,6 +917,109 @@ def compute_content_hash(content: str) -> str:
     return hashlib.sha256(content.strip().lower().encode()).hexdigest()[:16]
 
 
+def normalize_tags(tags: Any) -> List[str]:
+    """Tags as a clean list: comma-separated strings split, whitespace stripped, blanks and repeats dropped."""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    result: List[str] = []
+    for tag in tags:
+        tag = str(tag).strip()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def _write_tags(cursor: sqlite3.Cursor, entry_id: int, tags: List[str]) -> None:
+    """Replace an entry's rows in memory_tags (caller commits)."""
+    cursor.execute('DELETE FROM memory_tags WHERE entry_id = ?', (entry_id,))
+    cursor.executemany(
+        'INSERT OR IGNORE INTO memory_tags (tag, entry_id, position) VALUES (?, ?, ?)',
+        [(tag, entry_id, position) for position, tag in enumerate(tags)]
+    )
+
+
+def _entry_tags_sql(count: int) -> str:
+    """Tags of `count` entry IDs, in entry and tag order."""
+    return (
+        f"SELECT entry_id, tag FROM memory_tags WHERE entry_id IN ({','.join('?' * count)}) "
+        'ORDER BY entry_id, position'
+    )
+
+
+def _tag_entries_sql(count: int) -> str:
+    """IDs of entries carrying any of `count` tags."""
+    return f"SELECT entry_id FROM memory_tags WHERE tag IN ({','.join('?' * count)})"
+
+
+def get_tags(cursor: sqlite3.Cursor, entry_ids: List[int]) -> Dict[int, List[str]]:
+    """
+    Tags of the given entries from memory_tags, in their original order.
+
+    Args:
+        cursor: Database cursor
+        entry_ids: Entry IDs (e.g. one page of search results)
+
+    Returns:
+        dict of entry_id -> tags (entries without tags are absent)
+    """
+    tags: Dict[int, List[str]] = {}
+    if not entry_ids:
+        return tags
+    cursor.execute(_entry_tags_sql(len(entry_ids)), list(entry_ids))
+    for entry_id, tag in cursor.fetchall():
+        tags.setdefault(entry_id, []).append(tag)
+    return tags
+
+
+def tag_condition(tags: Any, column: str = 'id') -> Tuple[str, List[str]]:
+    """
+    SQL condition matching entries that carry any of the given tags.
+
+    Args:
+        tags: Tag or list of tags (comma-separated string accepted)
+        column: memory_entries id column to test (e.g. 'e.id')
+
+    Returns:
+        (condition, parameters)
+    """
+    tags = normalize_tags(tags)
+    return f'{column} IN ({_tag_entries_sql(len(tags))})', tags
+
+
+def rebuild_tag_index(cursor: Optional[sqlite3.Cursor] = None) -> Dict[str, Any]:
+    """
+    Rebuild memory_tags from the JSON tags column.
+
+    Needed only if memory_entries.tags was edited outside this module.
+
+    Args:
+        cursor: Cursor to run in (caller commits); opens and commits its own connection if omitted
+
+    Returns:
+        dict with entries and tag rows indexed
+    """
+    if cursor is None:
+        with connection() as conn:
+            return rebuild_tag_index(conn.cursor())
+
+    cursor.execute('DELETE FROM memory_tags')
+    cursor.execute("SELECT id, tags FROM memory_entries WHERE tags IS NOT NULL AND tags != ''")
+    rows: List[Tuple[str, int, int]] = []
+    entries = 0
+    for entry_id, tags_json in cursor.fetchall():
+        try:
+            tags = normalize_tags(json.loads(tags_json))
+        except (ValueError, TypeError):
+            continue
+        if tags:
+            entries += 1
+            rows.extend((tag, entry_id, position) for position, tag in enumerate(tags))
+    cursor.executemany('INSERT OR IGNORE INTO memory_tags (tag, entry_id, position) VALUES (?, ?, ?)', rows)
+    return {"success": True, "entries": entries, "tags": len(rows), "message": f"Indexed {len(rows)} tags on {entries} entries"}
+
+
 def add_entry(
     content: str,
     entry_type: str = 'fact',
@@ -276,6 +1069,7 @@ def add_entry(
                 "existing_content": existing['content']
             }
 
+        tags = normalize_tags(tags)
         tags_json = json.dumps(tags) if tags else None
 
         cursor.execute('''
@@ -285,6 +1079,8 @@ def add_entry(
         ''', (entry_type, content, content_hash, source, confidence, importance, tags_json, context, expires_at))
 
         entry_id = cursor.lastrowid
+        _write_tags(cursor, entry_id, tags)
+        bm25_index.index_document(cursor, entry_id, content)
         conn.commit()
 
         # Fetch the created entry
@@ -295,6 +1091,288 @@ def add_entry(
         conn.close()
 
 
+def _validate_bulk_row(data: Any) -> Tuple[Optional[tuple], Optional[str]]:
+    """Check one bulk row; returns (insert params, None) or (None, error)."""
+    if isinstance(data, Exception):
+        return None, str(data)
+    if not isinstance(data, dict):
+        return None, "Row must be an object"
+
+    content = data.get('content')
+    if not isinstance(content, str) or not content.strip():
+        return None, "content is required"
+
+    entry_type = data.get('type', 'fact')
+    if entry_type not in VALID_TYPES:
+        return None, f"Invalid type. Must be one of: {VALID_TYPES}"
+
+    source = data.get('source', 'session')
+    if source not in VALID_SOURCES:
+        return None, f"Invalid source. Must be one of: {VALID_SOURCES}"
+
+    importance = data.get('importance', 5)
+    confidence = data.get('confidence', 1.0)
+    # JSON true/false would pass int()/float() as 1/0; 7.9 would truncate to 7
+    if isinstance(importance, bool) or (isinstance(importance, float) and not importance.is_integer()):
+        return None, "importance must be an integer"
+    if isinstance(confidence, bool):
+        return None, "confidence must be a number"
+    try:
+        importance = int(importance)
+        confidence = float(confidence)
+    except (TypeError, ValueError):
+        return None, "importance and confidence must be numbers"
+    if not 1 <= importance <= 10:
+        return None, "importance must be between 1 and 10"
+
+    tags = normalize_tags(data.get('tags'))
+    tags_json = json.dumps(tags) if tags else None
+
+    return (
+        entry_type, content, compute_content_hash(content), source, confidence,
+        importance, tags_json, data.get('context'), data.get('expires_at')
+    ), None
+
+
+def _insert_bulk_batch(
+    conn: sqlite3.Connection,
+    batch: List[Tuple[int, Any]],
+    key: str
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Insert one batch in a single transaction; returns (outcomes in input order, inserted outcomes with content)."""
+    cursor = conn.cursor()
+    outcomes: List[Dict[str, Any]] = []
+    inserted: List[Dict[str, Any]] = []
+    rows: List[tuple] = []
+    first_in_batch: Dict[str, Dict[str, Any]] = {}
+
+    for number, data in batch:
+        row, error = _validate_bulk_row(data)
+        if error:
+            outcomes.append({key: number, "status": "invalid", "error": error})
+            continue
+        content_hash = row[2]
+        if content_hash in first_in_batch:
+            outcomes.append({key: number, "status": "duplicate", "duplicate_of": first_in_batch[content_hash]})
+            continue
+        outcome = {key: number, "status": "inserted", "hash": content_hash}
+        first_in_batch[content_hash] = outcome
+        outcomes.append(outcome)
+        rows.append(row)
+
+    if rows:
+        hashes = [row[2] for row in rows]
+        placeholders = ','.join('?' * len(hashes))
+        try:
+            # One dedupe query against existing entries for the whole batch
+            cursor.execute(f'SELECT id, content_hash FROM memory_entries WHERE content_hash IN ({placeholders})', hashes)
+            existing = {r['content_hash']: r['id'] for r in cursor.fetchall()}
+            new_rows = [row for row in rows if row[2] not in existing]
+
+            cursor.executemany('''
+                INSERT INTO memory_entries
+                (type, content, content_hash, source, confidence, importance, tags, context, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', new_rows)
+
+            new_hashes = [row[2] for row in new_rows]
+            created: Dict[str, int] = {}
+            if new_hashes:
+                cursor.execute(
+                    f'SELECT id, content_hash FROM memory_entries WHERE content_hash IN ({",".join("?" * len(new_hashes))})',
+                    new_hashes
+                )
+                created = {r['content_hash']: r['id'] for r in cursor.fetchall()}
+                for row in new_rows:
+                    if row[6]:
+                        _write_tags(cursor, created[row[2]], json.loads(row[6]))
+                    bm25_index.index_document(cursor, created[row[2]], row[1])
+                    inserted.append({"outcome": first_in_batch[row[2]], "content": row[1]})
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            for outcome in first_in_batch.values():
+                outcome.update({"status": "failed", "error": str(e)})
+            existing, created, inserted = {}, {}, []
+
+        for content_hash, outcome in first_in_batch.items():
+            if content_hash in existing:
+                outcome.update({"status": "duplicate", "existing_id": existing[content_hash]})
+            elif content_hash in created:
+                outcome["id"] = created[content_hash]
+
+    for outcome in outcomes:
+        outcome.pop("hash", None)
+        duplicate_of = outcome.pop("duplicate_of", None)
+        if duplicate_of is not None:
+            outcome["existing_id"] = duplicate_of.get("id", duplicate_of.get("existing_id"))
+    return outcomes, inserted
+
+
+def _bulk_ingest(
+    numbered: Iterable[Tuple[int, Any]],
+    key: str,
+    batch_size: int,
+    embed: bool,
+    client,
+    on_row: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Insert (and optionally embed) rows batch by batch.
+
+    Every row's outcome is passed to on_row as soon as its batch is done;
+    the returned result keeps only counts and the invalid/failed rows (up to
+    BULK_MAX_REPORTED_ROWS), so memory stays bounded by the batch size
+    however long the input is. With embed, each batch's inserted entries are
+    embedded right after its commit, so exactly the imported rows are
+    embedded, and their outcomes carry "embedded" (plus "embedding_error").
+    """
+    counts = {status: 0 for status in ("inserted", "duplicate", "invalid", "failed")}
+    problems: List[Dict[str, Any]] = []
+    embedding = None
+    embed_batch = None
+
+    if embed:
+        # Imported lazily because embed_memory imports this module
+        import embed_memory
+        embedding = {"success": True, "processed": 0, "failed": 0, "total_tokens": 0,
+                     "requests": 0, "cache_hits": 0, "failures": []}
+        error = embed_memory.provider_error()
+        if client is None and not error:
+            try:
+                client = embed_memory.get_embedding_client()
+            except ValueError as e:
+                error = str(e)
+        if error:
+            embedding.update({"success": False, "error": error})
+        else:
+            def embed_batch(inserted: List[Dict[str, Any]]) -> None:
+                outcomes = {item["outcome"]["id"]: item["outcome"] for item in inserted}
+                batch_result = embed_memory.embed_entries(
+                    [{"id": item["outcome"]["id"], "content": item["content"]} for item in inserted], client
+                )
+                for field in ("processed", "failed", "total_tokens", "requests", "cache_hits"):
+                    embedding[field] += batch_result.get(field, 0)
+                for result in batch_result.get("entries", []):
+                    outcome = outcomes.get(result["id"])
+                    if outcome is not None:
+                        outcome["embedded"] = result["success"]
+                        if not result["success"]:
+                            outcome["embedding_error"] = result["error"]
+                    if not result["success"] and len(embedding["failures"]) < BULK_MAX_REPORTED_ROWS:
+                        embedding["failures"].append(result)
+
+    def flush(batch: List[Tuple[int, Any]]) -> None:
+        outcomes, inserted = _insert_bulk_batch(conn, batch, key)
+        if embed_batch and inserted:
+            embed_batch(inserted)
+        for outcome in outcomes:
+            counts[outcome["status"]] += 1
+            if outcome["status"] in ("invalid", "failed") and len(problems) < BULK_MAX_REPORTED_ROWS:
+                problems.append(outcome)
+            if on_row is not None:
+                on_row(outcome)
+
+    conn = get_connection()
+    try:
+        batch: List[Tuple[int, Any]] = []
+        for item in numbered:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        conn.close()
+
+    unreported = counts["invalid"] + counts["failed"] - len(problems)
+    result = {
+        "success": counts["failed"] == 0,
+        **counts,
+        "results": problems,
+        "message": (f"Imported {counts['inserted']} entries "
+                    f"({counts['duplicate']} duplicates, {counts['invalid']} invalid, {counts['failed']} failed)")
+    }
+    if unreported:
+        result["results_truncated"] = unreported
+
+    if embedding is not None:
+        if embedding["failed"]:
+            embedding["success"] = False
+            embedding.setdefault("error", f"{embedding['failed']} imported entries failed to embed")
+        result["embedding"] = embedding
+    if counts["failed"]:
+        result["error"] = f"{counts['failed']} rows failed to insert"
+    return result
+
+
+def add_entries_bulk(
+    entries: Iterable[Dict[str, Any]],
+    batch_size: int = BULK_BATCH_SIZE,
+    embed: bool = False,
+    client=None,
+    on_row: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Add many memory entries, one transaction per batch.
+
+    Rows are deduplicated within each batch and against existing content
+    hashes with one query per batch, then inserted with executemany.
+
+    Args:
+        entries: Iterable of dicts with add_entry fields (content, type,
+            source, confidence, importance, tags, context, expires_at)
+        batch_size: Rows per transaction
+        embed: Embed the inserted entries batch by batch (embed_memory.embed_entries)
+        client: Optional OpenAI client for embedding
+        on_row: Called with every row's outcome ({"index", "status": inserted|
+            duplicate|invalid|failed, "id"/"existing_id"/"error"}) in input order
+
+    Returns:
+        dict with counts and the invalid/failed rows keyed by input index
+    """
+    return _bulk_ingest(enumerate(entries), "index", batch_size, embed, client, on_row)
+
+
+def import_entries_file(
+    path: str,
+    batch_size: int = BULK_BATCH_SIZE,
+    embed: bool = False,
+    client=None,
+    on_row: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Stream a JSONL file of entries into add_entries_bulk.
+
+    Args:
+        path: JSONL file, one entry object per line (blank lines skipped)
+        batch_size: Rows per transaction
+        embed: Embed the inserted entries batch by batch
+        client: Optional OpenAI client for embedding
+        on_row: Called with every line's outcome (keyed by "line", see
+            add_entries_bulk)
+
+    Returns:
+        dict with counts and the invalid/failed rows keyed by line number
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        return {"success": False, "error": f"File not found: {path}"}
+
+    def numbered_rows():
+        with open(file_path, encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, ValueError(f"Invalid JSON: {e.msg}")
+
+    return _bulk_ingest(numbered_rows(), "line", batch_size, embed, client, on_row)
+
+
 def _fetch_entry(cursor: sqlite3.Cursor, entry_id: int) -> Dict[str, Any]:
     cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
     entry = row_to_dict(cursor.fetchone())
@@ -322,24 +1400,57 @@ def get_entry(entry_id: int) -> Dict[str, Any]:
         if not result.get("success"):
             return result
         entry = result["entry"]
+    finally:
+        conn.close()
 
-        # Update access tracking
-        cursor.execute('''
-            UPDATE memory_entries
-            SET last_accessed = CURRENT_TIMESTAMP, access_count = access_count + 1
-            WHERE id = ?
-        ''', (entry_id,))
+    # Access count / last_accessed are updated when the buffer flushes
+    access_tracker.record(entry_id, 'read')
+    return {"success": True, "entry": entry}
 
-        # Log access
-        cursor.execute(
-            'INSERT INTO memory_access_log (memory_id, access_type) VALUES (?, ?)',
-            (entry_id, 'read')
-        )
 
-        conn.commit()
-        return {"success": True, "entry": entry}
-    finally:
-        conn.close()
+def _list_entries_query(
+    entry_type: Optional[str] = None,
+    source: Optional[str] = None,
+    active_only: bool = True,
+    min_importance: int = 1,
+    tag: Optional[Any] = None
+) -> Tuple[str, str, List[Any]]:
+    """
+    SQL for list_entries (also checked through HOT_QUERIES).
+
+    Returns:
+        (page SQL taking LIMIT/OFFSET after the parameters, count SQL, parameters)
+    """
+    conditions = []
+    params: List[Any] = []
+
+    if entry_type:
+        conditions.append('type = ?')
+        params.append(entry_type)
+
+    if source:
+        conditions.append('source = ?')
+        params.append(source)
+
+    if normalize_tags(tag):
+        condition, tag_params = tag_condition(tag)
+        conditions.append(condition)
+        params.extend(tag_params)
+
+    if active_only:
+        conditions.append('is_active = 1')
+        conditions.append(NOT_EXPIRED.format(alias=''))
+
+    conditions.append('importance >= ?')
+    params.append(min_importance)
+
+    where_clause = ' AND '.join(conditions)
+    return (
+        f'SELECT * FROM memory_entries WHERE {where_clause} '
+        'ORDER BY importance DESC, created_at DESC LIMIT ? OFFSET ?',
+        f'SELECT COUNT(*) as count FROM memory_entries WHERE {where_clause}',
+        params
+    )
 
 
 def list_entries(
@@ -348,7 +1459,8 @@ def list_entries(
     active_only: bool = True,
     limit: int = 100,
     offset: int = 0,
-    min_importance: int = 1
+    min_importance: int = 1,
+    tag: Optional[Any] = None
 ) -> Dict[str, Any]:
     """
     List memory entries with optional filters.
@@ -360,61 +1472,119 @@ def list_entries(
         limit: Max results
         offset: Pagination offset
         min_importance: Minimum importance level
+        tag: Only entries carrying this tag (or any of a list of tags)
 
     Returns:
         dict with entries array
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    if entry_type and entry_type not in VALID_TYPES:
+        return {"success": False, "error": f"Invalid type. Must be one of: {VALID_TYPES}"}
+    if source and source not in VALID_SOURCES:
+        return {"success": False, "error": f"Invalid source. Must be one of: {VALID_SOURCES}"}
 
-    conditions = []
-    params = []
+    page_sql, count_sql, params = _list_entries_query(entry_type, source, active_only, min_importance, tag)
 
-    if entry_type:
-        if entry_type not in VALID_TYPES:
-            conn.close()
-            return {"success": False, "error": f"Invalid type. Must be one of: {VALID_TYPES}"}
-        conditions.append('type = ?')
-        params.append(entry_type)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(page_sql, params + [limit, offset])
+        entries = [row_to_dict(row) for row in cursor.fetchall()]
 
-    if source:
-        if source not in VALID_SOURCES:
-            conn.close()
-            return {"success": False, "error": f"Invalid source. Must be one of: {VALID_SOURCES}"}
-        conditions.append('source = ?')
-        params.append(source)
+        # Get total count
+        cursor.execute(count_sql, params)
+        total = cursor.fetchone()['count']
 
-    if active_only:
-        conditions.append('is_active = 1')
-        conditions.append('(expires_at IS NULL OR expires_at > datetime("now"))')
+    return {"success": True, "entries": entries, "total": total, "limit": limit, "offset": offset}
+
+
+def build_fts_query(query: str, operator: str = 'AND') -> str:
+    """
+    Translate free text into an FTS5 MATCH expression.
+
+    "Quoted text" becomes a phrase query and a trailing * keeps prefix
+    matching; every term is quoted so FTS5 syntax in user text is literal.
+
+    Args:
+        query: User search text
+        operator: How terms are combined ('AND' or 'OR')
 
-    conditions.append('importance >= ?')
-    params.append(min_importance)
+    Returns:
+        MATCH expression, or '' if the query has no searchable terms
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        tokens = re.findall(r'\w+', phrase or word)
+        if not tokens:
+            continue
+        term = '"' + ' '.join(tokens) + '"'
+        if word.endswith('*'):
+            term += '*'
+        terms.append(term)
+    return f' {operator} '.join(terms)
+
+
+def fts_search(
+    query: str,
+    entry_type: Optional[str] = None,
+    limit: int = 20,
+    operator: str = 'AND',
+    tag: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Ranked keyword search over content, tags and context using FTS5.
 
-    where_clause = ' AND '.join(conditions) if conditions else '1=1'
+    Args:
+        query: Search query (supports "phrases" and prefix*)
+        entry_type: Optional type filter
+        limit: Max results
+        operator: How terms are combined ('AND' or 'OR')
+        tag: Only entries carrying this tag (or any of a list of tags)
 
-    cursor.execute(f'''
-        SELECT * FROM memory_entries
-        WHERE {where_clause}
-        ORDER BY importance DESC, created_at DESC
-        LIMIT ? OFFSET ?
-    ''', params + [limit, offset])
+    Returns:
+        dict with matching entries, best first; each carries fts_score
+        (negated SQLite bm25(), higher is better)
+    """
+    init_db()
+    if not _fts_available:
+        return {"success": False, "error": "FTS5 is not available in this SQLite build"}
 
-    entries = [row_to_dict(row) for row in cursor.fetchall()]
+    match = build_fts_query(query, operator)
+    if not match:
+        return {"success": True, "entries": [], "query": query, "count": 0}
 
-    # Get total count
-    cursor.execute(f'SELECT COUNT(*) as count FROM memory_entries WHERE {where_clause}', params)
-    total = cursor.fetchone()['count']
+    conditions = ['memory_fts MATCH ?', 'e.is_active = 1']
+    params: List[Any] = [match]
+    if entry_type:
+        conditions.append('e.type = ?')
+        params.append(entry_type)
+    if normalize_tags(tag):
+        condition, tag_params = tag_condition(tag, column='e.id')
+        conditions.append(condition)
+        params.extend(tag_params)
+    params.append(limit)
 
-    conn.close()
+    with connection() as conn:
+        try:
+            cursor = conn.execute(f'''
+                SELECT e.*, -bm25(memory_fts) AS fts_score
+                FROM memory_fts
+                JOIN memory_entries e ON e.id = memory_fts.rowid
+                WHERE {' AND '.join(conditions)}
+                ORDER BY bm25(memory_fts)
+                LIMIT ?
+            ''', params)
+            entries = [row_to_dict(row) for row in cursor.fetchall()]
+        except sqlite3.OperationalError as e:
+            return {"success": False, "error": f"FTS query failed: {e}"}
 
-    return {"success": True, "entries": entries, "total": total, "limit": limit, "offset": offset}
+    return {"success": True, "entries": entries, "query": query, "count": len(entries)}
 
 
 def search_entries(
     query: str,
     entry_type: Optional[str] = None,
-    limit: int = 20
+    limit: int = 20,
+    mode: str = 'like',
+    tag: Optional[Any] = None
 ) -> Dict[str, Any]:
     """
     Search memory entries by text (basic full-text search).
@@ -424,48 +1594,78 @@ def search_entries(
         query: Search query
         entry_type: Optional type filter
         limit: Max results
+        mode: 'like' for a substring scan ordered by importance, or 'fts'
+            for FTS5 MATCH ranked by bm25() (supports "phrases" and prefix*)
+        tag: Only entries carrying this tag (or any of a list of tags);
+            resolved through the memory_tags index
 
     Returns:
         dict with matching entries
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    if mode not in SEARCH_MODES:
+        return {"success": False, "error": f"Invalid mode. Must be one of: {SEARCH_MODES}"}
 
-    # Escape wildcard chars so query is treated as literal text.
-    escaped_query = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
-    search_pattern = f'%{escaped_query}%'
-
-    if entry_type:
-        cursor.execute('''
-            SELECT * FROM memory_entries
-            WHERE is_active = 1
-            AND type = ?
-            AND (content LIKE ? ESCAPE '\' OR tags LIKE ? ESCAPE '\' OR context LIKE ? ESCAPE '\')
-            ORDER BY importance DESC, created_at DESC
-            LIMIT ?
-        ''', (entry_type, search_pattern, search_pattern, search_pattern, limit))
+    if mode == 'fts':
+        result = fts_search(query, entry_type=entry_type, limit=limit, tag=tag)
+        if not result.get("success"):
+            return result
+        entries = result["entries"]
     else:
-        cursor.execute('''
-            SELECT * FROM memory_entries
-            WHERE is_active = 1
-            AND (content LIKE ? ESCAPE '\' OR tags LIKE ? ESCAPE '\' OR context LIKE ? ESCAPE '\')
-            ORDER BY importance DESC, created_at DESC
-            LIMIT ?
-        ''', (search_pattern, search_pattern, search_pattern, limit))
+        # Escape wildcard chars so query is treated as literal text.
+        escaped_query = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        search_pattern = f'%{escaped_query}%'
+
+        conditions = ['is_active = 1']
+        params: List[Any] = []
+        if entry_type:
+            conditions.append('type = ?')
+            params.append(entry_type)
+        if normalize_tags(tag):
+            condition, tag_params = tag_condition(tag)
+            conditions.append(condition)
+            params.extend(tag_params)
+        conditions.append("(content LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\' OR context LIKE ? ESCAPE '\\')")
+        params.extend([search_pattern, search_pattern, search_pattern])
+
+        with connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT * FROM memory_entries
+                WHERE {' AND '.join(conditions)}
+                ORDER BY importance DESC, created_at DESC
+                LIMIT ?
+            ''', params + [limit])
+            entries = [row_to_dict(row) for row in cursor.fetchall()]
+
+    access_tracker.record_many([entry['id'] for entry in entries], 'search', query)
 
-    entries = [row_to_dict(row) for row in cursor.fetchall()]
+    return {"success": True, "entries": entries, "query": query, "count": len(entries)}
 
-    # Log search
-    for entry in entries:
-        cursor.execute(
-            'INSERT INTO memory_access_log (memory_id, access_type, query) VALUES (?, ?, ?)',
-            (entry['id'], 'search', query)
-        )
 
-    conn.commit()
-    conn.close()
+def list_tags(limit: int = 100) -> Dict[str, Any]:
+    """
+    Tags in use by active entries, most used first.
 
-    return {"success": True, "entries": entries, "query": query, "count": len(entries)}
+    Args:
+        limit: Max tags
+
+    Returns:
+        dict with tags array of {tag, count}
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT t.tag, COUNT(*) AS count
+            FROM memory_tags t
+            JOIN memory_entries e ON e.id = t.entry_id AND e.is_active = 1
+            GROUP BY t.tag
+            ORDER BY count DESC, t.tag
+            LIMIT ?
+        ''', (limit,))
+        tags = [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    return {"success": True, "tags": tags, "count": len(tags)}
 
 
 def update_entry(entry_id: int, **kwargs) -> Dict[str, Any]:
@@ -481,56 +1681,53 @@ def update_entry(entry_id: int, **kwargs) -> Dict[str, Any]:
     """
     allowed_fields = ['content', 'type', 'source', 'confidence', 'importance', 'tags', 'context', 'expires_at', 'is_active']
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return {"success": False, "error": f"Memory entry {entry_id} not found"}
-
-    updates = []
-    values = []
-
-    for field, value in kwargs.items():
-        if field in allowed_fields:
-            if field == 'type' and value not in VALID_TYPES:
-                conn.close()
-                return {"success": False, "error": f"Invalid type. Must be one of: {VALID_TYPES}"}
-            if field == 'source' and value not in VALID_SOURCES:
-                conn.close()
-                return {"success": False, "error": f"Invalid source. Must be one of: {VALID_SOURCES}"}
-            if field == 'tags' and isinstance(value, list):
-                value = json.dumps(value)
-            if field == 'content':
-                # Update content hash too
-                updates.append('content_hash = ?')
-                values.append(compute_content_hash(value))
-            updates.append(f'{field} = ?')
-            values.append(value)
-
-    if not updates:
-        conn.close()
-        return {"success": False, "error": "No valid fields to update"}
-
-    updates.append('updated_at = CURRENT_TIMESTAMP')
-    values.append(entry_id)
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(f'UPDATE memory_entries SET {", ".join(updates)} WHERE id = ?', values)
-    conn.commit()
+        cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
+        if not cursor.fetchone():
+            return {"success": False, "error": f"Memory entry {entry_id} not found"}
+
+        updates = []
+        values = []
+
+        for field, value in kwargs.items():
+            if field in allowed_fields:
+                if field == 'type' and value not in VALID_TYPES:
+                    return {"success": False, "error": f"Invalid type. Must be one of: {VALID_TYPES}"}
+                if field == 'source' and value not in VALID_SOURCES:
+                    return {"success": False, "error": f"Invalid source. Must be one of: {VALID_SOURCES}"}
+                if field == 'tags':
+                    tags = normalize_tags(value)
+                    value = json.dumps(tags) if tags else None
+                if field == 'content':
+                    # Update content hash too
+                    updates.append('content_hash = ?')
+                    values.append(compute_content_hash(value))
+                updates.append(f'{field} = ?')
+                values.append(value)
+
+        if not updates:
+            return {"success": False, "error": "No valid fields to update"}
+
+        updates.append('updated_at = CURRENT_TIMESTAMP')
+        values.append(entry_id)
+
+        cursor.execute(f'UPDATE memory_entries SET {", ".join(updates)} WHERE id = ?', values)
+        if 'tags' in kwargs:
+            _write_tags(cursor, entry_id, tags)
+        if 'content' in kwargs or 'is_active' in kwargs:
+            _sync_bm25_index(cursor, entry_id)
+        conn.commit()
 
-    # Log update
-    cursor.execute(
-        'INSERT INTO memory_access_log (memory_id, access_type) VALUES (?, ?)',
-        (entry_id, 'update')
-    )
-    conn.commit()
+        if 'is_active' in kwargs:
+            _sync_ann_tombstone(entry_id, deleted=not kwargs['is_active'])
 
-    # Fetch updated entry
-    cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
-    entry = row_to_dict(cursor.fetchone())
+        access_tracker.record(entry_id, 'update')
 
-    conn.close()
+        # Fetch updated entry
+        cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
+        entry = row_to_dict(cursor.fetchone())
 
     return {"success": True, "entry": entry, "message": f"Memory entry {entry_id} updated"}
 
@@ -546,104 +1743,94 @@ def delete_entry(entry_id: int, soft_delete: bool = True) -> Dict[str, Any]:
     Returns:
         dict with success status
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return {"success": False, "error": f"Memory entry {entry_id} not found"}
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    if soft_delete:
-        cursor.execute('UPDATE memory_entries SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (entry_id,))
-        message = f"Memory entry {entry_id} marked as inactive"
-    else:
-        cursor.execute('DELETE FROM memory_access_log WHERE memory_id = ?', (entry_id,))
-        cursor.execute('DELETE FROM memory_entries WHERE id = ?', (entry_id,))
-        message = f"Memory entry {entry_id} permanently deleted"
+        cursor.execute('SELECT * FROM memory_entries WHERE id = ?', (entry_id,))
+        if not cursor.fetchone():
+            return {"success": False, "error": f"Memory entry {entry_id} not found"}
 
-    conn.commit()
-    conn.close()
+        if soft_delete:
+            cursor.execute('UPDATE memory_entries SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (entry_id,))
+            message = f"Memory entry {entry_id} marked as inactive"
+        else:
+            # Settle buffered events first so none are written after the delete
+            access_tracker.flush()
+            cursor.execute('DELETE FROM memory_access_log WHERE memory_id = ?', (entry_id,))
+            cursor.execute('DELETE FROM memory_access_daily WHERE memory_id = ?', (entry_id,))
+            cursor.execute('DELETE FROM memory_embeddings WHERE entry_id = ?', (entry_id,))
+            cursor.execute('DELETE FROM memory_tags WHERE entry_id = ?', (entry_id,))
+            cursor.execute('DELETE FROM memory_entries WHERE id = ?', (entry_id,))
+            message = f"Memory entry {entry_id} permanently deleted"
+
+        bm25_index.remove_document(cursor, entry_id)
+
+    _sync_ann_tombstone(entry_id, deleted=True)
+    if not soft_delete:
+        # A hard delete need not move the updated_at / id high-water marks
+        _invalidate_context_cache()
 
     return {"success": True, "message": message}
 
 
+def _recent_query(cutoff: str, entry_type: Optional[str] = None) -> Tuple[str, tuple]:
+    """SQL and parameters for get_recent (also checked through HOT_QUERIES)."""
+    if entry_type:
+        return (
+            'SELECT * FROM memory_entries WHERE is_active = 1 AND type = ? AND created_at >= ? '
+            'ORDER BY created_at DESC', (entry_type, cutoff)
+        )
+    return 'SELECT * FROM memory_entries WHERE is_active = 1 AND created_at >= ? ORDER BY created_at DESC', (cutoff,)
+
+
 def get_recent(hours: int = 24, entry_type: Optional[str] = None) -> Dict[str, Any]:
     """Get memory entries from the last N hours."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cutoff = datetime.now() - timedelta(hours=hours)
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    if entry_type:
-        cursor.execute('''
-            SELECT * FROM memory_entries
-            WHERE is_active = 1 AND type = ? AND created_at >= ?
-            ORDER BY created_at DESC
-        ''', (entry_type, cutoff.isoformat()))
-    else:
-        cursor.execute('''
-            SELECT * FROM memory_entries
-            WHERE is_active = 1 AND created_at >= ?
-            ORDER BY created_at DESC
-        ''', (cutoff.isoformat(),))
+        cutoff = datetime.now() - timedelta(hours=hours)
 
-    entries = [row_to_dict(row) for row in cursor.fetchall()]
+        cursor.execute(*_recent_query(cutoff.isoformat(), entry_type))
 
-    conn.close()
+        entries = [row_to_dict(row) for row in cursor.fetchall()]
 
     return {"success": True, "entries": entries, "count": len(entries), "hours": hours}
 
 
 def get_stats() -> Dict[str, Any]:
     """Get memory statistics."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    # Include buffered accesses in most_accessed
+    access_tracker.flush()
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    # Count by type
-    cursor.execute('''
-        SELECT type, COUNT(*) as count
-        FROM memory_entries
-        WHERE is_active = 1
-        GROUP BY type
-    ''')
-    by_type = {row['type']: row['count'] for row in cursor.fetchall()}
+        # Count by type
+        cursor.execute(STATS_BY_TYPE_SQL)
+        by_type = {row['type']: row['count'] for row in cursor.fetchall()}
 
-    # Count by source
-    cursor.execute('''
-        SELECT source, COUNT(*) as count
-        FROM memory_entries
-        WHERE is_active = 1
-        GROUP BY source
-    ''')
-    by_source = {row['source']: row['count'] for row in cursor.fetchall()}
+        # Count by source
+        cursor.execute(STATS_BY_SOURCE_SQL)
+        by_source = {row['source']: row['count'] for row in cursor.fetchall()}
 
-    # Total counts
-    cursor.execute('SELECT COUNT(*) as total FROM memory_entries WHERE is_active = 1')
-    total_active = cursor.fetchone()['total']
+        # Total counts (active entries are already counted by type)
+        total_active = sum(by_type.values())
 
-    cursor.execute('SELECT COUNT(*) as total FROM memory_entries WHERE is_active = 0')
-    total_inactive = cursor.fetchone()['total']
+        cursor.execute(STATS_TOTAL_SQL)
+        total_inactive = cursor.fetchone()['total'] - total_active
 
-    # Entries with embeddings
-    cursor.execute('SELECT COUNT(*) as count FROM memory_entries WHERE embedding IS NOT NULL AND is_active = 1')
-    with_embeddings = cursor.fetchone()['count']
+        # Entries with embeddings
+        cursor.execute(STATS_WITH_EMBEDDINGS_SQL)
+        with_embeddings = cursor.fetchone()['count']
 
-    # Most accessed
-    cursor.execute('''
-        SELECT id, content, access_count
-        FROM memory_entries
-        WHERE is_active = 1
-        ORDER BY access_count DESC
-        LIMIT 5
-    ''')
-    most_accessed = [row_to_dict(row) for row in cursor.fetchall()]
+        # Most accessed
+        cursor.execute(STATS_MOST_ACCESSED_SQL)
+        most_accessed = [row_to_dict(row) for row in cursor.fetchall()]
 
-    # Daily log count
-    cursor.execute('SELECT COUNT(*) as count FROM daily_logs')
-    daily_log_count = cursor.fetchone()['count']
+        # Daily log count
+        cursor.execute('SELECT COUNT(*) as count FROM daily_logs')
+        daily_log_count = cursor.fetchone()['count']
 
-    conn.close()
+        journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
 
     return {
         "success": True,
@@ -654,11 +1841,98 @@ def get_stats() -> Dict[str, Any]:
             "by_source": by_source,
             "with_embeddings": with_embeddings,
             "daily_logs": daily_log_count,
-            "most_accessed": most_accessed
+            "most_accessed": most_accessed,
+            "storage": {"profile": STORAGE_PROFILE, "journal_mode": journal_mode},
+            "access_log": access_tracker.stats()
         }
     }
 
 
+# Hot read queries as issued by list_entries, get_recent, get_stats,
+# get_entries_without_embeddings, search and the session context cache, with
+# representative parameters and the index each one must use. The SQL comes
+# from the same constants/builders the callers use; check_query_plans() fails
+# if any table step in a plan uses another index (or none), or sorts/groups
+# through a temp B-tree. The get_stats aggregates are full passes by nature;
+# their expected index pins them to a small partial/covering index instead
+# of the table, and stats_total (COUNT(*), which SQLite serves from whichever
+# index is smallest) accepts any covering index.
+ANY_COVERING_INDEX = 'COVERING INDEX'
+_LIST_ALL = _list_entries_query()
+_LIST_BY_TYPE = _list_entries_query(entry_type='fact')
+_LIST_BY_SOURCE = _list_entries_query(source='user')
+HOT_QUERIES: Dict[str, Tuple[str, tuple, str]] = {
+    'list_entries': (_LIST_ALL[0], (*_LIST_ALL[2], 100, 0), 'idx_memory_active_rank'),
+    'list_entries_by_type': (_LIST_BY_TYPE[0], (*_LIST_BY_TYPE[2], 100, 0), 'idx_memory_active_type_rank'),
+    'list_entries_by_source': (_LIST_BY_SOURCE[0], (*_LIST_BY_SOURCE[2], 100, 0), 'idx_memory_active_source_rank'),
+    'list_entries_count': (_LIST_ALL[1], tuple(_LIST_ALL[2]), 'idx_memory_active_rank'),
+    'get_recent': (*_recent_query('1970-01-01'), 'idx_memory_active_created'),
+    'get_recent_by_type': (*_recent_query('1970-01-01', 'fact'), 'idx_memory_active_type_created'),
+    'entries_without_embeddings': (NEEDS_EMBEDDING_SQL, (50,), 'idx_memory_needs_embedding'),
+    'stats_by_type': (STATS_BY_TYPE_SQL, (), 'idx_memory_active_type_created'),
+    'stats_by_source': (STATS_BY_SOURCE_SQL, (), 'idx_memory_active_source_rank'),
+    'stats_total': (STATS_TOTAL_SQL, (), ANY_COVERING_INDEX),
+    'stats_with_embeddings': (STATS_WITH_EMBEDDINGS_SQL, (), 'idx_memory_embedded_expiry'),
+    'stats_most_accessed': (STATS_MOST_ACCESSED_SQL, (), 'idx_memory_active_accessed'),
+    'other_embedding_models': (
+        OTHER_MODELS_SQL, (DEFAULT_EMBEDDING_MODEL, DEFAULT_EMBEDDING_MODEL), 'idx_memory_embedded_expiry'),
+    'tag_entries': (_tag_entries_sql(2), ('python', 'infra'), 'PRIMARY KEY'),
+    'entry_tags': (_entry_tags_sql(2), (1, 2), 'idx_memory_tags_entry'),
+    # search_filters.matching_ids(embedded_only=True) with an empty filter
+    'search_eligible_ids': (
+        'SELECT id FROM memory_entries WHERE embedding_model IS NOT NULL AND is_active = 1 AND '
+        + NOT_EXPIRED.format(alias=''), (), 'idx_memory_embedded_expiry'),
+    'context_high_water': (HIGH_WATER_SQL.format(table='memory_entries'), (), 'idx_memory_updated'),
+    'context_logs_high_water': (HIGH_WATER_SQL.format(table='daily_logs'), (), 'idx_daily_logs_updated'),
+    'expired_ids': (EXPIRED_IDS_SQL, (), 'idx_memory_expiring'),
+}
+
+# Table steps of an EXPLAIN QUERY PLAN: "SEARCH t USING COVERING INDEX i (...)",
+# "SEARCH t USING PRIMARY KEY (...)", "SCAN t", and rowid seeks ("SEARCH t",
+# "SEARCH t USING INTEGER PRIMARY KEY (...)")
+_PLAN_STEP_RE = re.compile(
+    r'(SCAN|SEARCH) (\w+)(?: USING (?:(COVERING )?INDEX (\w+)|(INTEGER )?(PRIMARY KEY)))?'
+)
+
+
+def check_query_plans() -> Dict[str, Any]:
+    """
+    EXPLAIN QUERY PLAN regression check for HOT_QUERIES.
+
+    Returns:
+        dict with each query's plan; success is False if a table step of any
+        query, other than a rowid seek, does not use that query's expected
+        index (including a bare table scan) or a query sorts/groups through
+        a temp B-tree
+    """
+    conn = get_connection()
+    try:
+        plans = {}
+        problems = []
+        for name, (sql, params, index) in HOT_QUERIES.items():
+            details = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+            plans[name] = details
+            for detail in details:
+                step = _PLAN_STEP_RE.match(detail)
+                if 'TEMP B-TREE' in detail:
+                    problems.append(f"{name}: {detail}")
+                elif not step or step.group(2) == 'CONSTANT':
+                    continue
+                elif step.group(1) == 'SEARCH' and not step.group(4) and (step.group(5) or not step.group(6)):
+                    continue  # rowid seek
+                elif index == ANY_COVERING_INDEX and step.group(3):
+                    continue
+                elif (step.group(4) or step.group(6)) != index:
+                    problems.append(f"{name}: {detail} (expected {index})")
+    finally:
+        conn.close()
+
+    if problems:
+        return {"success": False, "plans": plans, "problems": problems,
+                "error": f"{len(problems)} hot query plan(s) regressed: {'; '.join(problems)}"}
+    return {"success": True, "plans": plans, "message": f"All {len(plans)} hot queries use their expected indexes"}
+
+
 def add_daily_log(date: str, summary: str, raw_log: str, key_events: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Add or update a daily log entry.
@@ -672,42 +1946,38 @@ def add_daily_log(date: str, summary: str, raw_log: str, key_events: Optional[Li
     Returns:
         dict with success status
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    key_events_json = json.dumps(key_events) if key_events else None
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    # Upsert
-    cursor.execute('''
-        INSERT INTO daily_logs (date, summary, raw_log, key_events, entry_count)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(date) DO UPDATE SET
-            summary = excluded.summary,
-            raw_log = excluded.raw_log,
-            key_events = excluded.key_events,
-            entry_count = entry_count + 1,
-            updated_at = CURRENT_TIMESTAMP
-    ''', (date, summary, raw_log, key_events_json, 1))
+        key_events_json = json.dumps(key_events) if key_events else None
 
-    conn.commit()
+        # Upsert
+        cursor.execute('''
+            INSERT INTO daily_logs (date, summary, raw_log, key_events, entry_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                summary = excluded.summary,
+                raw_log = excluded.raw_log,
+                key_events = excluded.key_events,
+                entry_count = entry_count + 1,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (date, summary, raw_log, key_events_json, 1))
 
-    cursor.execute('SELECT * FROM daily_logs WHERE date = ?', (date,))
-    log = row_to_dict(cursor.fetchone())
+        conn.commit()
 
-    conn.close()
+        cursor.execute('SELECT * FROM daily_logs WHERE date = ?', (date,))
+        log = row_to_dict(cursor.fetchone())
 
     return {"success": True, "log": log, "message": f"Daily log for {date} saved"}
 
 
 def get_daily_log(date: str) -> Dict[str, Any]:
     """Get a daily log by date."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT * FROM daily_logs WHERE date = ?', (date,))
-    log = row_to_dict(cursor.fetchone())
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    conn.close()
+        cursor.execute('SELECT * FROM daily_logs WHERE date = ?', (date,))
+        log = row_to_dict(cursor.fetchone())
 
     if not log:
         return {"success": False, "error": f"No daily log found for {date}"}
@@ -715,7 +1985,31 @@ def get_daily_log(date: str) -> Dict[str, Any]:
     return {"success": True, "log": log}
 
 
-def store_embedding(entry_id: int, embedding: bytes, model: str = 'text-embedding-3-small') -> Dict[str, Any]:
+def _write_embeddings(cursor: sqlite3.Cursor, items: List[tuple], model: str) -> None:
+    """Upsert (entry_id, float32 bytes) vectors for a model and make it the entries' active one."""
+    dtype = quantization.EMBEDDING_DTYPE
+    if dtype not in quantization.STORAGE_DTYPES:
+        dtype = 'float32'
+    cursor.executemany('''
+        INSERT INTO memory_embeddings (entry_id, model, dims, dtype, vector)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(entry_id, model) DO UPDATE SET
+            dims = excluded.dims,
+            dtype = excluded.dtype,
+            vector = excluded.vector,
+            created_at = CURRENT_TIMESTAMP
+    ''', [
+        (entry_id, model, len(embedding) // 4, dtype, quantization.encode_vector(embedding, dtype))
+        for entry_id, embedding in items
+    ])
+    cursor.executemany('''
+        UPDATE memory_entries
+        SET embedding_model = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', [(model, entry_id) for entry_id, _ in items])
+
+
+def store_embedding(entry_id: int, embedding: bytes, model: str = DEFAULT_EMBEDDING_MODEL) -> Dict[str, Any]:
     """
     Store an embedding for a memory entry.
     Called by embed_memory.py after generating embeddings.
@@ -728,41 +2022,267 @@ def store_embedding(entry_id: int, embedding: bytes, model: str = 'text-embeddin
     Returns:
         dict with success status
     """
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT 1 FROM memory_entries WHERE id = ?', (entry_id,))
+        if cursor.fetchone() is None:
+            return {"success": False, "error": f"Memory entry {entry_id} not found"}
+
+        _write_embeddings(cursor, [(entry_id, embedding)], model)
+
+    _sync_vector_index([(entry_id, embedding)])
+
+    return {"success": True, "message": f"Embedding stored for entry {entry_id}"}
+
+
+def store_embeddings(
+    items: List[tuple],
+    model: str = DEFAULT_EMBEDDING_MODEL
+) -> Dict[str, Any]:
+    """
+    Store many embeddings in a single transaction.
+
+    Args:
+        items: List of (entry_id, embedding_bytes) pairs
+        model: Model used to generate the embeddings
+
+    Returns:
+        dict with stored count and IDs that no longer exist
+    """
+    if not items:
+        return {"success": True, "stored": 0, "missing_ids": []}
+
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+        ids = [entry_id for entry_id, _ in items]
+        placeholders = ','.join('?' * len(ids))
+        cursor.execute(f'SELECT id FROM memory_entries WHERE id IN ({placeholders})', ids)
+        existing = {row['id'] for row in cursor.fetchall()}
 
-    cursor.execute('''
-        UPDATE memory_entries
-        SET embedding = ?, embedding_model = ?, updated_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (embedding, model, entry_id))
+        rows = [(entry_id, embedding) for entry_id, embedding in items if entry_id in existing]
+        _write_embeddings(cursor, rows, model)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _sync_vector_index(rows)
+
+    return {
+        "success": True,
+        "stored": len(rows),
+        "missing_ids": [entry_id for entry_id in ids if entry_id not in existing],
+        "message": f"Stored {len(rows)} embeddings"
+    }
+
+
+def get_cached_embeddings(
+    content_hashes: List[str],
+    model: str,
+    dimensions: int
+) -> Dict[str, bytes]:
+    """
+    Look up cached embeddings by content hash and bump their LRU timestamp.
+
+    Args:
+        content_hashes: Hashes from compute_content_hash()
+        model: Embedding model name
+        dimensions: Embedding dimensions
 
-    if cursor.rowcount == 0:
+    Returns:
+        dict of content_hash -> embedding bytes for the hits
+    """
+    unique = list(dict.fromkeys(content_hashes))
+    if not unique:
+        return {}
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(unique))
+        cursor.execute(f'''
+            SELECT content_hash, embedding
+            FROM embedding_cache
+            WHERE embedding_model = ? AND dimensions = ? AND content_hash IN ({placeholders})
+        ''', [model, dimensions] + unique)
+        hits = {row['content_hash']: row['embedding'] for row in cursor.fetchall()}
+
+        if hits:
+            cursor.executemany('''
+                UPDATE embedding_cache
+                SET last_used = CURRENT_TIMESTAMP, hit_count = hit_count + 1
+                WHERE content_hash = ? AND embedding_model = ? AND dimensions = ?
+            ''', [(content_hash, model, dimensions) for content_hash in hits])
+            conn.commit()
+        return hits
+    finally:
         conn.close()
-        return {"success": False, "error": f"Memory entry {entry_id} not found"}
 
-    conn.commit()
-    conn.close()
 
-    return {"success": True, "message": f"Embedding stored for entry {entry_id}"}
+def put_cached_embeddings(
+    items: List[tuple],
+    model: str,
+    dimensions: int,
+    max_entries: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Add embeddings to the cache and evict least-recently-used rows over the cap.
 
+    Args:
+        items: List of (content_hash, embedding_bytes) pairs
+        model: Embedding model name
+        dimensions: Embedding dimensions
+        max_entries: Cache size cap (default EMBEDDING_CACHE_MAX_ENTRIES)
+
+    Returns:
+        dict with stored and evicted counts
+    """
+    if not items:
+        return {"success": True, "stored": 0, "evicted": 0}
+
+    max_entries = EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
 
-def get_entries_without_embeddings(limit: int = 50) -> Dict[str, Any]:
-    """Get entries that don't have embeddings yet."""
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO embedding_cache (content_hash, embedding_model, dimensions, embedding)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(content_hash, embedding_model, dimensions) DO UPDATE SET
+                embedding = excluded.embedding,
+                last_used = CURRENT_TIMESTAMP
+        ''', [(content_hash, model, dimensions, embedding) for content_hash, embedding in items])
+        evicted = _evict_embedding_cache(cursor, max_entries)
+        conn.commit()
+        return {"success": True, "stored": len(items), "evicted": evicted}
+    finally:
+        conn.close()
+
 
+def _evict_embedding_cache(cursor: sqlite3.Cursor, max_entries: int) -> int:
+    cursor.execute('SELECT COUNT(*) AS count FROM embedding_cache')
+    excess = cursor.fetchone()['count'] - max_entries
+    if excess <= 0:
+        return 0
     cursor.execute('''
-        SELECT id, content, type
-        FROM memory_entries
-        WHERE embedding IS NULL AND is_active = 1
-        ORDER BY importance DESC, created_at DESC
-        LIMIT ?
-    ''', (limit,))
+        DELETE FROM embedding_cache WHERE rowid IN (
+            SELECT rowid FROM embedding_cache ORDER BY last_used ASC, hit_count ASC LIMIT ?
+        )
+    ''', (excess,))
+    return cursor.rowcount
 
-    entries = [row_to_dict(row) for row in cursor.fetchall()]
 
-    conn.close()
+def seed_embedding_cache(model: str, dimensions: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Copy existing entry embeddings for a model into the cache.
+
+    Run before clearing embeddings (reindex) so unchanged content is not
+    sent to the provider again.
+
+    Args:
+        model: Embedding model
+        dimensions: Target size for a dimension change. Larger stored
+            vectors are truncated and re-normalized into the cache at this
+            size (only valid for Matryoshka-trained models); smaller ones
+            are skipped and must be re-embedded. None copies vectors as-is.
+
+    Returns:
+        dict with success status, seeded and truncated counts
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT e.content_hash, v.dims, v.dtype, v.vector
+            FROM memory_embeddings v
+            JOIN memory_entries e ON e.id = v.entry_id
+            WHERE v.model = ? AND e.content_hash IS NOT NULL
+        ''', (model,))
+        # The cache holds float32; compact storage dtypes are decoded first
+        rows = []
+        truncated = 0
+        for row in cursor.fetchall():
+            embedding = quantization.decode_vector(row['vector'], row['dtype'])
+            dims = row['dims']
+            if dimensions is not None and dims != dimensions:
+                if dims < dimensions:
+                    continue
+                embedding = quantization.truncate_vector(embedding, dimensions)
+                dims = dimensions
+                truncated += 1
+            rows.append((row['content_hash'], model, dims, embedding))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO embedding_cache (content_hash, embedding_model, dimensions, embedding)
+            VALUES (?, ?, ?, ?)
+        ''', rows)
+        seeded = cursor.rowcount
+        _evict_embedding_cache(cursor, EMBEDDING_CACHE_MAX_ENTRIES)
+        conn.commit()
+        return {"success": True, "seeded": seeded, "truncated": truncated}
+    finally:
+        conn.close()
+
+
+def _sync_vector_index(items: List[tuple]) -> None:
+    """
+    Mirror stored (entry_id, embedding) pairs into the memory-mapped index
+    (data/memory.vec), which keeps the IVF index (data/memory.ivf) in step:
+    one lock, one id resolution pass and one generation per batch.
+
+    Best effort: the database stays the source of truth, and search rebuilds
+    the index if it is missing entries (e.g. numpy unavailable here).
+    """
+    try:
+        from vector_index import upsert_vectors
+    except ImportError:
+        return
+    if not items:
+        return
+    try:
+        upsert_vectors(items)
+    except (OSError, ValueError):
+        pass
+
+
+def _sync_bm25_index(cursor: sqlite3.Cursor, entry_id: int) -> None:
+    """Re-index an entry's keywords after its content or active flag changed."""
+    bm25_index.remove_document(cursor, entry_id)
+    cursor.execute('SELECT content, is_active FROM memory_entries WHERE id = ?', (entry_id,))
+    row = cursor.fetchone()
+    if row and row['is_active']:
+        bm25_index.index_document(cursor, entry_id, row['content'])
+
+
+def _sync_ann_tombstone(entry_id: int, deleted: bool) -> None:
+    """Set or clear an entry's IVF tombstone (best effort, like _sync_vector_index)."""
+    try:
+        from ann_index import set_tombstone
+    except ImportError:
+        return
+    try:
+        set_tombstone(entry_id, deleted)
+    except (OSError, ValueError):
+        pass
+
+
+def _invalidate_context_cache() -> None:
+    """Drop the session context cache (best effort, like _sync_ann_tombstone)."""
+    try:
+        from context_cache import invalidate
+    except ImportError:
+        return
+    invalidate()
+
+
+def get_entries_without_embeddings(limit: int = 50) -> Dict[str, Any]:
+    """Get entries that don't have embeddings yet."""
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(NEEDS_EMBEDDING_SQL, (limit,))
+
+        entries = [row_to_dict(row) for row in cursor.fetchall()]
 
     return {"success": True, "entries": entries, "count": len(entries)}
 
@@ -771,7 +2291,8 @@ def main():
     parser = argparse.ArgumentParser(description='Memory Database Manager')
     parser.add_argument('--action', required=True,
                        choices=['add', 'get', 'list', 'search', 'update', 'delete',
-                               'recent', 'stats', 'add-log', 'get-log', 'needs-embedding'],
+                               'recent', 'stats', 'add-log', 'get-log', 'needs-embedding',
+                               'maintenance', 'compact', 'check-plans', 'import', 'tags', 'rebuild-tags'],
                        help='Action to perform')
     parser.add_argument('--id', type=int, help='Entry ID')
     parser.add_argument('--content', help='Memory content')
@@ -780,6 +2301,7 @@ def main():
     parser.add_argument('--confidence', type=float, default=1.0, help='Confidence score 0-1')
     parser.add_argument('--importance', type=int, default=5, help='Importance level 1-10')
     parser.add_argument('--tags', help='Comma-separated tags')
+    parser.add_argument('--tag', help='Only entries with this tag (comma-separated: any of them) for list/search')
     parser.add_argument('--context', help='Context about when/why this was learned')
     parser.add_argument('--query', help='Search query')
     parser.add_argument('--hours', type=int, default=24, help='Hours for recent entries')
@@ -789,6 +2311,17 @@ def main():
     parser.add_argument('--limit', type=int, default=100, help='Limit for list')
     parser.add_argument('--offset', type=int, default=0, help='Offset for list')
     parser.add_argument('--hard-delete', action='store_true', help='Permanently delete instead of soft delete')
+    parser.add_argument('--file', help='JSONL file of entries for import')
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE, help='Rows per transaction for import')
+    parser.add_argument('--embed', action='store_true', help='Embed imported entries after import')
+    parser.add_argument('--checkpoint', default='PASSIVE',
+                       choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+                       help='WAL checkpoint mode for maintenance')
+    parser.add_argument('--retention-days', type=int,
+                       help='Days of raw access events to keep for compact (default: MEMORY_ACCESS_LOG_RETENTION_DAYS)')
+    parser.add_argument('--full', action='store_true', help='Run a full VACUUM for compact')
+    parser.add_argument('--mode', choices=SEARCH_MODES, default='like',
+                       help='Search mode: like (substring) or fts (ranked FTS5, supports "phrases" and prefix*)')
 
     args = parser.parse_args()
 
@@ -820,14 +2353,15 @@ def main():
             entry_type=args.type,
             source=args.source,
             limit=args.limit,
-            offset=args.offset
+            offset=args.offset,
+            tag=args.tag
         )
 
     elif args.action == 'search':
         if not args.query:
             print("Error: --query required for search action")
             sys.exit(1)
-        result = search_entries(args.query, entry_type=args.type, limit=args.limit)
+        result = search_entries(args.query, entry_type=args.type, limit=args.limit, mode=args.mode, tag=args.tag)
 
     elif args.action == 'update':
         if not args.id:
@@ -879,6 +2413,31 @@ def main():
     elif args.action == 'needs-embedding':
         result = get_entries_without_embeddings(limit=args.limit)
 
+    elif args.action == 'import':
+        if not args.file:
+            print("Error: --file required for import action")
+            sys.exit(1)
+        # One JSON line per input row as each batch completes, then the summary
+        result = import_entries_file(
+            args.file, batch_size=args.batch_size, embed=args.embed,
+            on_row=lambda outcome: print(json.dumps(outcome), flush=True)
+        )
+
+    elif args.action == 'maintenance':
+        result = run_maintenance(checkpoint=args.checkpoint)
+
+    elif args.action == 'compact':
+        result = compact(retention_days=args.retention_days, full=args.full)
+
+    elif args.action == 'check-plans':
+        result = check_query_plans()
+
+    elif args.action == 'tags':
+        result = list_tags(limit=args.limit)
+
+    elif args.action == 'rebuild-tags':
+        result = rebuild_tag_index()
+
     if result:
         if result.get('success'):
             print(f"OK {result.get('message', 'Success')}")
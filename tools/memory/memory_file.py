@@ -0,0 +1,288 @@
+"""
+Tool: MEMORY.md Store
+Purpose: Atomic, lock-protected section appends to memory/MEMORY.md
+
+Appending used to re-read MEMORY.md, walk every line to find the section,
+rebuild the line list and rewrite the file in place, so two agents
+appending at once could lose one of the updates and a crash mid-write could
+truncate the file. Here each write:
+
+- holds an exclusive advisory lock (MEMORY.md.lock, fcntl) for the whole
+  read-modify-write, so parallel writers queue instead of racing
+- finds insertion points in a cached section index (byte offsets of the end
+  of each "## " section and of the "*Last updated:" line), keyed by the
+  file's inode/mtime/size; after its own write the index is shifted rather
+  than rebuilt, so only a change from outside triggers a rescan
+- splices all pending lines in with one pass over the bytes and replaces
+  the file atomically (temp file in the same directory, fsync, os.replace),
+  keeping its permissions
+
+append_entries() takes any number of (section, content) pairs and commits
+them in a single locked rewrite.
+
+Usage:
+    python tools/memory/memory_file.py --sections
+    python tools/memory/memory_file.py --section key_facts --content "Fact one" --content "Fact two"
+
+Dependencies:
+    - fcntl (stdlib, POSIX; writes are unlocked where it is unavailable)
+
+Output:
+    JSON with the appended lines or the section index
+"""
+
+import os
+import sys
+import json
+import stat
+import tempfile
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+# Paths
+MEMORY_DIR = Path(__file__).parent.parent.parent / "memory"
+MEMORY_FILE = MEMORY_DIR / "MEMORY.md"
+
+LAST_UPDATED_PREFIX = b'*Last updated:'
+
+# Per-process cache of the last section index, keyed on file identity
+_index_cache: Dict[str, Any] = {"key": None, "index": None}
+
+
+def section_key(name: str) -> str:
+    """Normalize a section name or heading ("key_facts", "Key Facts") to its key."""
+    return '_'.join(name.replace('_', ' ').lower().split())
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on a sidecar file (the target itself is replaced on write)."""
+    lock_path = path.with_name(path.name + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def build_index(data: bytes) -> Dict[str, Any]:
+    """
+    Scan MEMORY.md bytes for section insertion points.
+
+    A section runs from its "## " heading to the next heading or "---" rule;
+    new lines go right after its last non-blank line (or after the heading
+    if it is empty). The first occurrence of a heading wins.
+
+    Args:
+        data: File contents
+
+    Returns:
+        dict with sections (key -> insertion offset), headings (key -> text)
+        and last_updated ([start, end] of that line's text, or None)
+    """
+    sections: Dict[str, int] = {}
+    headings: Dict[str, str] = {}
+    last_updated = None
+    current = None
+    pos = 0
+    for line in data.splitlines(keepends=True):
+        end = pos + len(line)
+        text = line.rstrip(b'\r\n')
+        stripped = text.strip()
+        if text.startswith(b'## '):
+            heading = text[3:].decode('utf-8', errors='replace').strip()
+            key = section_key(heading)
+            current = None if key in sections else key
+            if current:
+                sections[key] = end
+                headings[key] = heading
+        elif stripped == b'---':
+            current = None
+        elif current and stripped:
+            sections[current] = end
+        if last_updated is None and text.startswith(LAST_UPDATED_PREFIX):
+            last_updated = [pos, pos + len(text)]
+        pos = end
+    return {"sections": sections, "headings": headings, "last_updated": last_updated}
+
+
+def _file_key(st: os.stat_result) -> Tuple[int, int, int]:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def section_index(path: Path, data: bytes, st: os.stat_result) -> Dict[str, Any]:
+    """Cached build_index() for the file as read (rebuilt when it changed on disk)."""
+    key = [str(path), _file_key(st)]
+    if _index_cache["key"] == key:
+        return _index_cache["index"]
+    index = build_index(data)
+    _index_cache["key"] = key
+    _index_cache["index"] = index
+    return index
+
+
+def _shift(offset: int, edits: List[Tuple[int, int, bytes]]) -> int:
+    """Offset after applying edits that end at or before it."""
+    return offset + sum(len(new) - (end - start) for start, end, new in edits if end <= offset)
+
+
+def _apply(data: bytes, edits: List[Tuple[int, int, bytes]]) -> bytes:
+    """Splice non-overlapping (start, end, replacement) edits into data in one pass."""
+    parts = []
+    pos = 0
+    for start, end, new in sorted(edits):
+        parts.append(data[pos:start])
+        parts.append(new)
+        pos = end
+    parts.append(data[pos:])
+    return b''.join(parts)
+
+
+def _replace_atomic(path: Path, data: bytes, mode: int) -> os.stat_result:
+    """Write data to a temp file next to path, fsync, and os.replace it over path."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return os.stat(path)
+
+
+def append_entries(
+    entries: Iterable[Tuple[str, str]],
+    path: Optional[Path] = None,
+    touch_last_updated: bool = True
+) -> Dict[str, Any]:
+    """
+    Append lines to MEMORY.md sections in one locked, atomic rewrite.
+
+    Args:
+        entries: (section, content) pairs; each becomes "- content" at the
+            end of that section, in the order given
+        path: File to write (default MEMORY_FILE)
+        touch_last_updated: Set the "*Last updated:" line to today
+
+    Returns:
+        dict with success status and the appended lines per section
+    """
+    path = Path(path or MEMORY_FILE)
+    entries = [(section, content) for section, content in entries]
+    if not entries:
+        return {"success": True, "path": str(path), "appended": 0, "sections": {}, "message": "Nothing to append"}
+
+    with file_lock(path):
+        try:
+            st = os.stat(path)
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return {"success": False, "error": f"{path.name} does not exist"}
+
+        index = section_index(path, data, st)
+        pending: Dict[str, List[str]] = {}
+        for section, content in entries:
+            key = section_key(section)
+            if key not in index["sections"]:
+                return {"success": False, "error": f"Section '{section}' not found in {path.name}"}
+            pending.setdefault(key, []).append(content)
+
+        edits = []
+        for key, contents in pending.items():
+            offset = index["sections"][key]
+            lines = ''.join(f"- {content}\n" for content in contents).encode('utf-8')
+            if offset > 0 and data[offset - 1:offset] != b'\n':
+                # Section ends on the file's last line, which has no newline
+                lines = b'\n' + lines
+            edits.append((offset, offset, lines))
+        last_updated = index["last_updated"]
+        if touch_last_updated and last_updated:
+            stamp = f"*Last updated: {datetime.now().strftime('%Y-%m-%d')}*".encode('utf-8')
+            edits.append((last_updated[0], last_updated[1], stamp))
+            last_updated = [last_updated[0], last_updated[0] + len(stamp)]
+
+        new_data = _apply(data, edits)
+        new_st = _replace_atomic(path, new_data, stat.S_IMODE(st.st_mode))
+
+        # Shift the index past our own edits instead of rescanning
+        start = _shift(last_updated[0], edits) if last_updated else None
+        _index_cache["key"] = [str(path), _file_key(new_st)]
+        _index_cache["index"] = {
+            "sections": {key: _shift(offset, edits) for key, offset in index["sections"].items()},
+            "headings": index["headings"],
+            "last_updated": [start, start + last_updated[1] - last_updated[0]] if last_updated else None
+        }
+
+    return {
+        "success": True,
+        "path": str(path),
+        "appended": len(entries),
+        "sections": pending,
+        "message": f"Appended {len(entries)} line(s) to {', '.join(pending)} in {path.name}"
+    }
+
+
+def list_sections(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Section keys, headings and insertion offsets of MEMORY.md."""
+    path = Path(path or MEMORY_FILE)
+    try:
+        st = os.stat(path)
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return {"success": False, "error": f"{path.name} does not exist"}
+    index = section_index(path, data, st)
+    return {
+        "success": True,
+        "path": str(path),
+        "sections": [
+            {"key": key, "heading": index["headings"][key], "insert_offset": offset}
+            for key, offset in index["sections"].items()
+        ],
+        "last_updated": index["last_updated"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MEMORY.md Store - Atomic section appends')
+    parser.add_argument('--sections', action='store_true', help='Show the section index')
+    parser.add_argument('--section', default='key_facts', help='Section to append to')
+    parser.add_argument('--content', action='append', help='Line to append (repeat to batch)')
+    parser.add_argument('--file', help='MEMORY.md path (default: memory/MEMORY.md)')
+
+    args = parser.parse_args()
+    path = Path(args.file) if args.file else None
+
+    if args.sections:
+        result = list_sections(path)
+    elif args.content:
+        result = append_entries([(args.section, content) for content in args.content], path=path)
+    else:
+        parser.print_help()
+        return
+
+    if result.get('success'):
+        print(f"OK {result.get('message', 'Done')}")
+    else:
+        print(f"ERROR {result.get('error')}")
+        sys.exit(1)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
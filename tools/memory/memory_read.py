@@ -8,6 +8,15 @@ This matches Moltbot's memory loading pattern:
 - Read yesterday's daily log (for continuity)
 - Optionally load recent entries from SQLite
 
+The loaded context and its markdown rendering are cached by context_cache.py
+(data/memory.context.json) and reused while MEMORY.md, the daily logs and
+the database are unchanged, so a session start is usually a single cached
+read. --no-cache bypasses it.
+
+With --budget, the context is packed into a token budget instead of dumped
+whole (context_builder.py): MEMORY.md bullets, log events and DB entries are
+ranked by importance, recency and --query relevance and the best are kept.
+
 Usage:
     python tools/memory/memory_read.py                    # Load all memory context
     python tools/memory/memory_read.py --memory-only      # Just MEMORY.md
@@ -16,12 +25,18 @@ Usage:
     python tools/memory/memory_read.py --include-db       # Also include SQLite entries
     python tools/memory/memory_read.py --format markdown  # Output as markdown
     python tools/memory/memory_read.py --format json      # Output as JSON
+    python tools/memory/memory_read.py --no-cache         # Rebuild without the context cache
+    python tools/memory/memory_read.py --budget 1500      # Best context within ~1500 tokens
+    python tools/memory/memory_read.py --budget 800 --query "deploy"  # Rank by relevance too
 
 Dependencies:
     - pathlib (stdlib)
     - json (stdlib)
     - datetime (stdlib)
 
+Env Vars:
+    - MEMORY_CONTEXT_CACHE (optional, on (default) or off)
+
 Output:
     Combined memory context ready for LLM injection
 """
@@ -32,7 +47,7 @@ import json
 import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 # Paths
 MEMORY_DIR = Path(__file__).parent.parent.parent / "memory"
@@ -43,12 +58,14 @@ LOGS_DIR = MEMORY_DIR / "logs"
 sys.path.insert(0, str(Path(__file__).parent))
 try:
     from memory_db import get_recent, get_daily_log
+    import context_cache
 except ImportError:
     # Fallback if running standalone
     def get_recent(hours=24, entry_type=None):
         return {"success": False, "entries": []}
     def get_daily_log(date):
         return {"success": False}
+    context_cache = None
 
 
 def read_memory_file() -> Dict[str, Any]:
@@ -198,7 +215,8 @@ def load_all_memory(
     include_db: bool = False,
     log_days: int = 2,
     db_hours: int = 24,
-    min_importance: int = 5
+    min_importance: int = 5,
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
     Load all memory context for session start.
@@ -210,10 +228,106 @@ def load_all_memory(
         log_days: Number of days of logs
         db_hours: Hours of DB entries
         min_importance: Min importance for DB entries
+        use_cache: Serve from / refresh the context cache (context_cache.py)
 
     Returns:
         Combined memory context
     """
+    context, _ = load_session_context(
+        include_memory=include_memory,
+        include_logs=include_logs,
+        include_db=include_db,
+        log_days=log_days,
+        db_hours=db_hours,
+        min_importance=min_importance,
+        use_cache=use_cache
+    )
+    return context
+
+
+def _db_window_end(entries: List[Dict[str, Any]], hours: int) -> Optional[str]:
+    """When the oldest included DB entry leaves the get_recent window (local ISO time)."""
+    created = [str(entry['created_at']) for entry in entries if entry.get('created_at')]
+    if not created:
+        return None
+    try:
+        oldest = datetime.fromisoformat(min(created))
+    except ValueError:
+        return None
+    return (oldest + timedelta(hours=hours)).isoformat()
+
+
+def load_session_context(
+    include_memory: bool = True,
+    include_logs: bool = True,
+    include_db: bool = False,
+    log_days: int = 2,
+    db_hours: int = 24,
+    min_importance: int = 5,
+    use_cache: bool = True
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Load the memory context and its markdown rendering, cached.
+
+    The cache entry is keyed by the arguments and checked against the
+    mtimes/sizes of MEMORY.md and the daily logs in the window, plus the
+    database high-water marks when SQLite is read (include_db, or a day
+    without a log file). On a hit nothing is re-read or re-parsed.
+
+    Args:
+        Same as load_all_memory
+
+    Returns:
+        (context, markdown); context["summary"]["cache"] is "hit", "miss" or "off"
+    """
+    options = {
+        "include_memory": include_memory,
+        "include_logs": include_logs,
+        "include_db": include_db,
+        "log_days": log_days,
+        "db_hours": db_hours,
+        "min_importance": min_importance
+    }
+    caching = use_cache and context_cache is not None and context_cache.CONTEXT_CACHE_ENABLED
+    if not caching:
+        context = _load_all_memory(**options)
+        context["summary"]["cache"] = "off"
+        return context, format_as_markdown(context)
+
+    key = json.dumps(options, sort_keys=True)
+    today = datetime.now().date()
+    log_files = [LOGS_DIR / f"{(today - timedelta(days=i)).isoformat()}.md" for i in range(log_days)] if include_logs else []
+    paths = ([MEMORY_FILE] if include_memory else []) + log_files
+    # Days without a log file fall back to the daily_logs table
+    reads_db = include_db or any(not path.exists() for path in log_files)
+    current = context_cache.fingerprint(paths, include_db=reads_db)
+
+    cached = context_cache.lookup(key, current)
+    if cached is not None:
+        context = cached["context"]
+        context["loaded_at"] = datetime.now().isoformat()
+        context["summary"]["cache"] = "hit"
+        return context, cached["markdown"]
+
+    context = _load_all_memory(**options)
+    markdown = format_as_markdown(context)
+    context_cache.store(
+        key, current, {"context": context, "markdown": markdown},
+        valid_until=_db_window_end(context["db_entries"], db_hours) if include_db else None
+    )
+    context["summary"]["cache"] = "miss"
+    return context, markdown
+
+
+def _load_all_memory(
+    include_memory: bool,
+    include_logs: bool,
+    include_db: bool,
+    log_days: int,
+    db_hours: int,
+    min_importance: int
+) -> Dict[str, Any]:
+    """Read every source (uncached load_all_memory)."""
     result = {
         "success": True,
         "loaded_at": datetime.now().isoformat(),
@@ -288,6 +402,47 @@ def format_as_markdown(memory_context: Dict[str, Any]) -> str:
     return '\n'.join(parts)
 
 
+def load_budgeted_context(
+    budget: int,
+    query: Optional[str] = None,
+    include_memory: bool = True,
+    include_logs: bool = True,
+    include_db: bool = False,
+    log_days: int = 2,
+    db_hours: int = 24,
+    min_importance: int = 5,
+    use_cache: bool = True,
+    search_database: bool = True
+) -> Dict[str, Any]:
+    """
+    Load the session context and pack it into a token budget.
+
+    Args:
+        budget: Maximum estimated tokens
+        query: Optional query to rank snippets by relevance (and search the DB)
+        search_database: Whether the query may pull in entries via hybrid_search
+        Others: Same as load_all_memory
+
+    Returns:
+        context_builder.build_context result (markdown, tokens, counts)
+    """
+    from context_builder import build_context
+
+    context, _ = load_session_context(
+        include_memory=include_memory,
+        include_logs=include_logs,
+        include_db=include_db,
+        log_days=log_days,
+        db_hours=db_hours,
+        min_importance=min_importance,
+        use_cache=use_cache
+    )
+    result = build_context(context, budget, query=query, search_database=search_database)
+    result["loaded_at"] = context.get('loaded_at')
+    result["cache"] = context.get('summary', {}).get('cache')
+    return result
+
+
 def format_as_json(memory_context: Dict[str, Any]) -> str:
     """Format memory context as JSON."""
     return json.dumps(memory_context, indent=2, default=str)
@@ -305,6 +460,9 @@ def main():
     parser.add_argument('--format', choices=['markdown', 'json', 'summary'], default='markdown',
                        help='Output format')
     parser.add_argument('--quiet', action='store_true', help='Suppress status messages')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the session context cache')
+    parser.add_argument('--budget', type=int, help='Token budget: pack the highest-ranked snippets within it')
+    parser.add_argument('--query', help='With --budget: rank by relevance to this query (and search the DB)')
 
     args = parser.parse_args()
 
@@ -312,19 +470,50 @@ def main():
     include_memory = not args.logs_only
     include_logs = not args.memory_only
 
-    # Load memory
-    context = load_all_memory(
+    if args.query and args.budget is None:
+        parser.error('--query requires --budget')
+
+    if args.budget is not None:
+        result = load_budgeted_context(
+            args.budget,
+            query=args.query,
+            include_memory=include_memory,
+            include_logs=include_logs,
+            include_db=args.include_db,
+            log_days=args.days,
+            db_hours=args.db_hours,
+            min_importance=args.min_importance,
+            use_cache=not args.no_cache,
+            search_database=include_memory and include_logs
+        )
+        if not result.get('success'):
+            print(f"ERROR {result.get('error')}", file=sys.stderr)
+            sys.exit(1)
+        if args.format == 'markdown':
+            if not args.quiet:
+                print(f"# Memory packed: ~{result['tokens']}/{result['budget']} tokens, "
+                      f"{result['included']} of {result['candidates']} snippets", file=sys.stderr)
+            print(result['markdown'])
+        elif args.format == 'json':
+            print(json.dumps(result, indent=2, default=str))
+        else:
+            print(json.dumps({key: value for key, value in result.items() if key != 'markdown'}, indent=2))
+        return
+
+    # Load memory (rendered markdown comes from the context cache on a hit)
+    context, markdown = load_session_context(
         include_memory=include_memory,
         include_logs=include_logs,
         include_db=args.include_db,
         log_days=args.days,
         db_hours=args.db_hours,
-        min_importance=args.min_importance
+        min_importance=args.min_importance,
+        use_cache=not args.no_cache
     )
 
     # Format output
     if args.format == 'markdown':
-        output = format_as_markdown(context)
+        output = markdown
         if not args.quiet:
             summary = context.get('summary', {})
             print(f"# Memory loaded: {summary.get('memory_sections', [])} sections, "
@@ -343,7 +532,8 @@ def main():
             "memory_sections": summary.get('memory_sections', []),
             "logs_loaded": summary.get('logs_loaded', 0),
             "log_dates": summary.get('log_dates', []),
-            "db_entries_loaded": summary.get('db_entries_loaded', 0)
+            "db_entries_loaded": summary.get('db_entries_loaded', 0),
+            "cache": summary.get('cache')
         }, indent=2))
 
 
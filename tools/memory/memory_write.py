@@ -6,6 +6,7 @@ This tool handles the "write" side of persistent memory:
 - Append events/notes to today's daily log (memory/logs/YYYY-MM-DD.md)
 - Add structured entries to SQLite for searchability
 - Sync between markdown files and database
+- Append curated lines to MEMORY.md sections (locked, atomic; memory_file.py)
 
 Usage:
     python tools/memory/memory_write.py --content "User prefers GPT for images"
@@ -30,7 +31,7 @@ import json
 import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 # Paths
 MEMORY_DIR = Path(__file__).parent.parent.parent / "memory"
@@ -39,13 +40,17 @@ LOGS_DIR = MEMORY_DIR / "logs"
 
 # Import memory_db functions
 sys.path.insert(0, str(Path(__file__).parent))
+import memory_file
 try:
     from memory_db import add_entry, add_daily_log as db_add_daily_log
+    from context_cache import invalidate as invalidate_context_cache
 except ImportError:
     def add_entry(**kwargs):
         return {"success": False, "error": "memory_db not available"}
     def db_add_daily_log(**kwargs):
         return {"success": False, "error": "memory_db not available"}
+    def invalidate_context_cache():
+        pass
 
 
 def ensure_directories():
@@ -108,6 +113,7 @@ def append_to_daily_log(
     # Append to file
     with open(log_path, 'a', encoding='utf-8') as f:
         f.write(entry_line)
+    invalidate_context_cache()
 
     return {
         "success": True,
@@ -175,6 +181,7 @@ def write_to_memory(
         # Don't fail if it's a duplicate - that's expected
         if not db_result.get('success') and 'Duplicate' not in db_result.get('error', ''):
             results["success"] = False
+        invalidate_context_cache()
 
     return results
 
@@ -187,6 +194,9 @@ def append_to_memory_file(
     Append a line to a specific section in MEMORY.md.
     Use sparingly - for truly persistent facts that should always be loaded.
 
+    The write is locked and atomic (see memory_file.py), so parallel agents
+    appending at once do not lose updates.
+
     Args:
         content: Content to append
         section: Section name (user_preferences, key_facts, learned_behaviors, etc.)
@@ -194,64 +204,35 @@ def append_to_memory_file(
     Returns:
         dict with success status
     """
-    if not MEMORY_FILE.exists():
-        return {"success": False, "error": "MEMORY.md does not exist"}
-
-    full_content = MEMORY_FILE.read_text(encoding='utf-8')
-
-    # Find the section and append
-    section_header = f"## {section.replace('_', ' ').title()}"
-    lines = full_content.split('\n')
-    new_lines = []
-    found_section = False
-    inserted = False
-
-    for i, line in enumerate(lines):
-        new_lines.append(line)
-
-        # Found our section
-        if line.strip().lower() == section_header.lower():
-            found_section = True
-            continue
-
-        # We're in our section, look for the next section or end
-        if found_section and not inserted:
-            # Check if this is a new section or blank line before next section
-            if line.startswith('## ') or (line.strip() == '' and i + 1 < len(lines) and lines[i + 1].startswith('## ')):
-                # Insert before this line
-                new_lines.insert(-1, f"- {content}")
-                inserted = True
-            elif line.strip() == '---':
-                # Insert before horizontal rule
-                new_lines.insert(-1, f"- {content}")
-                inserted = True
-
-    # If we found the section but didn't insert (section is at end)
-    if found_section and not inserted:
-        new_lines.append(f"- {content}")
-        inserted = True
-
-    if not found_section:
-        return {"success": False, "error": f"Section '{section}' not found in MEMORY.md"}
-
-    # Update the last modified line
-    for i, line in enumerate(new_lines):
-        if line.startswith('*Last updated:'):
-            new_lines[i] = f"*Last updated: {datetime.now().strftime('%Y-%m-%d')}*"
-            break
-
-    # Write back
-    MEMORY_FILE.write_text('\n'.join(new_lines), encoding='utf-8')
+    result = append_many_to_memory_file([(section, content)])
+    if not result.get('success'):
+        return result
 
     return {
         "success": True,
-        "path": str(MEMORY_FILE),
+        "path": result["path"],
         "section": section,
         "content": content,
         "message": f"Appended to {section} in MEMORY.md"
     }
 
 
+def append_many_to_memory_file(entries: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Append several lines to MEMORY.md sections in one locked rewrite.
+
+    Args:
+        entries: (section, content) pairs, appended in order
+
+    Returns:
+        dict with success status and the lines appended per section
+    """
+    result = memory_file.append_entries(entries, path=MEMORY_FILE)
+    if result.get('success') and result.get('appended'):
+        invalidate_context_cache()
+    return result
+
+
 def sync_log_to_db(date: Optional[str] = None) -> Dict[str, Any]:
     """
     Sync a daily log file to the SQLite database.
@@ -289,6 +270,7 @@ def sync_log_to_db(date: Optional[str] = None) -> Dict[str, Any]:
         raw_log=content,
         key_events=key_events
     )
+    invalidate_context_cache()
 
     return {
         "success": result.get('success', False),
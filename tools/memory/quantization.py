@@ -0,0 +1,277 @@
+"""
+Tool: Vector Quantization
+Purpose: Compact embedding encodings for storage and two-stage similarity search
+
+Encodings (bytes per vector at d dimensions):
+- float32: 4d      full precision (embed_memory.embedding_to_bytes)
+- float16: 2d      half precision
+- int8:    d + 4   scalar quantization, one float32 scale per vector (max |x| / 127)
+- binary:  d / 8   1-bit sign codes, compared by Hamming distance
+
+Two uses:
+- Storage: memory_embeddings.vector is written in MEMORY_EMBEDDING_DTYPE
+  (float32, float16 or int8; binary is too lossy to be the only copy) and
+  decoded back to float32 on read.
+- Search: with MEMORY_VECTOR_ENCODING set, vector_index.py keeps a code file
+  next to memory.vec. semantic_search scans the codes to shortlist
+  MEMORY_RESCORE_FACTOR x limit candidates, then rescores only those rows
+  against the full-precision memory-mapped matrix.
+
+measure_recall() compares the two-stage ranking with exact search; it is
+reported by embed_memory.get_embedding_stats.
+
+Dependencies:
+    - numpy (optional; storage codecs fall back to struct, search encodings need numpy)
+
+Env Vars:
+    - MEMORY_EMBEDDING_DTYPE (optional, float32 (default), float16 or int8)
+    - MEMORY_VECTOR_ENCODING (optional, first-stage scan codes: float32 (off, default), float16, int8, binary)
+    - MEMORY_RESCORE_FACTOR (optional, shortlist size as a multiple of the limit, default 8)
+
+Output:
+    Encoded bytes / arrays (library module)
+"""
+
+import os
+import math
+import struct
+from typing import Optional, List, Dict, Any, Sequence
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+ENCODINGS = ['float32', 'float16', 'int8', 'binary']
+STORAGE_DTYPES = ['float32', 'float16', 'int8']
+
+EMBEDDING_DTYPE = os.getenv('MEMORY_EMBEDDING_DTYPE', 'float32')
+SCAN_ENCODING = os.getenv('MEMORY_VECTOR_ENCODING', 'float32')
+RESCORE_FACTOR = int(os.getenv('MEMORY_RESCORE_FACTOR', '8'))
+
+# Rows decoded per step when scanning codes, to bound temporary float32 memory
+SCAN_CHUNK_ROWS = 8192
+
+_INT8_SCALE = struct.Struct('<f')
+
+
+def code_size(encoding: str, dims: int) -> int:
+    """Bytes per encoded vector."""
+    if encoding == 'float32':
+        return 4 * dims
+    if encoding == 'float16':
+        return 2 * dims
+    if encoding == 'int8':
+        return dims + _INT8_SCALE.size
+    if encoding == 'binary':
+        return (dims + 7) // 8
+    raise ValueError(f"Invalid encoding. Must be one of: {ENCODINGS}")
+
+
+def stored_dims(blob: bytes, dtype: str) -> int:
+    """Dimensions of a stored vector from its byte length."""
+    if dtype == 'float16':
+        return len(blob) // 2
+    if dtype == 'int8':
+        return len(blob) - _INT8_SCALE.size
+    return len(blob) // 4
+
+
+# ---------------------------------------------------------------------------
+# Storage codecs (single vectors, float32 bytes in and out)
+# ---------------------------------------------------------------------------
+
+def encode_vector(embedding: bytes, dtype: str) -> bytes:
+    """Encode packed float32 bytes as `dtype` for memory_embeddings."""
+    if dtype == 'float32':
+        return embedding
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Invalid storage dtype. Must be one of: {STORAGE_DTYPES}")
+
+    if HAS_NUMPY:
+        vector = np.frombuffer(embedding, dtype='<f4').reshape(1, -1)
+        return encode_matrix(vector, dtype).tobytes()
+
+    values = struct.unpack(f'<{len(embedding) // 4}f', embedding)
+    if dtype == 'float16':
+        return struct.pack(f'<{len(values)}e', *values)
+    scale = (max((abs(v) for v in values), default=0.0) / 127) or 1.0
+    codes = [max(-127, min(127, round(v / scale))) for v in values]
+    return _INT8_SCALE.pack(scale) + struct.pack(f'<{len(codes)}b', *codes)
+
+
+def decode_vector(blob: bytes, dtype: Optional[str]) -> bytes:
+    """Decode a stored vector back to packed float32 bytes."""
+    if not dtype or dtype == 'float32':
+        return blob
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Invalid storage dtype. Must be one of: {STORAGE_DTYPES}")
+
+    dims = stored_dims(blob, dtype)
+    if HAS_NUMPY:
+        codes = np.frombuffer(blob, dtype=np.uint8).reshape(1, -1)
+        return decode_matrix(codes, dtype, dims).astype('<f4').tobytes()
+
+    if dtype == 'float16':
+        values = struct.unpack(f'<{dims}e', blob)
+    else:
+        scale = _INT8_SCALE.unpack_from(blob)[0]
+        values = [c * scale for c in struct.unpack_from(f'<{dims}b', blob, _INT8_SCALE.size)]
+    return struct.pack(f'<{dims}f', *values)
+
+
+def truncate_vector(embedding: bytes, dims: int) -> bytes:
+    """
+    Shorten packed float32 bytes to their first `dims` values, re-normalized.
+
+    Matches the API's `dimensions` output for Matryoshka-trained models
+    (text-embedding-3-*), so stored vectors can be migrated to a smaller
+    size without re-embedding.
+    """
+    values = struct.unpack_from(f'<{dims}f', embedding)
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return struct.pack(f'<{dims}f', *(v / norm for v in values))
+
+
+# ---------------------------------------------------------------------------
+# Matrix codecs (numpy): rows of uint8 codes, code_size(encoding, dims) wide
+# ---------------------------------------------------------------------------
+
+def encode_matrix(matrix: "np.ndarray", encoding: str) -> "np.ndarray":
+    """Encode float32 rows as a (n, code_size) uint8 array."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    n = matrix.shape[0]
+    if encoding == 'float32':
+        return matrix.astype('<f4').view(np.uint8).reshape(n, -1)
+    if encoding == 'float16':
+        return matrix.astype('<f2').view(np.uint8).reshape(n, -1)
+    if encoding == 'int8':
+        scale = np.abs(matrix).max(axis=1, initial=0.0) / 127
+        scale[scale == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scale[:, None]), -127, 127).astype(np.int8)
+        return np.concatenate(
+            [scale.astype('<f4').view(np.uint8).reshape(n, 4), codes.view(np.uint8)], axis=1
+        )
+    if encoding == 'binary':
+        return np.packbits(matrix > 0, axis=1)
+    raise ValueError(f"Invalid encoding. Must be one of: {ENCODINGS}")
+
+
+def decode_matrix(codes: "np.ndarray", encoding: str, dims: int) -> "np.ndarray":
+    """Decode (n, code_size) uint8 codes to approximate float32 rows."""
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    n = codes.shape[0]
+    if encoding == 'float32':
+        return codes.view('<f4').reshape(n, dims).astype(np.float32)
+    if encoding == 'float16':
+        return codes.view('<f2').reshape(n, dims).astype(np.float32)
+    if encoding == 'int8':
+        scale = np.ascontiguousarray(codes[:, :4]).view('<f4').reshape(n)
+        return codes[:, 4:4 + dims].view(np.int8).astype(np.float32) * scale[:, None]
+    if encoding == 'binary':
+        signs = np.unpackbits(codes, axis=1, count=dims).astype(np.float32)
+        return (signs * 2 - 1) / np.sqrt(dims)
+    raise ValueError(f"Invalid encoding. Must be one of: {ENCODINGS}")
+
+
+# Set bits per byte value, for Hamming distance over packed sign codes
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16) if HAS_NUMPY else None
+
+
+def approximate_scores(codes: "np.ndarray", encoding: str, dims: int, query: "np.ndarray") -> "np.ndarray":
+    """
+    First-stage similarity of a unit query against every encoded row.
+
+    float16/int8 give approximate cosine (rows were normalized before
+    encoding); binary gives 1 - 2 * hamming / dims, which orders rows by the
+    angle estimate from their sign agreement.
+    """
+    n = codes.shape[0]
+    scores = np.empty(n, dtype=np.float32)
+
+    if encoding == 'binary':
+        packed_query = np.packbits(np.asarray(query) > 0)
+        for start in range(0, n, SCAN_CHUNK_ROWS):
+            chunk = np.asarray(codes[start:start + SCAN_CHUNK_ROWS])
+            hamming = _POPCOUNT[np.bitwise_xor(chunk, packed_query)].sum(axis=1)
+            scores[start:start + len(chunk)] = 1 - 2 * hamming / dims
+        return scores
+
+    q = np.asarray(query, dtype=np.float32)
+    for start in range(0, n, SCAN_CHUNK_ROWS):
+        chunk = decode_matrix(codes[start:start + SCAN_CHUNK_ROWS], encoding, dims)
+        scores[start:start + len(chunk)] = chunk @ q
+    return scores
+
+
+def shortlist(scores: "np.ndarray", size: int) -> "np.ndarray":
+    """Row indices of the `size` best first-stage scores (unordered)."""
+    candidates = np.flatnonzero(scores > -np.inf)
+    if candidates.shape[0] > size:
+        candidates = candidates[np.argpartition(-scores[candidates], size - 1)[:size]]
+    return candidates
+
+
+def measure_recall(
+    matrix: "np.ndarray",
+    encodings: Sequence[str] = ('float16', 'int8', 'binary'),
+    k: int = 10,
+    sample: int = 50,
+    rescore_factor: int = RESCORE_FACTOR,
+    max_rows: int = 20000
+) -> Dict[str, Any]:
+    """
+    Recall@k of quantized search against exact float32 search.
+
+    Uses up to `sample` stored vectors (evenly spaced rows) as queries over
+    at most `max_rows` evenly spaced rows, which keeps the cost bounded on
+    large indexes.
+
+    Args:
+        matrix: Normalized float32 rows (e.g. the memory.vec matrix)
+        encodings: Encodings to evaluate
+        k: Results compared per query
+        sample: Number of query rows
+        rescore_factor: Shortlist size as a multiple of k
+        max_rows: Largest corpus evaluated
+
+    Returns:
+        dict of encoding -> bytes_per_vector, compression, first-stage and rescored recall
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return {}
+    if n > max_rows:
+        matrix = matrix[np.linspace(0, n - 1, num=max_rows).astype(np.int64)]
+        n = max_rows
+    matrix = np.asarray(matrix, dtype=np.float32)
+    dims = matrix.shape[1]
+    k = min(k, n)
+    query_rows = np.linspace(0, n - 1, num=min(sample, n)).astype(np.int64)
+    queries = np.asarray(matrix[query_rows], dtype=np.float32)
+
+    exact: List[set] = []
+    for q in queries:
+        exact.append(set(shortlist(np.asarray(matrix @ q, dtype=np.float32), k).tolist()))
+
+    report = {}
+    for encoding in encodings:
+        codes = encode_matrix(matrix, encoding)
+        first_hits = 0
+        rescored_hits = 0
+        for q, truth in zip(queries, exact):
+            approx = approximate_scores(codes, encoding, dims, q)
+            first_hits += len(truth & set(shortlist(approx, k).tolist()))
+            rows = shortlist(approx, k * rescore_factor)
+            rescored = rows[shortlist(np.asarray(matrix[rows] @ q, dtype=np.float32), k)]
+            rescored_hits += len(truth & set(rescored.tolist()))
+        total = k * len(queries)
+        report[encoding] = {
+            "bytes_per_vector": code_size(encoding, dims),
+            "compression": round(code_size('float32', dims) / code_size(encoding, dims), 1),
+            f"recall_at_{k}_first_stage": round(first_hits / total, 4),
+            f"recall_at_{k}_rescored": round(rescored_hits / total, 4)
+        }
+    return report
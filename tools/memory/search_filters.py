@@ -0,0 +1,255 @@
+"""
+Tool: Search Filters
+Purpose: Metadata filter expressions for memory search, compiled to SQL and id sets
+
+A filter is a dict (or the string form below) over memory_entries metadata:
+- type:            'fact' or ['fact', 'event']
+- source:          'user' or ['user', 'session']
+- tags:            entries carrying any of these tags
+- tags_all:        entries carrying every one of these tags
+- min_importance / max_importance: inclusive bounds (1-10)
+- created_after:   created_at >= this date/datetime
+- created_before:  created_at < this date/datetime
+- include_expired: keep entries past expires_at (default False, as list_entries)
+
+String form (CLI --filter), space-separated clauses:
+    type=fact,event source=user tag=python,sqlite tags_all=a,b
+    importance>=5 importance<=8 created>=2026-01-01 created<2026-02-01 expired=include
+
+compile_filter() turns a filter into WHERE conditions; matching_ids() runs
+them once per query to get the eligible id set. semantic_search scores only
+the matrix rows of those ids when the set is a small slice of the index
+(otherwise it masks a full scan with an id bitmap), and hybrid_search
+restricts BM25 postings to the same set, so narrow filters never load or
+score the rest of the corpus.
+
+Used by semantic_search.py and hybrid_search.py.
+
+Dependencies:
+    - sqlite3 (stdlib)
+
+Output:
+    SQL conditions and entry id sets (library module)
+"""
+
+import re
+import sys
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from memory_db import VALID_TYPES, VALID_SOURCES, NOT_EXPIRED, EXPIRED_IDS_SQL, normalize_tags, tag_condition
+
+FILTER_KEYS = [
+    'type', 'source', 'tags', 'tags_all', 'min_importance', 'max_importance',
+    'created_after', 'created_before', 'include_expired'
+]
+
+# Keys that narrow the corpus beyond the default active + unexpired set
+RESTRICTIVE_KEYS = [key for key in FILTER_KEYS if key != 'include_expired']
+
+# key, operator, value  (e.g. "importance>=5", "type=fact,event")
+_CLAUSE_RE = re.compile(r'^(\w+)\s*(>=|<=|>|<|=)\s*(.+)$')
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(',') if part.strip()]
+    return [str(part) for part in value]
+
+
+def _as_timestamp(value: str) -> str:
+    """Validate a date/datetime and format it like created_at (YYYY-MM-DD HH:MM:SS)."""
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD or an ISO datetime)")
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _after(value: str) -> str:
+    """
+    First timestamp past a date or datetime: the next day for a date, the next
+    second for a datetime (turns <= into < and > into >=).
+    """
+    parsed = datetime.fromisoformat(_as_timestamp(value))
+    step = timedelta(days=1) if len(value.strip()) == 10 else timedelta(seconds=1)
+    return (parsed + step).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_filter(expression: str) -> Dict[str, Any]:
+    """
+    Parse the string form of a filter.
+
+    Args:
+        expression: Space-separated clauses, e.g. "type=fact importance>=5"
+
+    Returns:
+        Normalized filter dict
+
+    Raises:
+        ValueError: on an unknown key, operator or value
+    """
+    filters: Dict[str, Any] = {}
+    for clause in expression.split():
+        match = _CLAUSE_RE.match(clause)
+        if not match:
+            raise ValueError(f"Invalid filter clause: {clause!r}")
+        key, op, value = match.groups()
+
+        if key in ('type', 'source', 'tags', 'tag', 'tags_all') and op == '=':
+            filters['tags' if key == 'tag' else key] = _as_list(value)
+        elif key == 'importance' and not value.lstrip('-').isdigit():
+            raise ValueError(f"Invalid filter clause: {clause!r} (importance must be an integer)")
+        elif key == 'importance' and op in ('>=', '>', '='):
+            filters['min_importance'] = int(value) + (1 if op == '>' else 0)
+            if op == '=':
+                filters['max_importance'] = int(value)
+        elif key == 'importance' and op in ('<=', '<'):
+            filters['max_importance'] = int(value) - (1 if op == '<' else 0)
+        elif key == 'created' and op in ('>=', '>'):
+            filters['created_after'] = value if op == '>=' else _after(value)
+        elif key == 'created' and op in ('<', '<='):
+            filters['created_before'] = value if op == '<' else _after(value)
+        elif key == 'expired' and op == '=' and value in ('include', 'exclude'):
+            filters['include_expired'] = value == 'include'
+        else:
+            raise ValueError(f"Invalid filter clause: {clause!r}")
+    return normalize_filter(filters)
+
+
+def normalize_filter(filters: Optional[Dict[str, Any]], entry_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate a filter dict and fold in a legacy entry_type argument.
+
+    Raises:
+        ValueError: on an unknown key or invalid value
+    """
+    result: Dict[str, Any] = {}
+    for key, value in (filters or {}).items():
+        if key not in FILTER_KEYS:
+            raise ValueError(f"Invalid filter key {key!r}. Must be one of: {FILTER_KEYS}")
+        if value is None:
+            continue
+        if key == 'type':
+            value = _as_list(value)
+            invalid = [t for t in value if t not in VALID_TYPES]
+            if invalid:
+                raise ValueError(f"Invalid type. Must be one of: {VALID_TYPES}")
+        elif key == 'source':
+            value = _as_list(value)
+            invalid = [s for s in value if s not in VALID_SOURCES]
+            if invalid:
+                raise ValueError(f"Invalid source. Must be one of: {VALID_SOURCES}")
+        elif key in ('tags', 'tags_all'):
+            value = normalize_tags(value)
+        elif key in ('min_importance', 'max_importance'):
+            value = int(value)
+        elif key in ('created_after', 'created_before'):
+            value = _as_timestamp(value)
+        elif key == 'include_expired':
+            value = bool(value)
+        result[key] = value
+
+    if entry_type:
+        types = result.get('type')
+        if types is not None and entry_type not in types:
+            # Both given and disjoint: nothing can match
+            result['type'] = []
+        else:
+            result['type'] = [entry_type]
+            if entry_type not in VALID_TYPES:
+                raise ValueError(f"Invalid type. Must be one of: {VALID_TYPES}")
+    return result
+
+
+def is_restrictive(filters: Dict[str, Any]) -> bool:
+    """True if the filter narrows the corpus beyond active, unexpired entries."""
+    return any(key in filters for key in RESTRICTIVE_KEYS)
+
+
+def compile_filter(filters: Dict[str, Any], alias: str = '') -> Tuple[List[str], List[Any]]:
+    """
+    Compile a normalized filter to SQL conditions over memory_entries.
+
+    Always includes is_active = 1, and the expiry check unless
+    include_expired is set.
+
+    Args:
+        filters: Normalized filter (normalize_filter / parse_filter)
+        alias: Table alias for memory_entries (e.g. 'e'), or '' for none
+
+    Returns:
+        (conditions to AND together, parameters)
+    """
+    a = f'{alias}.' if alias else ''
+    conditions = [f'{a}is_active = 1']
+    params: List[Any] = []
+
+    if not filters.get('include_expired'):
+        conditions.append(NOT_EXPIRED.format(alias=a))
+
+    for key, column in (('type', 'type'), ('source', 'source')):
+        if key in filters:
+            values = filters[key]
+            if not values:
+                conditions.append('0')
+                continue
+            conditions.append(f'{a}{column} IN ({",".join("?" * len(values))})')
+            params.extend(values)
+
+    # Tags resolve through the memory_tags index (seeks on tag)
+    if 'tags' in filters:
+        if not filters['tags']:
+            conditions.append('0')
+        else:
+            condition, tag_params = tag_condition(filters['tags'], column=f'{a}id')
+            conditions.append(condition)
+            params.extend(tag_params)
+
+    for tag in filters.get('tags_all') or []:
+        condition, tag_params = tag_condition(tag, column=f'{a}id')
+        conditions.append(condition)
+        params.extend(tag_params)
+
+    if 'min_importance' in filters:
+        conditions.append(f'{a}importance >= ?')
+        params.append(filters['min_importance'])
+    if 'max_importance' in filters:
+        conditions.append(f'{a}importance <= ?')
+        params.append(filters['max_importance'])
+    if 'created_after' in filters:
+        conditions.append(f'{a}created_at >= ?')
+        params.append(filters['created_after'])
+    if 'created_before' in filters:
+        conditions.append(f'{a}created_at < ?')
+        params.append(filters['created_before'])
+
+    return conditions, params
+
+
+def matching_ids(cursor: sqlite3.Cursor, filters: Dict[str, Any], embedded_only: bool = False) -> List[int]:
+    """
+    IDs of entries passing a filter (the prefilter id set).
+
+    Args:
+        cursor: Database cursor
+        filters: Normalized filter
+        embedded_only: Only entries with an active embedding
+
+    Returns:
+        Matching entry IDs
+    """
+    conditions, params = compile_filter(filters)
+    if embedded_only:
+        conditions.insert(0, 'embedding_model IS NOT NULL')
+    cursor.execute(f'SELECT id FROM memory_entries WHERE {" AND ".join(conditions)}', params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def expired_ids(cursor: sqlite3.Cursor) -> Set[int]:
+    """Active entries past expires_at (usually a handful; served by idx_memory_expiring)."""
+    cursor.execute(EXPIRED_IDS_SQL)
+    return {row[0] for row in cursor.fetchall()}
@@ -7,19 +7,44 @@ This implements Moltbot-style semantic memory search:
 - Find most similar memories using cosine similarity
 - Return ranked results with similarity scores
 
+Scoring runs through vector_engine.VectorEngine (one float32 matrix-vector
+product plus argpartition top-k) when numpy is available, with the
+pure-Python cosine_similarity loop as a fallback. Vectors are read from the
+memory-mapped index file maintained by vector_index.py.
+
+With MEMORY_VECTOR_ENCODING set (float16, int8 or binary), exact search runs
+in two stages: the compact scan codes kept by vector_index.py are scored to
+shortlist MEMORY_RESCORE_FACTOR x limit candidates, which are then rescored
+against the full-precision rows (search_mode "quantized"). --exact skips it.
+
+Metadata filters (--filter, see search_filters.py) are applied before any
+scoring: they compile to one SQL query for the eligible id set, and when that
+set is at most PREFILTER_FRACTION of the index only its rows are scored
+(search_mode "filtered"); larger sets mask a full scan with an id bitmap.
+Expired entries are left out unless the filter says expired=include.
+
 Usage:
     python tools/memory/semantic_search.py --query "image generation preferences"
     python tools/memory/semantic_search.py --query "what tools do I use" --limit 10
     python tools/memory/semantic_search.py --query "meeting notes" --type event
     python tools/memory/semantic_search.py --query "learned behavior" --threshold 0.7
+    python tools/memory/semantic_search.py --query "meeting notes" --nprobe 16   # ANN recall knob
+    python tools/memory/semantic_search.py --query "meeting notes" --exact       # Skip ANN / quantized scan
+    python tools/memory/semantic_search.py --query "deploy steps" --filter "source=user tag=infra importance>=6"
+    python tools/memory/semantic_search.py --query "standup" --filter "created>=2026-01-01 created<2026-02-01"
 
 Dependencies:
-    - openai (for query embedding)
+    - openai (for query embedding with the default provider)
     - numpy (for cosine similarity)
     - sqlite3 (stdlib)
 
 Env Vars:
-    - OPENAI_API_KEY (required)
+    - OPENAI_API_KEY (required for the openai provider)
+    - MEMORY_EMBEDDING_PROVIDER (optional, openai (default), hashing or sentence-transformers)
+    - MEMORY_ANN_INDEX (optional, "ivf" to probe the IVF index from ann_index.py)
+    - MEMORY_ANN_NPROBE (optional, default lists probed per query)
+    - MEMORY_VECTOR_ENCODING (optional, float16/int8/binary scan codes for two-stage search)
+    - MEMORY_RESCORE_FACTOR (optional, two-stage shortlist size as a multiple of the limit)
 
 Output:
     JSON with ranked results and similarity scores
@@ -41,12 +66,23 @@ load_dotenv()
 # Import from sibling modules
 sys.path.insert(0, str(Path(__file__).parent))
 try:
-    from embed_memory import generate_embedding, bytes_to_embedding, get_openai_client
-    from memory_db import get_connection
+    from embed_memory import generate_embedding, bytes_to_embedding, get_openai_client, EMBEDDING_MODEL
+    from memory_db import connection, get_connection, get_tags, EMBEDDING_JOIN, OTHER_MODELS_SQL
+    from quantization import decode_vector, approximate_scores, shortlist, RESCORE_FACTOR
+    from vector_engine import VectorEngine, HAS_NUMPY, top_k, normalize_vector
+    from search_filters import normalize_filter, parse_filter, compile_filter, matching_ids
+    if HAS_NUMPY:
+        import numpy as np
+        import vector_index
+        import ann_index
 except ImportError as e:
     print(f"Error importing modules: {e}", file=sys.stderr)
     sys.exit(1)
 
+# Eligible sets up to this fraction of the index are scored as a row slice
+# (gather + small matmul); larger ones are cheaper as a masked full scan
+PREFILTER_FRACTION = 0.2
+
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
@@ -74,50 +110,444 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
 
 def get_all_embeddings(
     entry_type: Optional[str] = None,
-    active_only: bool = True
+    active_only: bool = True,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     Get all memory entries with embeddings.
 
     Args:
         entry_type: Optional type filter
-        active_only: Only get active entries
+        active_only: Only get active, unexpired entries passing `filters`
+        filters: Optional metadata filter (see search_filters.py)
 
     Returns:
         List of entries with their embeddings
     """
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        if active_only:
+            conditions, params = compile_filter(normalize_filter(filters, entry_type), alias='e')
+        else:
+            conditions = ['1 = 1']
+            params = []
+            if entry_type:
+                conditions.append('e.type = ?')
+                params.append(entry_type)
+
+        where_clause = ' AND '.join(conditions)
+
+        cursor.execute(f'''
+            SELECT e.id, e.type, e.content, e.source, e.importance, v.vector AS embedding, v.dtype AS embedding_dtype,
+                   e.embedding_model, e.created_at
+            FROM memory_entries e
+            {EMBEDDING_JOIN}
+            WHERE {where_clause}
+            ORDER BY e.importance DESC
+        ''', params)
+
+        entries = []
+        for row in cursor.fetchall():
+            entry = dict(row)
+            # Convert embedding bytes (any storage dtype) to list
+            dtype = entry.pop('embedding_dtype', None)
+            if entry['embedding']:
+                entry['embedding'] = bytes_to_embedding(decode_vector(entry['embedding'], dtype))
+            entries.append(entry)
+    return entries
+
+
+def load_vector_engine(
+    entry_type: Optional[str] = None,
+    active_only: bool = True
+) -> VectorEngine:
+    """
+    Load all embedded entries into a vectorized similarity engine.
+
+    Embedding BLOBs are copied straight into one float32 matrix instead of
+    being unpacked into Python lists.
+
+    Args:
+        entry_type: Optional type filter
+        active_only: Only load active entries
+
+    Returns:
+        VectorEngine with row metadata (id, type, content, source, importance, created_at)
+    """
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+
+        conditions = ['1 = 1']
+        params = []
+
+        if active_only:
+            conditions.append('e.is_active = 1')
+
+        if entry_type:
+            conditions.append('e.type = ?')
+            params.append(entry_type)
+
+        where_clause = ' AND '.join(conditions)
 
-    conditions = ['embedding IS NOT NULL']
-    params = []
+        cursor.execute(f'''
+            SELECT e.id, e.type, e.content, e.source, e.importance, v.vector AS embedding, v.dtype AS embedding_dtype, e.created_at
+            FROM memory_entries e
+            {EMBEDDING_JOIN}
+            WHERE {where_clause}
+            ORDER BY e.importance DESC
+        ''', params)
 
-    if active_only:
-        conditions.append('is_active = 1')
+        return VectorEngine.from_rows(dict(row) for row in cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def _eligible_ids(
+    cursor,
+    entry_type: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[int]:
+    """IDs of active, unexpired entries that have embeddings and pass the filters (no BLOB decoding)."""
+    return matching_ids(cursor, normalize_filter(filters, entry_type), embedded_only=True)
+
+
+def _space_error(model: str, dims: int, others: Dict[Tuple[str, int], int]) -> str:
+    found = ', '.join(f"{count} from {m} at {d} dims" for (m, d), count in sorted(others.items()))
+    return (
+        f"Query embedding is {model} at {dims} dims but stored embeddings differ ({found}); "
+        "run embed_memory.py --reindex to re-embed with the configured provider"
+    )
+
+
+def _has_other_models(cursor, model: str) -> bool:
+    """Cheap probe (two seeks on idx_memory_embedded_expiry) for active vectors from another model."""
+    cursor.execute(OTHER_MODELS_SQL, (model, model))
+    return bool(cursor.fetchone()[0])
+
+
+def _check_embedding_space(
+    cursor,
+    model: str,
+    dims: int,
+    entry_type: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Refuse to rank across embedding models or sizes.
+
+    Raises ValueError if any eligible entry's active vector comes from a
+    different model or has a different size than the query (e.g. the
+    provider or MEMORY_EMBEDDING_DIMENSIONS changed without a reindex),
+    instead of silently scoring incomparable vectors or leaving entries out.
+    """
+    conditions, params = compile_filter(normalize_filter(filters, entry_type), alias='e')
 
-    if entry_type:
-        conditions.append('type = ?')
-        params.append(entry_type)
+    cursor.execute(f'''
+        SELECT e.embedding_model, v.dims, COUNT(*) AS count
+        FROM memory_entries e
+        {EMBEDDING_JOIN}
+        WHERE {" AND ".join(conditions)}
+        GROUP BY e.embedding_model, v.dims
+    ''', params)
+    others = {
+        (row['embedding_model'], row['dims']): row['count']
+        for row in cursor.fetchall()
+        if (row['embedding_model'], row['dims']) != (model, dims)
+    }
+    if others:
+        raise ValueError(_space_error(model, dims, others))
 
-    where_clause = ' AND '.join(conditions)
 
+def _check_entry_space(model: str, dims: int, entries: List[Dict[str, Any]]) -> None:
+    """_check_embedding_space for already-loaded entries (pure-Python path)."""
+    others: Dict[Tuple[str, int], int] = {}
+    for entry in entries:
+        key = (entry['embedding_model'], len(entry['embedding']))
+        if key != (model, dims):
+            others[key] = others.get(key, 0) + 1
+    if others:
+        raise ValueError(_space_error(model, dims, others))
+
+
+def _fetch_rows(cursor, entry_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch result metadata for the given IDs only (tags from the memory_tags index)."""
+    if not entry_ids:
+        return {}
+    placeholders = ','.join('?' * len(entry_ids))
     cursor.execute(f'''
-        SELECT id, type, content, source, importance, embedding, created_at, tags
+        SELECT id, type, content, source, importance, created_at
         FROM memory_entries
-        WHERE {where_clause}
-        ORDER BY importance DESC
-    ''', params)
+        WHERE id IN ({placeholders})
+    ''', entry_ids)
+    rows = {row['id']: dict(row) for row in cursor.fetchall()}
+    tags = get_tags(cursor, list(rows))
+    for entry_id, row in rows.items():
+        row['tags'] = tags.get(entry_id)
+    return rows
 
-    entries = []
-    for row in cursor.fetchall():
-        entry = dict(row)
-        # Convert embedding bytes to list
-        if entry['embedding']:
-            entry['embedding'] = bytes_to_embedding(entry['embedding'])
-        entries.append(entry)
 
-    conn.close()
-    return entries
+def open_vector_engine(eligible_ids: List[int], entry_type: Optional[str] = None) -> VectorEngine:
+    """
+    Open the memory-mapped vector index (data/memory.vec).
+
+    Rebuilds the index from memory.db if it is missing any eligible entry,
+    and falls back to an in-memory DB scan if it still cannot cover them
+    (e.g. read-only data directory or mixed embedding sizes).
+    """
+    engine = vector_index.open_index()
+    if engine is None or not engine.contains(eligible_ids):
+        try:
+            vector_index.rebuild_index()
+        except OSError:
+            pass
+        engine = vector_index.open_index()
+    if engine is None or not engine.contains(eligible_ids):
+        engine = load_vector_engine(entry_type=entry_type)
+    return engine
+
+
+def _approximate_scores(
+    engine: VectorEngine,
+    query_embedding: List[float],
+    allowed_ids: List[int],
+    rows: Optional["np.ndarray"] = None
+) -> Optional["np.ndarray"]:
+    """
+    First-stage scores from the index's scan codes, ineligible rows at -inf.
+
+    With `rows` (a prefiltered slice), only those rows' codes are scored and
+    the result is aligned with `rows`.
+
+    Returns None when two-stage search is off or the codes cannot be matched
+    to `engine` (e.g. the in-memory DB-scan fallback).
+    """
+    encoding = vector_index.scan_encoding()
+    if encoding is None:
+        return None
+    codes = vector_index.open_codes(engine, encoding)
+    if codes is None:
+        return None
+
+    q = normalize_vector(query_embedding)
+    if q.shape[0] != engine.dimensions:
+        raise ValueError("Vectors must have same length")
+    if rows is not None:
+        return approximate_scores(codes[rows], encoding, engine.dimensions, q)
+    scores = approximate_scores(codes, encoding, engine.dimensions, q)
+    scores[~np.isin(engine.ids, np.asarray(allowed_ids, dtype=np.int64))] = -np.inf
+    return scores
+
+
+def _rescore(
+    engine: VectorEngine,
+    query_embedding: List[float],
+    approx: "np.ndarray",
+    limit: int,
+    threshold: float,
+    rows: Optional["np.ndarray"] = None
+) -> Tuple[List[Tuple[int, float]], int]:
+    """Second stage: exact similarity over the best RESCORE_FACTOR x limit rows."""
+    candidates = shortlist(approx, max(limit, 1) * RESCORE_FACTOR)
+    if rows is not None:
+        candidates = rows[candidates]
+    return engine.search(query_embedding, limit=limit, threshold=threshold, candidate_rows=candidates)
+
+
+def _rank(
+    engine: VectorEngine,
+    query_embedding: List[float],
+    limit: int,
+    threshold: float,
+    allowed_ids: List[int],
+    nprobe: Optional[int] = None,
+    exact: bool = False
+) -> Tuple[List[Tuple[int, float]], int, str]:
+    """
+    Rank eligible entries, probing the IVF index first when enabled.
+
+    Falls back to the two-stage quantized scan (if configured) or an exact
+    scan if ANN is disabled/stale or its shortlist yields fewer than `limit`
+    results.
+
+    Returns:
+        (ranked (id, similarity) pairs, count above threshold, search mode)
+    """
+    if not exact and ann_index.ann_enabled():
+        rows = ann_index.candidate_rows(engine, query_embedding, nprobe)
+        if rows is not None:
+            ranked, above = engine.search(
+                query_embedding, limit=limit, threshold=threshold,
+                allowed_ids=allowed_ids, candidate_rows=rows
+            )
+            if len(ranked) >= limit:
+                return ranked, above, "ann"
+
+    if not exact:
+        approx = _approximate_scores(engine, query_embedding, allowed_ids)
+        if approx is not None:
+            ranked, above = _rescore(engine, query_embedding, approx, limit, threshold)
+            return ranked, above, "quantized"
+
+    ranked, above = engine.search(query_embedding, limit=limit, threshold=threshold, allowed_ids=allowed_ids)
+    return ranked, above, "exact"
+
+
+class EmbeddingRanking:
+    """
+    One query's similarity ranking, computed once and sliced on demand.
+
+    top(k) can be called with growing k (e.g. adaptive candidate pools in
+    hybrid_search) without re-scoring the corpus on the exact path; the
+    quantized path keeps its first-stage scores and rescores a fresh
+    shortlist per call, and the ANN path re-probes the IVF lists.
+
+    Filters narrow the eligible set before scoring. A set that is a small
+    slice of the index is scored row by row (self._rows) and never touches
+    the rest of the matrix; ANN is skipped for it, since a shortlist drawn
+    from the whole corpus would hold few eligible rows.
+    """
+
+    def __init__(
+        self,
+        cursor,
+        query_embedding: List[float],
+        threshold: float,
+        entry_type: Optional[str] = None,
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        self.query_embedding = query_embedding
+        self.threshold = threshold
+        self.nprobe = nprobe
+        self.search_mode = "exact"
+        # Set by top(): True when only a shortlist was scored exactly
+        self.shortlisted = False
+        self._engine = None
+        self._scores = None
+        self._approx = None
+        self._rows = None
+        self._sorted: Optional[List[Tuple[int, float]]] = None
+
+        if not HAS_NUMPY:
+            entries = get_all_embeddings(entry_type=entry_type, filters=filters)
+            _check_entry_space(EMBEDDING_MODEL, len(query_embedding), entries)
+            self.total = len(entries)
+            scored = [
+                (entry['id'], cosine_similarity(query_embedding, entry['embedding']))
+                for entry in entries
+            ]
+            self._sorted = sorted(
+                [item for item in scored if item[1] >= threshold],
+                key=lambda x: x[1], reverse=True
+            )
+            return
+
+        self.eligible = _eligible_ids(cursor, entry_type=entry_type, filters=filters)
+        self.total = len(self.eligible)
+        if not self.eligible:
+            return
+        self._engine = open_vector_engine(self.eligible, entry_type=entry_type)
+        # An index that covers every eligible entry is a single size; check the
+        # database when the size differs, the index could not cover them, or
+        # another model's vectors are active
+        if (
+            self._engine.dimensions != len(query_embedding)
+            or self._engine.generation is None
+            or _has_other_models(cursor, EMBEDDING_MODEL)
+        ):
+            _check_embedding_space(
+                cursor, EMBEDDING_MODEL, len(query_embedding), entry_type=entry_type, filters=filters
+            )
+        if self.total <= PREFILTER_FRACTION * len(self._engine):
+            # Prefiltered slice: score only the eligible rows
+            self._rows = self._engine.rows_for(self.eligible)
+            self.search_mode = "filtered"
+            if not exact:
+                self._approx = _approximate_scores(self._engine, query_embedding, self.eligible, rows=self._rows)
+            if self._approx is None:
+                q = normalize_vector(query_embedding)
+                if q.shape[0] != self._engine.dimensions:
+                    raise ValueError("Vectors must have same length")
+                self._scores = np.asarray(self._engine.matrix[self._rows] @ q, dtype=np.float32)
+            return
+
+        self._use_ann = not exact and ann_index.ann_enabled()
+        if not self._use_ann:
+            if not exact:
+                self._approx = _approximate_scores(self._engine, query_embedding, self.eligible)
+            if self._approx is not None:
+                self.search_mode = "quantized"
+                return
+            scores = self._engine.scores(query_embedding)
+            scores[~np.isin(self._engine.ids, np.asarray(self.eligible, dtype=np.int64))] = -np.inf
+            self._scores = scores
+
+    def top(self, k: int) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        The k most similar eligible entries.
+
+        Returns:
+            ([(entry_id, similarity), ...], count above threshold); on the
+            quantized and ANN paths (self.shortlisted) the count covers only
+            the shortlisted rows that were scored exactly
+        """
+        if self._sorted is not None:
+            return self._sorted[:k], len(self._sorted)
+        if self._engine is None:
+            return [], 0
+        if self._approx is not None:
+            self.shortlisted = True
+            return _rescore(self._engine, self.query_embedding, self._approx, k, self.threshold, rows=self._rows)
+        if self._scores is None:
+            ranked, above, self.search_mode = _rank(
+                self._engine, self.query_embedding, k, self.threshold, self.eligible, nprobe=self.nprobe
+            )
+            self.shortlisted = self.search_mode in ("ann", "quantized")
+            return ranked, above
+        indices, above = top_k(self._scores, k, self.threshold)
+        ids = self._engine.ids if self._rows is None else self._engine.ids[self._rows]
+        return [(int(ids[i]), float(self._scores[i])) for i in indices], above
+
+
+def rank_by_embedding(
+    cursor,
+    query_embedding: List[float],
+    limit: int,
+    threshold: float,
+    entry_type: Optional[str] = None,
+    nprobe: Optional[int] = None,
+    exact: bool = False,
+    filters: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Tuple[int, float]], int, int, str, bool]:
+    """
+    Rank embedded entries against a query vector on an open connection.
+
+    Returns:
+        (ranked (id, similarity) pairs, entries searched, count above
+        threshold, search mode, whether that count covers only a shortlist)
+    """
+    ranking = EmbeddingRanking(
+        cursor, query_embedding, threshold,
+        entry_type=entry_type, nprobe=nprobe, exact=exact, filters=filters
+    )
+    ranked, above = ranking.top(limit)
+    return ranked, ranking.total, above, ranking.search_mode, ranking.shortlisted
+
+
+def _format_result(entry: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+    return {
+        "id": entry['id'],
+        "type": entry['type'],
+        "content": entry['content'],
+        "source": entry['source'],
+        "importance": entry['importance'],
+        "similarity": round(similarity, 4),
+        "created_at": entry['created_at'],
+        "tags": entry['tags']
+    }
 
 
 def semantic_search(
@@ -125,7 +555,10 @@ def semantic_search(
     entry_type: Optional[str] = None,
     limit: int = 10,
     threshold: float = 0.5,
-    client=None
+    client=None,
+    nprobe: Optional[int] = None,
+    exact: bool = False,
+    filters: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Search memories by semantic similarity.
@@ -136,10 +569,18 @@ def semantic_search(
         limit: Maximum results to return
         threshold: Minimum similarity threshold (0-1)
         client: Optional OpenAI client
+        nprobe: IVF lists to probe when ANN is enabled (recall/latency knob)
+        exact: Force exact brute-force scoring even if ANN is enabled
+        filters: Optional metadata filter applied before scoring (see search_filters.py)
 
     Returns:
         dict with ranked results
     """
+    try:
+        filters = normalize_filter(filters, entry_type)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
     # Generate query embedding
     embed_result = generate_embedding(query, client)
     if not embed_result.get('success'):
@@ -147,10 +588,60 @@ def semantic_search(
 
     query_embedding = embed_result['embedding']
 
-    # Get all entries with embeddings
-    entries = get_all_embeddings(entry_type=entry_type)
-
-    if not entries:
+    if HAS_NUMPY:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            try:
+                ranked, total_searched, above_threshold, search_mode, shortlisted = rank_by_embedding(
+                    cursor, query_embedding, limit, threshold,
+                    nprobe=nprobe, exact=exact, filters=filters
+                )
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            if total_searched:
+                rows = _fetch_rows(cursor, [entry_id for entry_id, _ in ranked])
+                results = [
+                    _format_result(rows[entry_id], similarity)
+                    for entry_id, similarity in ranked if entry_id in rows
+                ]
+        finally:
+            conn.close()
+    else:
+        # Get all entries with embeddings
+        entries = get_all_embeddings(filters=filters)
+        try:
+            _check_entry_space(EMBEDDING_MODEL, len(query_embedding), entries)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        total_searched = len(entries)
+
+        # Calculate similarities
+        scored_entries = []
+        for entry in entries:
+            if entry.get('embedding'):
+                similarity = cosine_similarity(query_embedding, entry['embedding'])
+                if similarity >= threshold:
+                    scored_entries.append((entry, similarity))
+
+        # Sort by similarity (descending)
+        scored_entries.sort(key=lambda x: x[1], reverse=True)
+
+        above_threshold = len(scored_entries)
+        page = scored_entries[:limit]
+        conn = get_connection()
+        try:
+            tags = get_tags(conn.cursor(), [entry['id'] for entry, _ in page])
+        finally:
+            conn.close()
+        results = [
+            _format_result({**entry, 'tags': tags.get(entry['id'])}, similarity)
+            for entry, similarity in page
+        ]
+        search_mode = "exact"
+        shortlisted = False
+
+    if not total_searched:
         return {
             "success": True,
             "query": query,
@@ -158,37 +649,17 @@ def semantic_search(
             "message": "No entries with embeddings found"
         }
 
-    # Calculate similarities
-    scored_entries = []
-    for entry in entries:
-        if entry.get('embedding'):
-            similarity = cosine_similarity(query_embedding, entry['embedding'])
-            if similarity >= threshold:
-                scored_entries.append({
-                    "id": entry['id'],
-                    "type": entry['type'],
-                    "content": entry['content'],
-                    "source": entry['source'],
-                    "importance": entry['importance'],
-                    "similarity": round(similarity, 4),
-                    "created_at": entry['created_at'],
-                    "tags": json.loads(entry['tags']) if entry['tags'] else None
-                })
-
-    # Sort by similarity (descending)
-    scored_entries.sort(key=lambda x: x['similarity'], reverse=True)
-
-    # Limit results
-    results = scored_entries[:limit]
-
     return {
         "success": True,
         "query": query,
         "results": results,
-        "total_searched": len(entries),
-        "above_threshold": len(scored_entries),
+        "total_searched": total_searched,
+        # Two-stage and ANN search only score a shortlist exactly, so the
+        # count cannot stand for every entry above the threshold
+        "shortlist_above_threshold" if shortlisted else "above_threshold": above_threshold,
         "returned": len(results),
         "threshold": threshold,
+        "search_mode": search_mode,
         "tokens_used": embed_result['usage']['total_tokens']
     }
 
@@ -209,49 +680,81 @@ def find_similar(
     Returns:
         dict with similar entries
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Get source entry embedding
-    cursor.execute('SELECT content, embedding FROM memory_entries WHERE id = ?', (entry_id,))
-    row = cursor.fetchone()
-
-    if not row:
-        conn.close()
-        return {"success": False, "error": f"Entry {entry_id} not found"}
-
-    if not row['embedding']:
-        conn.close()
-        return {"success": False, "error": f"Entry {entry_id} has no embedding"}
-
-    source_embedding = bytes_to_embedding(row['embedding'])
-    source_content = row['content']
-    conn.close()
-
-    # Get all other entries
-    entries = get_all_embeddings()
-
-    # Calculate similarities (excluding source)
-    scored = []
-    for entry in entries:
-        if entry['id'] != entry_id and entry.get('embedding'):
-            similarity = cosine_similarity(source_embedding, entry['embedding'])
-            if similarity >= threshold:
-                scored.append({
-                    "id": entry['id'],
-                    "type": entry['type'],
-                    "content": entry['content'],
-                    "similarity": round(similarity, 4)
-                })
-
-    scored.sort(key=lambda x: x['similarity'], reverse=True)
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        # Get source entry embedding
+        cursor.execute(f'''
+            SELECT e.content, e.embedding_model, v.vector AS embedding, v.dtype AS embedding_dtype
+            FROM memory_entries e
+            LEFT {EMBEDDING_JOIN}
+            WHERE e.id = ?
+        ''', (entry_id,))
+        row = cursor.fetchone()
+
+        if not row:
+            return {"success": False, "error": f"Entry {entry_id} not found"}
+
+        if not row['embedding']:
+            return {"success": False, "error": f"Entry {entry_id} has no embedding"}
+
+        source_embedding = bytes_to_embedding(decode_vector(row['embedding'], row['embedding_dtype']))
+        source_content = row['content']
+        source_model = row['embedding_model']
+
+        if HAS_NUMPY:
+            eligible = [other_id for other_id in _eligible_ids(cursor) if other_id != entry_id]
+            engine = open_vector_engine(eligible)
+            try:
+                if (
+                    engine.dimensions != len(source_embedding)
+                    or engine.generation is None
+                    or _has_other_models(cursor, source_model)
+                ):
+                    _check_embedding_space(cursor, source_model, len(source_embedding))
+                ranked, _ = engine.search(source_embedding, limit=limit, threshold=threshold, allowed_ids=eligible)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            rows = _fetch_rows(cursor, [other_id for other_id, _ in ranked])
+
+    if HAS_NUMPY:
+        scored = [{
+            "id": other_id,
+            "type": rows[other_id]['type'],
+            "content": rows[other_id]['content'],
+            "similarity": round(similarity, 4)
+        } for other_id, similarity in ranked if other_id in rows]
+        total_compared = len(eligible)
+    else:
+        # Get all other entries
+        entries = get_all_embeddings()
+        try:
+            _check_entry_space(source_model, len(source_embedding), entries)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+        # Calculate similarities (excluding source)
+        scored = []
+        for entry in entries:
+            if entry['id'] != entry_id and entry.get('embedding'):
+                similarity = cosine_similarity(source_embedding, entry['embedding'])
+                if similarity >= threshold:
+                    scored.append({
+                        "id": entry['id'],
+                        "type": entry['type'],
+                        "content": entry['content'],
+                        "similarity": round(similarity, 4)
+                    })
+
+        scored.sort(key=lambda x: x['similarity'], reverse=True)
+        total_compared = len(entries) - 1
 
     return {
         "success": True,
         "source_id": entry_id,
         "source_content": source_content,
         "similar_entries": scored[:limit],
-        "total_compared": len(entries) - 1
+        "total_compared": total_compared
     }
 
 
@@ -263,9 +766,21 @@ def main():
     parser.add_argument('--threshold', type=float, default=0.5,
                        help='Minimum similarity threshold (0-1)')
     parser.add_argument('--similar-to', type=int, help='Find entries similar to this ID')
+    parser.add_argument('--nprobe', type=int,
+                       help='IVF lists to probe when MEMORY_ANN_INDEX=ivf (higher = better recall)')
+    parser.add_argument('--exact', action='store_true', help='Force exact search (skip ANN and quantized two-stage search)')
+    parser.add_argument('--filter', help='Metadata filter, e.g. "source=user tag=python importance>=5 created>=2026-01-01"')
 
     args = parser.parse_args()
 
+    filters = None
+    if args.filter:
+        try:
+            filters = parse_filter(args.filter)
+        except ValueError as e:
+            print(f"ERROR {e}")
+            sys.exit(1)
+
     result = None
 
     if args.similar_to:
@@ -280,7 +795,10 @@ def main():
             query=args.query,
             entry_type=args.type,
             limit=args.limit,
-            threshold=args.threshold
+            threshold=args.threshold,
+            nprobe=args.nprobe,
+            exact=args.exact,
+            filters=filters
         )
 
     else:
@@ -0,0 +1,27 @@
+import sys
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+# The memory tools import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "unit: unit tests")
+
+
+@pytest.fixture()
+def memory_db_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator[Path, None, None]:
+    """Point memory_db at an empty database in tmp_path."""
+    import memory_db
+
+    db_path = tmp_path / "memory.db"
+    memory_db.close_pool()
+    monkeypatch.setattr(memory_db, "DB_PATH", db_path)
+    monkeypatch.setattr(memory_db, "_schema_initialized", False)
+    yield db_path
+    # Settle buffered access events before DB_PATH is restored
+    memory_db.access_tracker.flush()
+    memory_db.close_pool()
@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List
+
+import access_log
+import memory_db
+import pytest
+
+
+class FlakyConnect:
+    """memory_db.get_connection that raises 'database is locked' while locked."""
+
+    def __init__(self) -> None:
+        self.locked = False
+
+    def __call__(self):
+        if self.locked:
+            raise sqlite3.OperationalError("database is locked")
+        return memory_db.get_connection()
+
+
+def _access(entry_id: int) -> tuple:
+    with memory_db.connection() as conn:
+        row = conn.execute("SELECT access_count, last_accessed FROM memory_entries WHERE id = ?", (entry_id,)).fetchone()
+        logged = conn.execute("SELECT COUNT(*) FROM memory_access_log WHERE memory_id = ?", (entry_id,)).fetchone()[0]
+    return row["access_count"], row["last_accessed"], logged
+
+
+@pytest.fixture()
+def entry_ids(memory_db_path: Path) -> List[int]:
+    return [memory_db.add_entry(f"entry {i}", entry_type="fact")["entry"]["id"] for i in range(3)]
+
+
+@pytest.mark.unit
+def test_flush_writes_events_and_aggregates_counts(entry_ids: List[int]) -> None:
+    buffer = access_log.AccessLogBuffer(memory_db.get_connection, mode="buffered", flush_interval=3600)
+    first, second, _ = entry_ids
+
+    buffer.record(first, "read")
+    buffer.record_many([first, second], "read", query="q")
+    buffer.record(second, "update")  # logged but not counted as an access
+    assert _access(first)[2] == 0
+
+    assert buffer.flush() == 4
+    assert buffer.flush() == 0
+    count, last_accessed, logged = _access(first)
+    assert (count, logged) == (2, 2)
+    assert last_accessed is not None
+    assert _access(second)[0::2] == (1, 2)
+    assert buffer.stats() == {"mode": "buffered", "pending": 0, "flushed": 4, "dropped": 0}
+
+
+@pytest.mark.unit
+def test_full_batch_wakes_the_flusher_and_runs_maintenance(entry_ids: List[int]) -> None:
+    maintained = threading.Event()
+    buffer = access_log.AccessLogBuffer(
+        memory_db.get_connection, mode="buffered", batch_size=2, flush_interval=3600, maintenance=maintained.set
+    )
+
+    buffer.record(entry_ids[0], "read")
+    buffer.record(entry_ids[1], "read")
+
+    assert maintained.wait(5)
+    assert buffer.stats()["flushed"] == 2
+    assert _access(entry_ids[1])[0::2] == (1, 1)
+
+
+@pytest.mark.unit
+def test_failed_flush_keeps_events_for_retry(entry_ids: List[int]) -> None:
+    connect = FlakyConnect()
+    buffer = access_log.AccessLogBuffer(connect, mode="buffered", flush_interval=3600)
+
+    connect.locked = True
+    buffer.record(entry_ids[0], "read")
+    assert buffer.flush() == 0
+    buffer.record(entry_ids[1], "read")
+    assert buffer.stats()["pending"] == 2
+
+    connect.locked = False
+    assert buffer.flush() == 2
+    assert _access(entry_ids[0])[0::2] == (1, 1)
+    assert _access(entry_ids[1])[0::2] == (1, 1)
+
+
+@pytest.mark.unit
+def test_pending_events_are_capped_while_flushes_fail(
+    entry_ids: List[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(access_log, "MAX_PENDING", 5)
+    connect = FlakyConnect()
+    connect.locked = True
+    buffer = access_log.AccessLogBuffer(connect, mode="buffered", flush_interval=3600)
+
+    buffer.record_many([entry_ids[0]] * 4, "read")
+    buffer.flush()
+    buffer.record_many([entry_ids[1]] * 3, "read")
+    buffer.flush()
+
+    # The oldest events are dropped first
+    assert buffer.stats()["pending"] == 5
+    assert buffer.stats()["dropped"] == 2
+    connect.locked = False
+    buffer.flush()
+    assert _access(entry_ids[0])[2] == 2
+    assert _access(entry_ids[1])[2] == 3
+
+
+@pytest.mark.unit
+def test_sync_and_off_modes(entry_ids: List[int]) -> None:
+    access_log.AccessLogBuffer(memory_db.get_connection, mode="sync").record(entry_ids[0], "read")
+    assert _access(entry_ids[0])[0::2] == (1, 1)
+
+    off = access_log.AccessLogBuffer(memory_db.get_connection, mode="off")
+    off.record(entry_ids[1], "read")
+    assert off.flush() == 0
+    assert _access(entry_ids[1])[2] == 0
+
+    with pytest.raises(ValueError):
+        access_log.AccessLogBuffer(memory_db.get_connection, mode="lazy")
+
+
+@pytest.mark.unit
+def test_rollup_folds_old_events_into_daily_counts(entry_ids: List[int]) -> None:
+    entry_id = entry_ids[0]
+    events = [
+        (entry_id, "read", None, "2020-01-01 08:00:00"),
+        (entry_id, "read", None, "2020-01-01 09:00:00"),
+        (entry_id, "search", "q", "2020-01-02 10:00:00"),
+        (entry_id, "read", None, access_log._timestamp()),
+    ]
+    with memory_db.connection() as conn:
+        access_log.write_events(conn.cursor(), events)
+
+    with memory_db.connection() as conn:
+        result = access_log.rollup(conn.cursor(), retention_days=30)
+    assert (result["rolled_up"], result["pruned"]) == (3, 3)
+
+    # A late event for an already rolled-up day is merged into its count
+    with memory_db.connection() as conn:
+        access_log.write_events(conn.cursor(), [(entry_id, "read", None, "2020-01-01 10:00:00")])
+        access_log.rollup(conn.cursor(), retention_days=30)
+        daily = conn.execute(
+            "SELECT day, access_type, count FROM memory_access_daily WHERE memory_id = ? ORDER BY day, access_type",
+            (entry_id,),
+        ).fetchall()
+        remaining = conn.execute("SELECT COUNT(*) FROM memory_access_log").fetchone()[0]
+    assert [tuple(row) for row in daily] == [("2020-01-01", "read", 3), ("2020-01-02", "search", 1)]
+    assert remaining == 1
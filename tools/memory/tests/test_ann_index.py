@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ann_index  # noqa: E402
+import memory_db  # noqa: E402
+import vector_index  # noqa: E402
+
+DIMS = 16
+
+
+def _clustered(n: int, seed: int) -> "np.ndarray":
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, DIMS))
+    rows = centers[rng.integers(0, 8, n)] + 0.3 * rng.standard_normal((n, DIMS))
+    return (rows / np.linalg.norm(rows, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _store(vectors: "np.ndarray", prefix: str) -> List[int]:
+    result = memory_db.add_entries_bulk([{"content": f"{prefix} {i}"} for i in range(len(vectors))])
+    assert result["inserted"] == len(vectors)
+    with memory_db.connection() as conn:
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM memory_entries WHERE content LIKE ? ORDER BY id", (f"{prefix} %",)
+        )]
+    memory_db.store_embeddings([(entry_id, vector.astype("<f4").tobytes()) for entry_id, vector in zip(ids, vectors)])
+    return ids
+
+
+def _candidate_ids(vector: "np.ndarray", nprobe: int = 2) -> set:
+    engine = vector_index.open_index()
+    rows = ann_index.candidate_rows(engine, vector, nprobe=nprobe)
+    assert rows is not None
+    return set(engine.ids[rows].tolist())
+
+
+@pytest.fixture()
+def ivf(memory_db_path: Path) -> Dict[int, "np.ndarray"]:
+    vectors = _clustered(400, seed=0)
+    ids = _store(vectors, "seed")
+    assert ann_index.build_index(nlist=8)["success"]
+    return dict(zip(ids, vectors))
+
+
+@pytest.mark.unit
+def test_probed_lists_recall_exact_neighbours(ivf: Dict[int, "np.ndarray"]) -> None:
+    engine = vector_index.open_index()
+    assert ann_index.is_synced(engine)
+    matrix = np.asarray(engine.matrix)
+
+    hits = 0
+    queries = list(ivf.values())[:50]
+    for query in queries:
+        exact = set(engine.ids[np.argsort(-(matrix @ query))[:10]].tolist())
+        hits += len(exact & _candidate_ids(query, nprobe=3))
+    assert hits / (10 * len(queries)) >= 0.9
+
+    # Probing every list is no better than a full scan
+    assert ann_index.candidate_rows(engine, queries[0], nprobe=8) is None
+
+
+@pytest.mark.unit
+def test_inserts_keep_the_index_in_sync(ivf: Dict[int, "np.ndarray"]) -> None:
+    base = next(iter(ivf.values()))
+    rng = np.random.default_rng(1)
+    vectors = base + 0.01 * rng.standard_normal((61, DIMS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    slots = ann_index.read_header()["slots"]
+
+    # One row fits its list's spare slots and is appended in place
+    first = _store(vectors[:1], "appended")
+    assert ann_index.read_header()["slots"] == slots
+    assert ann_index.is_synced(vector_index.open_index())
+    assert set(first) <= _candidate_ids(base)
+
+    # Sixty more overflow the list, so the lists are laid out again
+    rest = _store(vectors[1:], "overflow")
+    assert ann_index.read_header()["slots"] > slots
+    assert ann_index.is_synced(vector_index.open_index())
+    assert set(first + rest) <= _candidate_ids(base)
+
+
+@pytest.mark.unit
+def test_overwritten_vector_moves_to_its_new_list(ivf: Dict[int, "np.ndarray"]) -> None:
+    entry_id, vector = next(iter(ivf.items()))
+    far = -vector
+
+    memory_db.store_embedding(entry_id, far.astype("<f4").tobytes())
+
+    assert ann_index.is_synced(vector_index.open_index())
+    assert entry_id in _candidate_ids(far, nprobe=1)
+    assert entry_id not in _candidate_ids(vector, nprobe=1)
+
+
+@pytest.mark.unit
+def test_tombstones_hide_inactive_entries(ivf: Dict[int, "np.ndarray"]) -> None:
+    entry_id, vector = next(iter(ivf.items()))
+    assert entry_id in _candidate_ids(vector)
+
+    memory_db.delete_entry(entry_id)
+    assert entry_id not in _candidate_ids(vector)
+
+    memory_db.update_entry(entry_id, is_active=1)
+    assert entry_id in _candidate_ids(vector)
+
+
+@pytest.mark.unit
+def test_stale_index_is_not_used(ivf: Dict[int, "np.ndarray"], monkeypatch: pytest.MonkeyPatch) -> None:
+    # A write the IVF index did not see (e.g. from a process without numpy)
+    monkeypatch.setattr(vector_index, "_ann_index", lambda: None)
+    entry_id, vector = next(iter(ivf.items()))
+    memory_db.store_embedding(entry_id, vector.astype("<f4").tobytes())
+
+    engine = vector_index.open_index()
+    assert not ann_index.is_synced(engine)
+    assert ann_index.candidate_rows(engine, vector, nprobe=1) is None
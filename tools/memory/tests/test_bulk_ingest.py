@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import memory_db
+import pytest
+
+
+def _entry_ids(content: str) -> List[int]:
+    with memory_db.connection() as conn:
+        rows = conn.execute("SELECT id FROM memory_entries WHERE content = ?", (content,)).fetchall()
+    return [row[0] for row in rows]
+
+
+@pytest.mark.unit
+def test_duplicates_within_and_across_batches(memory_db_path: Path) -> None:
+    existing = memory_db.add_entry("already stored", entry_type="fact")["entry"]["id"]
+    rows = [
+        {"content": "alpha"},
+        {"content": "alpha"},  # same batch as its original
+        {"content": "beta"},
+        {"content": "already stored"},
+        {"content": "beta"},  # a later batch than its original
+    ]
+
+    result = memory_db.add_entries_bulk(rows, batch_size=3)
+
+    assert (result["inserted"], result["duplicate"], result["invalid"], result["failed"]) == (2, 3, 0, 0)
+    alpha, beta = _entry_ids("alpha"), _entry_ids("beta")
+    assert len(alpha) == 1 and len(beta) == 1
+    assert len(_entry_ids("already stored")) == 1
+
+    outcomes: List[Dict[str, Any]] = []
+    memory_db.add_entries_bulk(rows, batch_size=3, on_row=outcomes.append)
+    assert [outcome["existing_id"] for outcome in outcomes] == [alpha[0], alpha[0], beta[0], existing, beta[0]]
+
+
+@pytest.mark.unit
+def test_one_transaction_per_batch_and_outcomes_in_order(
+    memory_db_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batches: List[int] = []
+    insert_batch = memory_db._insert_bulk_batch
+
+    def recording_insert(conn, batch, key):
+        batches.append(len(batch))
+        return insert_batch(conn, batch, key)
+
+    monkeypatch.setattr(memory_db, "_insert_bulk_batch", recording_insert)
+    outcomes: List[Dict[str, Any]] = []
+    rows = [{"content": f"row {i}", "tags": ["bulk"]} for i in range(7)]
+
+    result = memory_db.add_entries_bulk(rows, batch_size=3, on_row=outcomes.append)
+
+    assert batches == [3, 3, 1]
+    assert result["inserted"] == 7
+    assert [outcome["index"] for outcome in outcomes] == list(range(7))
+    assert all(outcome["status"] == "inserted" and "id" in outcome for outcome in outcomes)
+    assert memory_db.list_entries(tag="bulk")["total"] == 7
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("row", "error"),
+    [
+        ({"content": "  "}, "content is required"),
+        ({"content": "x", "type": "opinion"}, "Invalid type"),
+        ({"content": "x", "importance": True}, "importance must be an integer"),
+        ({"content": "x", "importance": 7.5}, "importance must be an integer"),
+        ({"content": "x", "importance": 11}, "importance must be between 1 and 10"),
+        ({"content": "x", "confidence": False}, "confidence must be a number"),
+        ("not an object", "Row must be an object"),
+    ],
+)
+def test_invalid_rows_are_reported(memory_db_path: Path, row: Any, error: str) -> None:
+    result = memory_db.add_entries_bulk([{"content": "valid"}, row])
+
+    assert (result["inserted"], result["invalid"]) == (1, 1)
+    assert result["results"][0]["index"] == 1
+    assert result["results"][0]["error"].startswith(error)
+
+
+@pytest.mark.unit
+def test_import_file_keys_outcomes_by_line(memory_db_path: Path, tmp_path: Path) -> None:
+    path = tmp_path / "entries.jsonl"
+    path.write_text(
+        json.dumps({"content": "first"}) + "\n\n" + "{broken\n" + json.dumps({"content": "first"}) + "\n",
+        encoding="utf-8",
+    )
+    outcomes: List[Dict[str, Any]] = []
+
+    result = memory_db.import_entries_file(str(path), on_row=outcomes.append)
+
+    assert [(outcome["line"], outcome["status"]) for outcome in outcomes] == [
+        (1, "inserted"), (3, "invalid"), (4, "duplicate")
+    ]
+    assert result["results"][0]["error"].startswith("Invalid JSON")
+    assert outcomes[2]["existing_id"] == outcomes[0]["id"]
@@ -0,0 +1,46 @@
+import sqlite3
+from pathlib import Path
+
+import memory_db
+import pytest
+
+
+def _use_db(monkeypatch: pytest.MonkeyPatch, db_path: Path) -> None:
+    monkeypatch.setattr(memory_db, "DB_PATH", db_path)
+    monkeypatch.setattr(memory_db, "_schema_initialized", False)
+
+
+@pytest.mark.unit
+def test_db_path_change_retires_idle_connections_only(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    memory_db.close_pool()
+    _use_db(monkeypatch, tmp_path / "first.db")
+    borrowed = memory_db.get_connection()
+    with memory_db.connection() as idle:
+        idle_raw = idle._conn
+
+    _use_db(monkeypatch, tmp_path / "second.db")
+    with memory_db.connection() as conn:
+        conn.execute("SELECT 1")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        idle_raw.execute("SELECT 1")
+    # Still usable by its borrower, and closed (not re-pooled) on release
+    assert borrowed.execute("SELECT COUNT(*) FROM memory_entries").fetchone()[0] == 0
+    borrowed_raw = borrowed._conn
+    borrowed.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed_raw.execute("SELECT 1")
+    memory_db.close_pool()
+
+
+@pytest.mark.unit
+def test_released_connection_is_reused(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    memory_db.close_pool()
+    _use_db(monkeypatch, tmp_path / "memory.db")
+    with memory_db.connection() as conn:
+        first = conn._conn
+    with memory_db.connection() as conn:
+        assert conn._conn is first
+        with memory_db.connection() as nested:
+            assert nested._conn is not first
+    memory_db.close_pool()
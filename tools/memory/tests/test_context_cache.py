@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+import context_cache
+import memory_db
+import pytest
+
+PAYLOAD = {"markdown": "# Memory"}
+
+
+def _backdate() -> None:
+    """Move every high-water mark into the past so a context can be stored."""
+    with memory_db.connection() as conn:
+        conn.execute("UPDATE memory_entries SET updated_at = '2020-01-01 00:00:00'")
+        conn.execute("UPDATE daily_logs SET updated_at = '2020-01-01 00:00:00'")
+
+
+@pytest.fixture()
+def sources(memory_db_path: Path, tmp_path: Path) -> List[Path]:
+    memory_md = tmp_path / "MEMORY.md"
+    memory_md.write_text("# Memory\n", encoding="utf-8")
+    for i in range(3):
+        memory_db.add_entry(f"entry {i}", entry_type="fact")
+    memory_db.add_daily_log("2020-01-01", "summary", "raw log")
+    _backdate()
+    return [memory_md]
+
+
+def _stored(paths: List[Path], key: str = "default") -> None:
+    assert context_cache.store(key, context_cache.fingerprint(paths, include_db=True), PAYLOAD)
+    assert context_cache.lookup(key, context_cache.fingerprint(paths, include_db=True)) == PAYLOAD
+
+
+@pytest.mark.unit
+def test_writes_invalidate_through_the_fingerprint(sources: List[Path]) -> None:
+    _stored(sources)
+    memory_db.add_entry("a new fact", entry_type="fact")
+    assert context_cache.lookup("default", context_cache.fingerprint(sources, include_db=True)) is None
+
+    _backdate()
+    _stored(sources)
+    memory_db.update_entry(1, importance=9)
+    assert context_cache.lookup("default", context_cache.fingerprint(sources, include_db=True)) is None
+
+    _backdate()
+    _stored(sources)
+    memory_db.add_daily_log("2020-01-01", "new summary", "raw log")
+    assert context_cache.lookup("default", context_cache.fingerprint(sources, include_db=True)) is None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("soft_delete", [True, False])
+def test_deletes_invalidate(sources: List[Path], soft_delete: bool) -> None:
+    _stored(sources)
+
+    # Entry 1 is not the newest, so a hard delete moves neither mark
+    memory_db.delete_entry(1, soft_delete=soft_delete)
+
+    assert context_cache.lookup("default", context_cache.fingerprint(sources, include_db=True)) is None
+
+
+@pytest.mark.unit
+def test_hard_delete_drops_the_cache_file(sources: List[Path]) -> None:
+    _stored(sources)
+    assert context_cache.cache_path().exists()
+
+    memory_db.delete_entry(1, soft_delete=False)
+
+    assert not context_cache.cache_path().exists()
+
+
+@pytest.mark.unit
+def test_source_file_changes_invalidate(sources: List[Path]) -> None:
+    _stored(sources)
+
+    sources[0].write_text("# Memory\n- new line\n", encoding="utf-8")
+
+    assert context_cache.lookup("default", context_cache.fingerprint(sources, include_db=True)) is None
+
+
+@pytest.mark.unit
+def test_same_second_marks_are_not_stored(sources: List[Path]) -> None:
+    memory_db.add_entry("written just now", entry_type="fact")
+
+    assert not context_cache.store("default", context_cache.fingerprint(sources, include_db=True), PAYLOAD)
+
+
+@pytest.mark.unit
+def test_valid_until_expires_a_context(sources: List[Path]) -> None:
+    current = context_cache.fingerprint(sources, include_db=True)
+    past = (datetime.now() - timedelta(seconds=1)).isoformat()
+
+    assert context_cache.store("default", current, PAYLOAD, valid_until=past)
+    assert context_cache.lookup("default", current) is None
+
+
+@pytest.mark.unit
+def test_oldest_contexts_are_evicted(sources: List[Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(context_cache, "MAX_CACHED_CONTEXTS", 2)
+    current = context_cache.fingerprint(sources, include_db=False)
+    for key in ("a", "b", "c"):
+        context_cache.store(key, current, PAYLOAD)
+
+    assert context_cache.lookup("a", current) is None
+    assert context_cache.lookup("b", current) == PAYLOAD
+    assert context_cache.lookup("c", current) == PAYLOAD
+
+
+@pytest.mark.unit
+def test_disabled_cache_never_hits(sources: List[Path], monkeypatch: pytest.MonkeyPatch) -> None:
+    current = context_cache.fingerprint(sources, include_db=True)
+    context_cache.store("default", current, PAYLOAD)
+
+    monkeypatch.setattr(context_cache, "CONTEXT_CACHE_ENABLED", False)
+
+    assert context_cache.lookup("default", current) is None
@@ -0,0 +1,91 @@
+import random
+from typing import Callable, Dict, List, Tuple
+
+import fusion
+import pytest
+
+Run = List[Tuple[int, float]]
+
+
+def _runs(seed: int, docs: int = 300, length: int = 200) -> Dict[str, Run]:
+    """Two overlapping rankers over the same corpus, best first."""
+    rng = random.Random(seed)
+    runs = {}
+    for name in ("bm25", "semantic"):
+        ids = rng.sample(range(docs), length)
+        scores = sorted((rng.random() for _ in ids), reverse=True)
+        runs[name] = list(zip(ids, scores))
+    return runs
+
+
+def _fetchers(runs: Dict[str, Run]) -> Dict[str, Callable[[int], Run]]:
+    return {name: (lambda pool, run=run: run[:pool]) for name, run in runs.items()}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("method", fusion.FUSION_METHODS)
+@pytest.mark.parametrize("seed", range(50))
+def test_fuse_adaptive_matches_full_lists(method: str, seed: int) -> None:
+    runs = _runs(seed)
+    weights = {"bm25": 0.3, "semantic": 0.7}
+    limit = 10
+
+    full = fusion.fuse(runs, weights, method)[:limit]
+    adaptive, stats = fusion.fuse_adaptive(_fetchers(runs), weights, limit, method=method, max_pool=200)
+
+    assert [entry_id for entry_id, _, _ in adaptive[:limit]] == [entry_id for entry_id, _, _ in full]
+    assert [score for _, score, _ in adaptive[:limit]] == pytest.approx([score for _, score, _ in full])
+    assert stats["pool"] <= 200
+
+
+@pytest.mark.unit
+def test_fuse_adaptive_stops_early_for_agreeing_rankers() -> None:
+    run = [(entry_id, 1.0 - entry_id / 1000) for entry_id in range(500)]
+    runs = {"bm25": run, "semantic": list(run)}
+
+    fused, stats = fusion.fuse_adaptive(_fetchers(runs), {"bm25": 0.5, "semantic": 0.5}, 10, method="linear")
+
+    assert [entry_id for entry_id, _, _ in fused[:10]] == list(range(10))
+    assert stats == {"pool": 10, "rounds": 1, "early_stop": True}
+
+
+@pytest.mark.unit
+def test_rrf_top_for_every_ranker_scores_one() -> None:
+    runs = {"bm25": [(7, 9.0), (1, 4.0), (2, 1.0)], "semantic": [(7, 0.9), (2, 0.8)]}
+
+    fused = fusion.fuse(runs, {"bm25": 0.3, "semantic": 0.7}, "rrf")
+
+    assert fused[0][0] == 7
+    assert fused[0][1] == pytest.approx(1.0)
+    assert fused[0][2] == {"bm25": 9.0, "semantic": 0.9}
+    assert all(score < 1.0 for _, score, _ in fused[1:])
+
+
+@pytest.mark.unit
+def test_fuse_linear_weights_and_ties() -> None:
+    runs = {"bm25": [(1, 1.0), (2, 0.5)], "semantic": [(2, 0.5), (3, 0.25)]}
+
+    fused = fusion.fuse(runs, {"bm25": 0.5, "semantic": 1.0}, "linear")
+
+    assert [(entry_id, score) for entry_id, score, _ in fused] == [(2, 0.75), (1, 0.5), (3, 0.25)]
+
+
+@pytest.mark.unit
+def test_fuse_rejects_unknown_method() -> None:
+    with pytest.raises(ValueError):
+        fusion.fuse({}, {}, "borda")
+
+
+@pytest.mark.unit
+def test_top_k_settled_bounds_unseen_documents() -> None:
+    weights = {"bm25": 1.0, "semantic": 1.0}
+    # Document 1 leads both runs; anything unseen scores at most 0.5 + 0.5
+    settled = {"bm25": [(1, 1.0), (2, 0.5)], "semantic": [(1, 1.0), (3, 0.5)]}
+    assert fusion._top_k_settled(settled, weights, "linear", pool=2, limit=1, rrf_k=fusion.RRF_K)
+
+    # Document 2 (0.9 so far) could still gain up to 0.9 from the semantic run
+    open_runs = {"bm25": [(1, 1.0), (2, 0.9)], "semantic": [(1, 0.95), (3, 0.9)]}
+    assert not fusion._top_k_settled(open_runs, weights, "linear", pool=2, limit=2, rrf_k=fusion.RRF_K)
+
+    # Exhausted runs (shorter than the pool) leave nothing unseen
+    assert fusion._top_k_settled(open_runs, weights, "linear", pool=5, limit=2, rrf_k=fusion.RRF_K)
@@ -0,0 +1,117 @@
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import memory_file
+import pytest
+
+TEMPLATE = """# Persistent Memory
+
+## Key Facts
+- First fact
+
+## Preferences
+
+---
+
+## Learned Behaviors
+- Existing behavior
+
+
+*Last updated: 2020-01-01*
+"""
+
+
+@pytest.fixture()
+def memory_md(tmp_path: Path) -> Path:
+    path = tmp_path / "MEMORY.md"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    os.chmod(path, 0o640)
+    return path
+
+
+@pytest.mark.unit
+def test_appends_at_section_ends_in_one_rewrite(memory_md: Path) -> None:
+    result = memory_file.append_entries(
+        [("key_facts", "Second fact"), ("Preferences", "Tea"), ("key facts", "Third fact")], path=memory_md
+    )
+
+    assert result["success"]
+    assert result["sections"] == {"key_facts": ["Second fact", "Third fact"], "preferences": ["Tea"]}
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert memory_md.read_text(encoding="utf-8") == TEMPLATE.replace(
+        "- First fact\n", "- First fact\n- Second fact\n- Third fact\n"
+    ).replace(
+        "## Preferences\n", "## Preferences\n- Tea\n"
+    ).replace("2020-01-01", today)
+    assert os.stat(memory_md).st_mode & 0o777 == 0o640
+
+
+@pytest.mark.unit
+def test_cached_offsets_match_a_rescan_after_each_write(memory_md: Path) -> None:
+    for i, section in enumerate(["key_facts", "learned_behaviors", "preferences"] * 3):
+        memory_file.append_entries([(section, f"line {i}")], path=memory_md)
+
+        data = memory_md.read_bytes()
+        assert memory_file._index_cache["key"] == [str(memory_md), memory_file._file_key(os.stat(memory_md))]
+        assert memory_file._index_cache["index"] == memory_file.build_index(data)
+
+
+@pytest.mark.unit
+def test_outside_edits_are_rescanned(memory_md: Path) -> None:
+    memory_file.append_entries([("key_facts", "Cached")], path=memory_md)
+    memory_md.write_text("## Key Facts\n- Replaced", encoding="utf-8")
+
+    memory_file.append_entries([("key_facts", "After edit")], path=memory_md)
+
+    # The section ended on a last line without a newline
+    assert memory_md.read_text(encoding="utf-8") == "## Key Facts\n- Replaced\n- After edit\n"
+
+
+@pytest.mark.unit
+def test_unknown_section_or_missing_file_writes_nothing(memory_md: Path, tmp_path: Path) -> None:
+    result = memory_file.append_entries([("key_facts", "Kept out"), ("goals", "Nope")], path=memory_md)
+
+    assert not result["success"]
+    assert "goals" in result["error"]
+    assert memory_md.read_text(encoding="utf-8") == TEMPLATE
+    assert not memory_file.append_entries([("key_facts", "x")], path=tmp_path / "missing.md")["success"]
+
+
+@pytest.mark.unit
+def test_concurrent_writers_lose_no_lines(memory_md: Path) -> None:
+    def writer(n: int) -> None:
+        for i in range(10):
+            assert memory_file.append_entries([("key_facts", f"writer {n} line {i}")], path=memory_md)["success"]
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = memory_md.read_text(encoding="utf-8")
+    for n in range(6):
+        lines = [line for line in text.splitlines() if line.startswith(f"- writer {n} ")]
+        assert lines == [f"- writer {n} line {i}" for i in range(10)]
+    assert not list(memory_md.parent.glob("*.tmp"))
+
+
+@pytest.mark.unit
+def test_lock_blocks_other_writers(memory_md: Path) -> None:
+    appended = threading.Event()
+
+    def writer() -> None:
+        memory_file.append_entries([("key_facts", "Queued")], path=memory_md)
+        appended.set()
+
+    with memory_file.file_lock(memory_md):
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert not appended.wait(0.2)
+        assert "Queued" not in memory_md.read_text(encoding="utf-8")
+    thread.join(5)
+
+    assert appended.is_set()
+    assert "- Queued\n" in memory_md.read_text(encoding="utf-8")
@@ -0,0 +1,118 @@
+import struct
+
+import pytest
+import quantization
+
+np = pytest.importorskip("numpy")
+
+
+def _unit_rows(n: int, dims: int, seed: int = 0) -> "np.ndarray":
+    rows = np.random.default_rng(seed).standard_normal((n, dims)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(("dtype", "tolerance"), [("float32", 0.0), ("float16", 1e-3), ("int8", 0.01)])
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_storage_round_trip(
+    monkeypatch: pytest.MonkeyPatch, dtype: str, tolerance: float, use_numpy: bool
+) -> None:
+    monkeypatch.setattr(quantization, "HAS_NUMPY", use_numpy)
+    vector = _unit_rows(1, 64)[0]
+    embedding = vector.astype("<f4").tobytes()
+
+    blob = quantization.encode_vector(embedding, dtype)
+    decoded = np.frombuffer(quantization.decode_vector(blob, dtype), dtype="<f4")
+
+    assert len(blob) == quantization.code_size(dtype, 64)
+    assert quantization.stored_dims(blob, dtype) == 64
+    assert np.abs(decoded - vector).max() <= tolerance
+
+
+@pytest.mark.unit
+def test_storage_codecs_agree_with_and_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    embedding = _unit_rows(1, 32, seed=1)[0].astype("<f4").tobytes()
+    for dtype in ("float16", "int8"):
+        with_numpy = quantization.encode_vector(embedding, dtype)
+        monkeypatch.setattr(quantization, "HAS_NUMPY", False)
+        without_numpy = quantization.encode_vector(embedding, dtype)
+        monkeypatch.setattr(quantization, "HAS_NUMPY", True)
+        assert np.allclose(
+            np.frombuffer(quantization.decode_vector(with_numpy, dtype), dtype="<f4"),
+            np.frombuffer(quantization.decode_vector(without_numpy, dtype), dtype="<f4"),
+            atol=1e-6,
+        )
+
+
+@pytest.mark.unit
+def test_int8_zero_vector_round_trips() -> None:
+    embedding = struct.pack("<4f", 0, 0, 0, 0)
+    assert quantization.decode_vector(quantization.encode_vector(embedding, "int8"), "int8") == embedding
+
+
+@pytest.mark.unit
+def test_untagged_blobs_decode_as_float32() -> None:
+    embedding = struct.pack("<2f", 0.5, -0.25)
+    assert quantization.decode_vector(embedding, None) is embedding
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("encoding", quantization.ENCODINGS)
+def test_matrix_codes_have_code_size_columns(encoding: str) -> None:
+    rows = _unit_rows(5, 20)
+    codes = quantization.encode_matrix(rows, encoding)
+    decoded = quantization.decode_matrix(codes, encoding, 20)
+
+    assert codes.shape == (5, quantization.code_size(encoding, 20))
+    assert decoded.shape == rows.shape
+    if encoding == "binary":
+        assert np.array_equal(decoded > 0, rows > 0)
+    else:
+        assert np.allclose(decoded, rows, atol=0.01)
+
+
+@pytest.mark.unit
+def test_invalid_encodings_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        quantization.code_size("int4", 8)
+    with pytest.raises(ValueError):
+        quantization.encode_vector(b"\0" * 8, "binary")
+    with pytest.raises(ValueError):
+        quantization.encode_matrix(_unit_rows(1, 8), "int4")
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("encoding", quantization.ENCODINGS)
+def test_approximate_scores_track_exact_scores(monkeypatch: pytest.MonkeyPatch, encoding: str) -> None:
+    monkeypatch.setattr(quantization, "SCAN_CHUNK_ROWS", 7)
+    rows = _unit_rows(50, 64)
+    query = rows[3]
+    codes = quantization.encode_matrix(rows, encoding)
+
+    scores = quantization.approximate_scores(codes, encoding, 64, query)
+
+    if encoding == "binary":
+        hamming = np.unpackbits(codes ^ np.packbits(query > 0), axis=1).sum(axis=1)
+        assert np.allclose(scores, 1 - 2 * hamming / 64)
+        assert scores[3] == 1.0
+    else:
+        assert np.allclose(scores, rows @ query, atol=0.02)
+
+
+@pytest.mark.unit
+def test_shortlist_keeps_best_finite_scores() -> None:
+    scores = np.array([0.1, 0.9, -np.inf, 0.5, 0.7], dtype=np.float32)
+
+    assert sorted(quantization.shortlist(scores, 2).tolist()) == [1, 4]
+    assert sorted(quantization.shortlist(scores, 10).tolist()) == [0, 1, 3, 4]
+
+
+@pytest.mark.unit
+def test_shortlist_rescore_recovers_exact_top_k() -> None:
+    rows = _unit_rows(500, 64, seed=2)
+    report = quantization.measure_recall(rows, k=10, sample=20, rescore_factor=8)
+
+    assert report["float16"]["recall_at_10_rescored"] == 1.0
+    assert report["int8"]["recall_at_10_rescored"] >= 0.99
+    assert report["binary"]["recall_at_10_rescored"] >= report["binary"]["recall_at_10_first_stage"]
+    assert report["binary"]["compression"] == 32.0
@@ -0,0 +1,69 @@
+from collections.abc import Generator
+from pathlib import Path
+
+import memory_db
+import pytest
+
+
+@pytest.fixture()
+def seeded_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator[Path, None, None]:
+    db_path = tmp_path / "memory.db"
+    memory_db.close_pool()
+    monkeypatch.setattr(memory_db, "DB_PATH", db_path)
+    monkeypatch.setattr(memory_db, "_schema_initialized", False)
+    for i in range(200):
+        result = memory_db.add_entry(
+            f"seeded entry {i}",
+            entry_type=("fact", "preference", "event")[i % 3],
+            source=("user", "session")[i % 2],
+            importance=i % 10 + 1,
+            tags=["python"] if i % 4 == 0 else None,
+            expires_at="2099-01-01T00:00:00" if i % 5 == 0 else None,
+        )
+        if i % 2 == 0:
+            memory_db.store_embedding(result["entry"]["id"], b"\0" * 16)
+        if i % 7 == 0:
+            memory_db.delete_entry(result["entry"]["id"])
+    memory_db.add_daily_log("2026-01-01", "summary", "raw log", ["event"])
+    yield db_path
+    memory_db.close_pool()
+
+
+@pytest.mark.unit
+def test_hot_queries_use_expected_indexes(seeded_db: Path) -> None:
+    result = memory_db.check_query_plans()
+    assert result["success"], result.get("problems")
+    assert set(result["plans"]) == set(memory_db.HOT_QUERIES)
+
+
+@pytest.mark.unit
+def test_check_query_plans_flags_wrong_index(seeded_db: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sql, params, _ = memory_db.HOT_QUERIES["stats_total"]
+    monkeypatch.setitem(memory_db.HOT_QUERIES, "stats_total", (sql, params, "idx_memory_active_rank"))
+    result = memory_db.check_query_plans()
+    assert not result["success"]
+    assert any(problem.startswith("stats_total:") for problem in result["problems"])
+
+
+@pytest.mark.unit
+def test_check_query_plans_flags_table_scan(seeded_db: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(
+        memory_db.HOT_QUERIES,
+        "content_lookup",
+        ("SELECT id FROM memory_entries WHERE content = ?", ("seeded entry 1",), "idx_memory_updated"),
+    )
+    result = memory_db.check_query_plans()
+    assert not result["success"]
+    assert result["problems"] == ["content_lookup: SCAN memory_entries (expected idx_memory_updated)"]
+
+
+@pytest.mark.unit
+def test_any_covering_index_requires_a_covering_index(seeded_db: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(
+        memory_db.HOT_QUERIES,
+        "content_lookup",
+        ("SELECT id FROM memory_entries WHERE content = ?", ("seeded entry 1",), memory_db.ANY_COVERING_INDEX),
+    )
+    result = memory_db.check_query_plans()
+    assert not result["success"]
+    assert result["problems"] == ["content_lookup: SCAN memory_entries (expected COVERING INDEX)"]
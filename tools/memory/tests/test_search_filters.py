@@ -0,0 +1,22 @@
+import pytest
+from search_filters import parse_filter
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("created>=2026-01-01", {"created_after": "2026-01-01 00:00:00"}),
+        ("created>2026-01-01", {"created_after": "2026-01-02 00:00:00"}),
+        ("created>2026-01-01T10:00:00", {"created_after": "2026-01-01 10:00:01"}),
+        ("created<2026-02-01", {"created_before": "2026-02-01 00:00:00"}),
+        ("created<=2026-01-31", {"created_before": "2026-02-01 00:00:00"}),
+    ],
+)
+def test_created_bounds(expression: str, expected: dict) -> None:
+    assert parse_filter(expression) == expected
+
+
+@pytest.mark.unit
+def test_importance_bounds() -> None:
+    assert parse_filter("importance>5 importance<9") == {"min_importance": 6, "max_importance": 8}
@@ -0,0 +1,253 @@
+"""
+Tool: Vector Similarity Engine
+Purpose: Vectorized cosine-similarity scoring over stored memory embeddings
+
+Loads embedding BLOBs into one contiguous float32 matrix with np.frombuffer,
+normalizes every row once, and scores the whole corpus with a single
+matrix-vector product plus argpartition top-k selection.
+
+Used by semantic_search.py (semantic_search and find_similar) and
+vector_index.py (memory-mapped on-disk matrix).
+
+Dependencies:
+    - numpy (optional; callers fall back to pure-Python cosine similarity)
+
+Output:
+    Ranked (entry_id, similarity) pairs
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+sys.path.insert(0, str(Path(__file__).parent))
+from quantization import decode_vector
+
+# Index vectors are packed float32 (see embed_memory.embedding_to_bytes)
+BYTES_PER_FLOAT = 4
+
+
+def normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    """L2-normalize each row in place; zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def normalize_vector(vector: Sequence[float]) -> "np.ndarray":
+    """Convert a vector to a unit-length float32 array."""
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    if norm == 0:
+        return vec
+    return vec / norm
+
+
+def top_k(
+    scores: "np.ndarray",
+    k: int,
+    threshold: Optional[float] = None
+) -> Tuple["np.ndarray", int]:
+    """
+    Select the indices of the k highest scores.
+
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of results to keep
+        threshold: Optional minimum score
+
+    Returns:
+        (indices sorted by descending score, number of scores above threshold)
+    """
+    if threshold is not None:
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.flatnonzero(scores > -np.inf)
+
+    above = int(candidates.shape[0])
+    if k <= 0 or above == 0:
+        return candidates[:0], above
+
+    if above > k:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+
+    order = np.argsort(-scores[candidates], kind='stable')
+    return candidates[order], above
+
+
+class VectorEngine:
+    """
+    Embedding matrix with row-aligned entry IDs and optional metadata.
+
+    Rows are pre-normalized so similarity is a plain dot product. The matrix
+    may be an in-memory array or a read-only np.memmap (see vector_index.py).
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        matrix: "np.ndarray",
+        rows: Optional[List[Dict[str, Any]]] = None,
+        generation: Optional[int] = None
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = matrix
+        self.rows = rows
+        # Index-file generation the matrix was mapped from (None for DB scans)
+        self.generation = generation
+        self._row_by_id: Optional[Dict[int, int]] = None
+        # Row order sorting self.ids, for vectorized id -> row lookups
+        self._id_order: Optional["np.ndarray"] = None
+        self._sorted_ids: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Dict[str, Any]],
+        blob_key: str = 'embedding',
+        dtype_key: str = 'embedding_dtype'
+    ) -> "VectorEngine":
+        """
+        Build an engine from DB rows carrying raw embedding BLOBs.
+
+        BLOBs stored in a compact dtype (row[dtype_key], see quantization.py)
+        are decoded to float32. Rows whose embedding size differs from the
+        first row's are skipped so the matrix stays rectangular.
+        """
+        ids: List[int] = []
+        blobs: List[bytes] = []
+        meta: List[Dict[str, Any]] = []
+        expected_len = None
+
+        for row in rows:
+            blob = row.get(blob_key)
+            if not blob:
+                continue
+            blob = decode_vector(blob, row.get(dtype_key))
+            if expected_len is None:
+                expected_len = len(blob)
+            if len(blob) != expected_len:
+                continue
+            ids.append(row['id'])
+            blobs.append(blob)
+            meta.append({k: v for k, v in row.items() if k not in (blob_key, dtype_key)})
+
+        if not blobs:
+            return cls([], np.zeros((0, 0), dtype=np.float32), [])
+
+        dims = expected_len // BYTES_PER_FLOAT
+        matrix = np.frombuffer(b''.join(blobs), dtype=np.float32).reshape(len(blobs), dims).copy()
+        return cls(ids, normalize_rows(matrix), meta)
+
+    def _index_of(self, entry_id: int) -> Optional[int]:
+        if self._row_by_id is None:
+            self._row_by_id = {int(entry_id): i for i, entry_id in enumerate(self.ids.tolist())}
+        return self._row_by_id.get(int(entry_id))
+
+    def rows_for(self, entry_ids: Sequence[int]) -> "np.ndarray":
+        """
+        Matrix rows holding the given entry IDs, in ascending row order.
+
+        IDs without a row are skipped. Uses a binary search over the sorted
+        IDs, so mapping a filtered id set costs O(k log n) after one argsort.
+        """
+        wanted = np.asarray(entry_ids, dtype=np.int64)
+        if not len(self) or wanted.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+            self._sorted_ids = self.ids[self._id_order]
+        sorted_ids = self._sorted_ids
+        positions = np.minimum(np.searchsorted(sorted_ids, wanted), len(self) - 1)
+        found = sorted_ids[positions] == wanted
+        return np.sort(self._id_order[positions[found]])
+
+    def contains(self, entry_ids: Sequence[int]) -> bool:
+        """True if every given entry ID has a row in this engine."""
+        if len(entry_ids) == 0:
+            return True
+        return bool(np.isin(np.asarray(entry_ids, dtype=np.int64), self.ids).all())
+
+    def vector_for(self, entry_id: int) -> Optional["np.ndarray"]:
+        """Return the normalized stored vector for an entry, if loaded."""
+        idx = self._index_of(entry_id)
+        if idx is None:
+            return None
+        return self.matrix[idx]
+
+    def row_for(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Return metadata loaded alongside an entry's vector."""
+        idx = self._index_of(entry_id)
+        if idx is None or self.rows is None:
+            return None
+        return self.rows[idx]
+
+    def scores(self, query: Sequence[float]) -> "np.ndarray":
+        """Cosine similarity of the query against every row."""
+        q = normalize_vector(query)
+        if q.shape[0] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+        return np.asarray(self.matrix @ q, dtype=np.float32)
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int = 10,
+        threshold: Optional[float] = None,
+        exclude_ids: Optional[Iterable[int]] = None,
+        allowed_ids: Optional[Sequence[int]] = None,
+        candidate_rows: Optional["np.ndarray"] = None
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        Rank loaded entries by cosine similarity to the query.
+
+        Args:
+            query: Query embedding
+            limit: Maximum results
+            threshold: Optional minimum similarity
+            exclude_ids: Entry IDs to leave out of the ranking
+            allowed_ids: If given, only these entry IDs are ranked
+            candidate_rows: If given, only these matrix rows are scored
+                (e.g. an ANN shortlist); otherwise the whole matrix is scanned
+
+        Returns:
+            ([(entry_id, similarity), ...], number of entries above threshold)
+        """
+        if not len(self):
+            return [], 0
+
+        if candidate_rows is None:
+            ids = self.ids
+            scores = self.scores(query)
+        else:
+            q = normalize_vector(query)
+            if q.shape[0] != self.dimensions:
+                raise ValueError("Vectors must have same length")
+            ids = self.ids[candidate_rows]
+            scores = np.asarray(self.matrix[candidate_rows] @ q, dtype=np.float32)
+
+        if allowed_ids is not None:
+            allowed = np.isin(ids, np.asarray(allowed_ids, dtype=np.int64))
+            scores[~allowed] = -np.inf
+        if exclude_ids:
+            excluded = np.isin(ids, np.fromiter(exclude_ids, dtype=np.int64))
+            scores[excluded] = -np.inf
+
+        indices, above = top_k(scores, limit, threshold)
+        return [(int(ids[i]), float(scores[i])) for i in indices], above
@@ -0,0 +1,589 @@
+"""
+Tool: Persistent Vector Index
+Purpose: Memory-mapped on-disk embedding matrix kept alongside memory.db
+
+The index file (data/memory.vec) holds:
+- A fixed 64-byte header: magic, dimensions, row count, capacity, generation
+- A row-id map (int64 per row)
+- A contiguous, pre-normalized float32 matrix (capacity x dimensions)
+
+store_embedding() in memory_db.py upserts rows incrementally; search opens the
+file with np.memmap, so a cold start costs one mmap instead of a full-table
+BLOB scan, and the OS page cache is shared across short-lived CLI processes.
+The generation counter increases on every write so in-process readers know
+when to re-open the map.
+
+With MEMORY_VECTOR_ENCODING set (float16, int8 or binary), a scan-code file
+(data/memory.vec.<encoding>) mirrors the matrix in that encoding for the
+first stage of two-stage search (see quantization.py). It records the
+generation it was built from, is updated in place by upsert_vectors while in
+sync, and is rebuilt from the float32 matrix on demand when stale.
+
+Usage:
+    python tools/memory/vector_index.py --stats      # Show index header and sync status
+    python tools/memory/vector_index.py --rebuild    # Rebuild index from memory.db
+
+Dependencies:
+    - numpy
+    - sqlite3 (stdlib)
+
+Env Vars:
+    - MEMORY_VECTOR_ENCODING (optional, scan-code encoding, see quantization.py)
+
+Output:
+    JSON result with success status and index info
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+import numpy as np
+
+# Import from sibling modules
+sys.path.insert(0, str(Path(__file__).parent))
+import memory_db
+from vector_engine import VectorEngine, BYTES_PER_FLOAT, normalize_rows
+import quantization
+
+MAGIC = b'ELVEC001'
+HEADER = struct.Struct('<8sIIQQQ')  # magic, dims, reserved, count, capacity, generation
+HEADER_SIZE = 64
+ID_SIZE = 8
+INITIAL_CAPACITY = 1024
+
+CODES_MAGIC = b'ELVQ0001'
+CODES_HEADER = struct.Struct('<8sIIQQQ')  # magic, dims, code size, count, capacity, vec generation
+
+# Per-process cache of the last opened map, keyed on file identity + generation
+_engine_cache: Dict[str, Any] = {"key": None, "engine": None}
+_codes_cache: Dict[str, Any] = {"key": None, "codes": None}
+
+
+def index_path() -> Path:
+    """Path of the vector index file (next to memory.db)."""
+    return memory_db.DB_PATH.with_suffix('.vec')
+
+
+def _matrix_offset(capacity: int) -> int:
+    return HEADER_SIZE + ID_SIZE * capacity
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock serializing writers across processes."""
+    lock_path = path.with_name(path.name + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_header(path: Optional[Path] = None) -> Optional[Dict[str, int]]:
+    """Read the index header, or None if the file is missing or invalid."""
+    path = path or index_path()
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, dims, _, count, capacity, generation = HEADER.unpack(raw)
+    if magic != MAGIC:
+        return None
+    return {"dims": dims, "count": count, "capacity": capacity, "generation": generation}
+
+
+def _write_header(f, dims: int, count: int, capacity: int, generation: int) -> None:
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, dims, 0, count, capacity, generation).ljust(HEADER_SIZE, b'\0'))
+
+
+def _write_file(path: Path, ids: np.ndarray, matrix: np.ndarray, capacity: int, generation: int) -> None:
+    """Write a complete index file atomically (temp file + os.replace)."""
+    count, dims = matrix.shape
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        _write_header(f, dims, count, capacity, generation)
+        f.seek(HEADER_SIZE)
+        f.write(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+        f.seek(_matrix_offset(capacity))
+        f.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        f.truncate(_matrix_offset(capacity) + capacity * dims * BYTES_PER_FLOAT)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _map_ids(path: Path, header: Dict[str, int]) -> np.ndarray:
+    if header["count"] == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.memmap(path, dtype=np.int64, mode='r', offset=HEADER_SIZE, shape=(header["count"],))
+
+
+def _map_matrix(path: Path, header: Dict[str, int]) -> np.ndarray:
+    if header["count"] == 0:
+        return np.zeros((0, header["dims"]), dtype=np.float32)
+    return np.memmap(
+        path, dtype=np.float32, mode='r',
+        offset=_matrix_offset(header["capacity"]),
+        shape=(header["count"], header["dims"])
+    )
+
+
+def _grow(path: Path, header: Dict[str, int], needed: int = 0) -> Dict[str, int]:
+    """Double the capacity of an existing index file (repeatedly, to fit `needed` rows)."""
+    capacity = max(header["capacity"] * 2, INITIAL_CAPACITY)
+    while capacity < needed:
+        capacity *= 2
+    ids = np.array(_map_ids(path, header))
+    matrix = np.array(_map_matrix(path, header))
+    _write_file(path, ids, matrix, capacity, header["generation"])
+    return {**header, "capacity": capacity}
+
+
+def find_row(entry_id: int) -> Optional[int]:
+    """Row position of an entry in the index file, or None if absent."""
+    path = index_path()
+    header = read_header(path)
+    if header is None:
+        return None
+    matches = np.flatnonzero(_map_ids(path, header) == entry_id)
+    return int(matches[0]) if matches.size else None
+
+
+def upsert_vector(entry_id: int, embedding: bytes) -> Dict[str, Any]:
+    """
+    Insert or overwrite one entry's vector in the index file.
+
+    Args:
+        entry_id: Memory entry ID
+        embedding: Packed float32 embedding bytes
+
+    Returns:
+        dict with success status, row and new generation
+    """
+    result = upsert_vectors([(entry_id, embedding)])
+    if result.get("success"):
+        result["row"] = result["rows"][0]
+    return result
+
+
+def upsert_vectors(items: List[Tuple[int, bytes]]) -> Dict[str, Any]:
+    """
+    Insert or overwrite many entries' vectors under one lock and one generation.
+
+    Existing rows are resolved with a single np.isin pass over the id map;
+    new entries are appended (growing the file once if needed), and the
+    scan-code file and IVF index (if present) are updated for the same rows.
+
+    Args:
+        items: (entry_id, packed float32 embedding bytes) pairs; for a
+            repeated ID the last vector wins
+
+    Returns:
+        dict with success status, rows (aligned with the distinct IDs in
+        `entry_ids`) and the new generation
+    """
+    latest: Dict[int, bytes] = {}
+    for entry_id, embedding in items:
+        latest.pop(entry_id, None)
+        latest[entry_id] = embedding
+    if not latest:
+        return {"success": True, "entry_ids": [], "rows": [], "generation": None}
+
+    sizes = {len(embedding) for embedding in latest.values()}
+    if len(sizes) != 1:
+        return {"success": False, "error": "Vectors in one batch must have the same dimensions"}
+    entry_ids = np.fromiter(latest, dtype=np.int64, count=len(latest))
+    vectors = np.frombuffer(b''.join(latest.values()), dtype=np.float32).reshape(len(latest), -1).copy()
+    normalize_rows(vectors)
+    dims = vectors.shape[1]
+    path = index_path()
+
+    with file_lock(path):
+        header = read_header(path)
+        if header is None:
+            _write_file(path, np.zeros(0, dtype=np.int64), np.zeros((0, dims), dtype=np.float32),
+                        INITIAL_CAPACITY, 0)
+            header = read_header(path)
+        elif header["dims"] != dims:
+            # Mixed dimensions cannot share one matrix; drop the index so the
+            # next search rebuilds it from memory.db.
+            path.unlink()
+            return {"success": False, "error": f"Index has {header['dims']} dims, got {dims}; index invalidated"}
+
+        ids = _map_ids(path, header)
+        found = np.flatnonzero(np.isin(ids, entry_ids))
+        row_of = dict(zip(ids[found].tolist(), found.tolist()))
+        del ids
+
+        count = header["count"]
+        rows = np.empty(len(entry_ids), dtype=np.int64)
+        for i, entry_id in enumerate(entry_ids.tolist()):
+            row = row_of.get(entry_id)
+            if row is None:
+                row = count
+                count += 1
+            rows[i] = row
+        prior = header
+        if count > header["capacity"]:
+            header = _grow(path, header, count)
+
+        generation = header["generation"] + 1
+        capacity = header["capacity"]
+        id_map = np.memmap(path, dtype=np.int64, mode='r+', offset=HEADER_SIZE, shape=(capacity,))
+        id_map[rows] = entry_ids
+        id_map.flush()
+        matrix = np.memmap(path, dtype=np.float32, mode='r+', offset=_matrix_offset(capacity),
+                           shape=(capacity, dims))
+        matrix[rows] = vectors
+        matrix.flush()
+        del id_map, matrix
+        with open(path, 'r+b') as f:
+            _write_header(f, dims, count, capacity, generation)
+        _upsert_codes(rows, vectors, prior, capacity, count, generation)
+        # IVF updates happen under this lock so they apply in generation order
+        ann_index = _ann_index()
+        if ann_index is not None:
+            ann_index.insert_rows(rows, vectors, generation, capacity)
+
+    return {
+        "success": True,
+        "entry_ids": entry_ids.tolist(),
+        "rows": rows.tolist(),
+        "generation": generation
+    }
+
+
+def _ann_index():
+    """The ann_index module if an IVF index exists next to this index, else None."""
+    import ann_index
+    return ann_index if ann_index.read_header() is not None else None
+
+
+def rebuild_index() -> Dict[str, Any]:
+    """
+    Rebuild the index file from every embedded entry in memory.db.
+
+    Inactive entries are kept so reactivated entries do not force a rebuild;
+    searches filter eligibility against the database.
+    """
+    conn = memory_db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT e.id, v.vector AS embedding, v.dtype AS embedding_dtype
+            FROM memory_entries e
+            {memory_db.EMBEDDING_JOIN}
+            ORDER BY e.id
+        ''')
+        engine = VectorEngine.from_rows(dict(row) for row in cursor.fetchall())
+    finally:
+        conn.close()
+
+    path = index_path()
+    with file_lock(path):
+        header = read_header(path)
+        generation = (header["generation"] if header else 0) + 1
+        capacity = max(INITIAL_CAPACITY, len(engine) + len(engine) // 2)
+        dims = engine.dimensions if len(engine) else (header["dims"] if header else 0)
+        matrix = engine.matrix if len(engine) else np.zeros((0, dims), dtype=np.float32)
+        _write_file(path, engine.ids, matrix, capacity, generation)
+        ann_index = _ann_index()
+        if ann_index is not None:
+            ann_index.reassign_rows(engine.ids, matrix, generation, capacity)
+
+    if scan_encoding() is not None:
+        build_codes(scan_encoding())
+
+    return {
+        "success": True,
+        "path": str(path),
+        "rows": len(engine),
+        "dimensions": dims,
+        "generation": generation,
+        "message": f"Vector index rebuilt with {len(engine)} rows"
+    }
+
+
+def open_index() -> Optional[VectorEngine]:
+    """
+    Open the index file as a memory-mapped VectorEngine.
+
+    Returns the cached engine while the file and generation are unchanged,
+    or None if no valid index exists.
+    """
+    path = index_path()
+    header = read_header(path)
+    if header is None:
+        return None
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = (str(path), stat.st_ino, header["generation"], header["count"])
+    if _engine_cache["key"] == key:
+        return _engine_cache["engine"]
+
+    engine = VectorEngine(_map_ids(path, header), _map_matrix(path, header), generation=header["generation"])
+    _engine_cache["key"] = key
+    _engine_cache["engine"] = engine
+    return engine
+
+
+# ---------------------------------------------------------------------------
+# Scan codes (first stage of two-stage search)
+# ---------------------------------------------------------------------------
+
+def scan_encoding() -> Optional[str]:
+    """Configured scan-code encoding, or None when two-stage search is off."""
+    encoding = quantization.SCAN_ENCODING
+    if encoding == 'float32' or encoding not in quantization.ENCODINGS:
+        return None
+    return encoding
+
+
+def codes_path(encoding: str) -> Path:
+    """Path of the scan-code file for an encoding (next to memory.vec)."""
+    path = index_path()
+    return path.with_name(f'{path.name}.{encoding}')
+
+
+def read_codes_header(path: Path) -> Optional[Dict[str, int]]:
+    """Read a scan-code file header, or None if the file is missing or invalid."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(CODES_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) < CODES_HEADER.size:
+        return None
+    magic, dims, size, count, capacity, vec_generation = CODES_HEADER.unpack(raw)
+    if magic != CODES_MAGIC:
+        return None
+    return {"dims": dims, "code_size": size, "count": count, "capacity": capacity,
+            "vec_generation": vec_generation}
+
+
+def _write_codes_header(f, header: Dict[str, int]) -> None:
+    f.seek(0)
+    f.write(CODES_HEADER.pack(
+        CODES_MAGIC, header["dims"], header["code_size"], header["count"],
+        header["capacity"], header["vec_generation"]
+    ).ljust(HEADER_SIZE, b'\0'))
+
+
+def _codes_in_sync(codes_header: Optional[Dict[str, int]], header: Dict[str, int], encoding: str) -> bool:
+    return (
+        codes_header is not None
+        and codes_header["vec_generation"] == header["generation"]
+        and codes_header["count"] == header["count"]
+        and codes_header["capacity"] == header["capacity"]
+        and codes_header["dims"] == header["dims"]
+        and codes_header["code_size"] == quantization.code_size(encoding, header["dims"])
+    )
+
+
+def build_codes(encoding: str) -> Dict[str, Any]:
+    """
+    Encode the whole float32 matrix into the scan-code file for `encoding`.
+
+    Args:
+        encoding: float16, int8 or binary
+
+    Returns:
+        dict with success status and code file info
+    """
+    if encoding not in quantization.ENCODINGS or encoding == 'float32':
+        return {"success": False, "error": "Scan encoding must be one of: float16, int8, binary"}
+
+    path = index_path()
+    with file_lock(path):
+        header = read_header(path)
+        if header is None:
+            return {"success": False, "error": "No vector index; run --rebuild first"}
+
+        size = quantization.code_size(encoding, header["dims"])
+        matrix = _map_matrix(path, header)
+        target = codes_path(encoding)
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            _write_codes_header(f, {
+                "dims": header["dims"], "code_size": size, "count": header["count"],
+                "capacity": header["capacity"], "vec_generation": header["generation"]
+            })
+            f.seek(HEADER_SIZE)
+            for start in range(0, header["count"], quantization.SCAN_CHUNK_ROWS):
+                chunk = matrix[start:start + quantization.SCAN_CHUNK_ROWS]
+                f.write(quantization.encode_matrix(chunk, encoding).tobytes())
+            f.truncate(HEADER_SIZE + header["capacity"] * size)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+
+    return {
+        "success": True,
+        "path": str(target),
+        "encoding": encoding,
+        "rows": header["count"],
+        "bytes_per_vector": size,
+        "vec_generation": header["generation"]
+    }
+
+
+def _upsert_codes(
+    rows: np.ndarray,
+    vectors: np.ndarray,
+    header: Dict[str, int],
+    capacity: int,
+    count: int,
+    generation: int
+) -> None:
+    """
+    Mirror upserted rows into the scan-code file (caller holds the index lock).
+
+    Only applied when the code file was in sync with `header` (the index as
+    it was before this write); otherwise it stays stale and is rebuilt by the
+    next open_codes(). Grows the code file along with the index.
+    """
+    encoding = scan_encoding()
+    if encoding is None:
+        return
+    path = codes_path(encoding)
+    codes_header = read_codes_header(path)
+    if not _codes_in_sync(codes_header, header, encoding):
+        return
+
+    if capacity > codes_header["capacity"]:
+        with open(path, 'r+b') as f:
+            f.truncate(HEADER_SIZE + capacity * codes_header["code_size"])
+    codes = np.memmap(path, dtype=np.uint8, mode='r+', offset=HEADER_SIZE,
+                      shape=(capacity, codes_header["code_size"]))
+    codes[rows] = quantization.encode_matrix(vectors, encoding)
+    codes.flush()
+    del codes
+    with open(path, 'r+b') as f:
+        _write_codes_header(f, {**codes_header, "capacity": capacity, "count": count,
+                                "vec_generation": generation})
+
+
+def open_codes(engine: VectorEngine, encoding: str) -> Optional[np.ndarray]:
+    """
+    Memory-map the scan codes matching an engine opened by open_index().
+
+    Rebuilds the code file if it is missing or stale. Returns a
+    (rows, code_size) uint8 array aligned with engine.ids, or None if the
+    codes cannot be matched to this engine (e.g. a concurrent write).
+    """
+    if engine.generation is None:
+        return None
+    path = codes_path(encoding)
+    header = read_header()
+    if header is None or header["generation"] != engine.generation:
+        return None
+
+    codes_header = read_codes_header(path)
+    if not _codes_in_sync(codes_header, header, encoding):
+        if not build_codes(encoding).get('success'):
+            return None
+        codes_header = read_codes_header(path)
+        if not _codes_in_sync(codes_header, header, encoding):
+            return None
+
+    key = (str(path), path.stat().st_ino, codes_header["vec_generation"], codes_header["count"])
+    if _codes_cache["key"] == key:
+        return _codes_cache["codes"]
+
+    if codes_header["count"] == 0:
+        codes = np.zeros((0, codes_header["code_size"]), dtype=np.uint8)
+    else:
+        codes = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE,
+                          shape=(codes_header["count"], codes_header["code_size"]))
+    _codes_cache["key"] = key
+    _codes_cache["codes"] = codes
+    return codes
+
+
+def get_index_stats() -> Dict[str, Any]:
+    """Report index header info and whether it covers every embedded entry."""
+    path = index_path()
+    header = read_header(path)
+
+    conn = memory_db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM memory_entries WHERE embedding_model IS NOT NULL')
+        embedded_ids = [row['id'] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    engine = open_index()
+    encoding = scan_encoding()
+    codes_header = read_codes_header(codes_path(encoding)) if encoding else None
+    return {
+        "success": True,
+        "stats": {
+            "path": str(path),
+            "exists": header is not None,
+            "dimensions": header["dims"] if header else None,
+            "rows": header["count"] if header else 0,
+            "capacity": header["capacity"] if header else 0,
+            "generation": header["generation"] if header else None,
+            "size_bytes": path.stat().st_size if header else 0,
+            "embedded_entries": len(embedded_ids),
+            "in_sync": engine is not None and engine.contains(embedded_ids),
+            "scan_encoding": encoding,
+            "scan_codes_in_sync": bool(encoding and header and _codes_in_sync(codes_header, header, encoding))
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent Vector Index')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index from memory.db')
+    parser.add_argument('--stats', action='store_true', help='Show index statistics')
+
+    args = parser.parse_args()
+
+    result = None
+
+    if args.rebuild:
+        result = rebuild_index()
+
+    elif args.stats:
+        result = get_index_stats()
+
+    else:
+        parser.print_help()
+        sys.exit(0)
+
+    if result:
+        if result.get('success'):
+            print(f"OK {result.get('message', 'Success')}")
+        else:
+            print(f"ERROR {result.get('error', 'Unknown error')}")
+            sys.exit(1)
+
+        print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()